@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Solver and stress test for the RSA challenge.
+
+source.py gives C1 = m^e and C2 = m^(p^2 + q^2) mod N. Modulo p - 1,
+p = 1 and q = pq = N, so p^2 + q^2 = 1 + N^2; symmetrically modulo
+q - 1, hence C2 = m^(N^2 + 1) mod N. With gcd(e, N^2 + 1) = 1 this is a
+common-modulus pair: a*e + b*(N^2 + 1) = 1 gives m = C1^a * C2^b mod N,
+without factoring N.
+
+--stress regenerates instances with rsautils: keys over a process pool,
+C2 through the CRT context (exponent reduced mod p-1 and q-1), CRT
+decryption of C1, the solver, and a batch GCD over every modulus, each
+timed against the plain pow()/pairwise-gcd way.
+
+    python solve.py                     # the values shipped in source.py
+    python solve.py --stress 2000 -j 8
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from math import gcd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", ".."))
+from rsautils import DEFAULT_E, batch_gcd, generate_keys, rsa_context  # noqa: E402
+
+FLAG_PREFIX = b"shellmates{"
+
+
+class SolveError(Exception):
+    pass
+
+
+def solve(n: int, e: int, c1: int, c2: int) -> int:
+    """m from C1 = m^e and C2 = m^(p^2 + q^2) mod n."""
+    k = n * n + 1
+    if gcd(e, k) != 1:
+        raise SolveError("e and N^2 + 1 are not coprime")
+    # a*e + b*k = 1 with b = k^-1 mod e
+    b = pow(k, -1, e)
+    a = (1 - b * k) // e
+    return pow(c1, a, n) * pow(c2, b, n) % n
+
+
+def shipped_values(path: str) -> tuple:
+    """(N, C1, C2) from the output pasted at the end of source.py."""
+    with open(path) as f:
+        text = f.read()
+    values = dict(re.findall(r"^(N|C1|C2) = (\d+)$", text, re.M))
+    return int(values["N"]), int(values["C1"]), int(values["C2"])
+
+
+def to_bytes(m: int) -> bytes:
+    return m.to_bytes((m.bit_length() + 7) // 8, "big")
+
+
+def stress(count: int, bits: int, processes: int, seed: int) -> bool:
+    rng = random.Random(seed)
+    t0 = time.perf_counter()
+    keys = generate_keys(count, bits, DEFAULT_E, processes)
+    keygen = time.perf_counter() - t0
+    print(f"{count} {bits}-bit keys in {keygen:.2f}s ({count / keygen:,.0f}/s, {processes} processes)")
+
+    messages = [int.from_bytes(FLAG_PREFIX + rng.randbytes(rng.randrange(8, 40)) + b"}", "big")
+                for _ in range(count)]
+    contexts = [rsa_context(p * q, DEFAULT_E, (p, q)) for p, q in keys]
+
+    def timed(fn, args):
+        start = time.perf_counter()
+        result = [fn(ctx, x) for ctx, x in zip(contexts, args)]
+        return result, time.perf_counter() - start
+
+    c2_plain, t_plain = timed(lambda ctx, m: pow(m, ctx.p * ctx.p + ctx.q * ctx.q, ctx.n), messages)
+    c2_crt, t_crt = timed(lambda ctx, m: ctx.power(m, ctx.p * ctx.p + ctx.q * ctx.q), messages)
+    print(f"C2 = m^(p^2+q^2): pow {t_plain:.2f}s, CRT {t_crt:.2f}s ({t_plain / t_crt:.1f}x)")
+    ok = c2_plain == c2_crt
+
+    c1 = [ctx.encrypt(m) for ctx, m in zip(contexts, messages)]
+    plain, t_plain = timed(lambda ctx, c: pow(c, ctx.d, ctx.n), c1)
+    ptexts, t_crt = timed(lambda ctx, c: ctx.decrypt(c), c1)
+    ok &= plain == ptexts == messages
+    print(f"decrypt C1: pow(c, d, N) {t_plain:.2f}s, CRT {t_crt:.2f}s ({t_plain / t_crt:.1f}x)")
+
+    start = time.perf_counter()
+    solved = [solve(ctx.n, ctx.e, a, b) for ctx, a, b in zip(contexts, c1, c2_crt)]
+    t_solve = time.perf_counter() - start
+    wrong = sum(s != m for s, m in zip(solved, messages))
+    ok &= not wrong
+    print(f"solver: {count - wrong}/{count} instances in {t_solve:.2f}s")
+
+    # Plant one shared prime so the scan has something to find
+    moduli = [ctx.n for ctx in contexts]
+    if count >= 2:
+        p0 = keys[0][0]
+        moduli.append(p0 * keys[1][1])
+    start = time.perf_counter()
+    shared = [i for i, g in enumerate(batch_gcd(moduli)) if g != 1]
+    t_batch = time.perf_counter() - start
+    sample = moduli[:min(len(moduli), 300)]
+    start = time.perf_counter()
+    for i in range(len(sample)):
+        for j in range(i + 1, len(sample)):
+            gcd(sample[i], sample[j])
+    pairs = len(sample) * (len(sample) - 1)
+    t_pairs = (time.perf_counter() - start) * len(moduli) * (len(moduli) - 1) / max(1, pairs)
+    print(f"batch GCD over {len(moduli)} moduli: {t_batch:.2f}s "
+          f"(pairwise gcd, extrapolated from {len(sample)}: {t_pairs:.2f}s); shared factors in {shared}")
+    ok &= count < 2 or shared == [0, 1, len(moduli) - 1]
+    print("ok" if ok else "FAILED")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve or stress-test the RSA challenge.")
+    parser.add_argument("--source", default=os.path.join(HERE, "..", "source.py"),
+                        help="file with the N, C1, C2 output")
+    parser.add_argument("--stress", type=int, metavar="KEYS", help="regenerate and solve this many instances")
+    parser.add_argument("--bits", type=int, default=1024, help="stress: modulus size")
+    parser.add_argument("-j", "--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=1337)
+    args = parser.parse_args()
+
+    if args.stress:
+        sys.exit(0 if stress(args.stress, args.bits, args.processes, args.seed) else 1)
+
+    n, c1, c2 = shipped_values(args.source)
+    try:
+        m = solve(n, DEFAULT_E, c1, c2)
+    except SolveError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(to_bytes(m).decode(errors="replace"))
+
+
+if __name__ == "__main__":
+    main()
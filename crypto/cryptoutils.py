@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for the crypto challenge generators and solvers.
+
+- xor_bytes: XOR a whole buffer with a repeating key in one big-int operation
+- lcg_jump: affine jump-ahead for x_{n+1} = (A * x_n + C) mod 2^64
+- lcg_states / lcg_keystream: N successive LCG states in bulk, from any offset
+- LCG: random-access generator (advance, state_at, keystream[a:b]) and
+  lcg_encrypt, which splits a long buffer into block ranges across processes
+
+lcg_states fills a NumPy uint64 array by doubling: once the first k states
+are known, the next k are one vectorized affine map (A^k, C_k) away, so
+only log2(N) array operations run. Without NumPy it falls back to a plain
+loop into an array('Q').
+
+Generators import this file from the crypto/ directory:
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+"""
+
+import sys
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MOD = 2**64
+MASK = MOD - 1
+
+
+def xor_bytes(a: bytes, b: bytes) -> bytes:
+    """XOR two byte strings (b is repeated if shorter)."""
+    n = len(a)
+    if not n:
+        return b""
+    if len(b) < n:
+        b = bytes(b) * (n // len(b) + 1)
+    return (int.from_bytes(a, "big") ^ int.from_bytes(b[:n], "big")).to_bytes(n, "big")
+
+
+def lcg_compose(first: tuple, then: tuple) -> tuple:
+    """Affine map for applying `first`, then `then`; maps are (a, c) pairs."""
+    a1, c1 = first
+    a2, c2 = then
+    return (a1 * a2) & MASK, (a2 * c1 + c2) & MASK
+
+
+def _compose_powers(powers: list, k: int) -> tuple:
+    """Map for k steps from powers[i] = map for 2^i steps, extending the list as needed."""
+    if k < 0:
+        raise ValueError("cannot jump backwards")
+    while len(powers) < k.bit_length():
+        powers.append(lcg_compose(powers[-1], powers[-1]))
+    result = (1, 0)
+    i = 0
+    while k:
+        if k & 1:
+            result = lcg_compose(result, powers[i])
+        k >>= 1
+        i += 1
+    return result
+
+
+def lcg_jump(a: int, c: int, k: int) -> tuple:
+    """(A_k, C_k) such that x_{n+k} = (A_k * x_n + C_k) mod 2^64, in O(log k)."""
+    return _compose_powers([(a & MASK, c & MASK)], k)
+
+
+def lcg_states(a: int, c: int, seed: int, n: int, offset: int = 0):
+    """States x_{offset+1} .. x_{offset+n} after seed (NumPy uint64 array if available)."""
+    ak, ck = lcg_jump(a, c, offset + 1)
+    return _fill_states(a, c, (ak * seed + ck) & MASK, n)
+
+
+def _fill_states(a: int, c: int, first: int, n: int):
+    """first followed by its n - 1 successors."""
+    if n <= 0:
+        return np.empty(0, dtype=np.uint64) if np is not None else array("Q")
+
+    if np is None:
+        out = array("Q", [0]) * n
+        x = first
+        a &= MASK
+        c &= MASK
+        for i in range(n):
+            out[i] = x
+            x = (a * x + c) & MASK
+        return out
+
+    out = np.empty(n, dtype=np.uint64)
+    out[0] = first
+    filled = 1
+    step_a, step_c = a & MASK, c & MASK
+    while filled < n:
+        take = min(filled, n - filled)
+        # uint64 arithmetic wraps, which is exactly mod 2^64
+        np.multiply(out[:take], np.uint64(step_a), out=out[filled:filled + take])
+        out[filled:filled + take] += np.uint64(step_c)
+        filled += take
+        step_a, step_c = lcg_compose((step_a, step_c), (step_a, step_c))
+    return out
+
+
+def states_to_bytes(states) -> bytes:
+    """Concatenate 64-bit states as 8-byte big-endian blocks."""
+    if np is not None and isinstance(states, np.ndarray):
+        return states.astype(">u8").tobytes()
+    blocks = array("Q", states)
+    if sys.byteorder == "little":
+        blocks.byteswap()
+    return blocks.tobytes()
+
+
+def lcg_keystream(a: int, c: int, seed: int, n_bytes: int, offset_blocks: int = 0) -> bytes:
+    """n_bytes of keystream starting at 8-byte block offset_blocks (block 0 = first state)."""
+    n_blocks = (n_bytes + 7) // 8
+    return states_to_bytes(lcg_states(a, c, seed, n_blocks, offset_blocks))[:n_bytes]
+
+
+class LCG:
+    """x_{n+1} = (a * x_n + c) mod 2^64 with O(log k) random access.
+
+    state_at(0) is the seed; keystream byte i comes from state i // 8 + 1,
+    big-endian, as in the lcg-orbit generator:
+
+        lcg = LCG(A, C, SEED)
+        lcg.state_at(10**18)
+        lcg.keystream[8 * k:8 * k + 32]
+    """
+
+    def __init__(self, a: int, c: int, seed: int):
+        self.a = a & MASK
+        self.c = c & MASK
+        self.seed = seed & MASK
+        self.position = 0
+        self.state = self.seed
+        # _powers[i] is the map for 2^i steps, grown on demand
+        self._powers = [(self.a, self.c)]
+        self.keystream = Keystream(self)
+
+    def jump(self, k: int) -> tuple:
+        """(A_k, C_k) for k steps, from the cached table of power-of-two maps."""
+        return _compose_powers(self._powers, k)
+
+    def state_at(self, k: int) -> int:
+        ak, ck = self.jump(k)
+        return (ak * self.seed + ck) & MASK
+
+    def advance(self, k: int = 1) -> int:
+        """Move the current state k steps forward and return it."""
+        ak, ck = self.jump(k)
+        self.state = (ak * self.state + ck) & MASK
+        self.position += k
+        return self.state
+
+    def seek(self, k: int) -> int:
+        self.state = self.state_at(k)
+        self.position = k
+        return self.state
+
+    def states(self, start: int, stop: int):
+        """x_start .. x_{stop-1} in bulk (see lcg_states)."""
+        return _fill_states(self.a, self.c, self.state_at(start), stop - start)
+
+
+class Keystream:
+    """Byte-addressable view of an LCG keystream: ks[i], ks[a:b]."""
+
+    def __init__(self, lcg: LCG):
+        self.lcg = lcg
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            if key.step not in (None, 1):
+                raise ValueError("keystream slices cannot have a step")
+            start = key.start or 0
+            stop = key.stop
+            if stop is None or start < 0 or stop < 0:
+                raise ValueError("keystream slices need explicit non-negative bounds")
+            if stop <= start:
+                return b""
+            first = start // 8
+            blocks = self.lcg.states(first + 1, (stop + 7) // 8 + 1)
+            return states_to_bytes(blocks)[start - 8 * first:stop - 8 * first]
+        if key < 0:
+            raise IndexError("the keystream has no end")
+        return self.lcg.state_at(key // 8 + 1).to_bytes(8, "big")[key % 8]
+
+
+def _encrypt_range(job):
+    a, c, seed, data, offset = job
+    return xor_bytes(data, LCG(a, c, seed).keystream[offset:offset + len(data)])
+
+
+def lcg_encrypt(a: int, c: int, seed: int, data: bytes, offset: int = 0,
+                processes: int = 1, chunk: int = 1 << 22) -> bytes:
+    """XOR data with the keystream from byte offset, split in block ranges over processes."""
+    if processes <= 1 or len(data) <= chunk:
+        return _encrypt_range((a, c, seed, data, offset))
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunk -= chunk % 8
+    jobs = [(a, c, seed, data[i:i + chunk], offset + i) for i in range(0, len(data), chunk)]
+    with ProcessPoolExecutor(processes) as pool:
+        return b"".join(pool.map(_encrypt_range, jobs))
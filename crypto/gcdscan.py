@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Batch-GCD scanner: do any of these RSA moduli share a prime?
+
+Moduli are streamed from text files, one per line: a bare integer
+(decimal or 0x hex), "N = ..." / "n=..." as printed by the challenges,
+or a JSON object with an "n" or "N" key, on one line or indented like
+the too_many_nights transcripts.
+Other lines are skipped.
+
+The scan is Bernstein's batch GCD (rsautils): a product tree over all
+moduli, then P mod n_i^2 down a remainder tree, and gcd(n_i, that / n_i).
+Work inside each tree level is spread over a process pool. With
+--checkpoint, every finished level is written to disk and an interrupted
+scan over the same moduli resumes from the last one.
+
+    python gcdscan.py moduli.txt -j 8 --checkpoint /tmp/scan
+    python gcdscan.py --generate 2000 --bits 512 --shared 3 -o moduli.txt
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import struct
+import sys
+import time
+from math import gcd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from rsautils import batch_gcd, mpz  # noqa: E402
+
+MANIFEST_NAME = "manifest.json"
+# N = ..., n=..., or a "n": ... line of an indented JSON transcript
+_ASSIGNMENT = re.compile(r'^\s*"?[nN]"?\s*[=:]\s*(0[xX][0-9a-fA-F]+|\d+)\s*,?\s*$')
+
+
+def _to_int(text: str):
+    """int(text, 0), or None for text like "0123" or "abc"."""
+    try:
+        return int(text, 0)
+    except ValueError:
+        return None
+
+
+def parse_modulus(line: str):
+    """The modulus on a line, or None if it does not hold one."""
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    if line.startswith("{"):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return None
+        value = record.get("n", record.get("N")) if isinstance(record, dict) else None
+        return _to_int(value) if isinstance(value, str) else value if isinstance(value, int) else None
+    match = _ASSIGNMENT.match(line)
+    return _to_int(match.group(1) if match else line)
+
+
+def read_moduli(paths):
+    """Yield (where, n) for every modulus in the files ('-' for stdin), one line at a time."""
+    for path in paths:
+        f = sys.stdin if path == "-" else open(path)
+        try:
+            for number, line in enumerate(f, 1):
+                n = parse_modulus(line)
+                if n is not None and n > 1:
+                    yield f"{path}:{number}", n
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+
+# ----------------------------------------------------------------------
+# Checkpoints: one binary file per finished tree level
+
+
+def write_level(path: str, values) -> None:
+    """u64 count, then u64 length + big-endian bytes per value; atomic."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(struct.pack("<Q", len(values)))
+        for v in values:
+            v = int(v)
+            data = v.to_bytes((v.bit_length() + 7) // 8, "big")
+            f.write(struct.pack("<Q", len(data)))
+            f.write(data)
+    os.replace(tmp, path)
+
+
+def read_level(path: str) -> list:
+    with open(path, "rb") as f:
+        (count,) = struct.unpack("<Q", f.read(8))
+        values = []
+        for _ in range(count):
+            (size,) = struct.unpack("<Q", f.read(8))
+            v = int.from_bytes(f.read(size), "big")
+            values.append(mpz(v) if mpz is not None else v)
+    return values
+
+
+class Checkpoint:
+    """Finished levels of one scan, keyed by a digest of its moduli."""
+
+    def __init__(self, directory: str, digest: str):
+        self.directory = directory
+        self.digest = digest
+        os.makedirs(directory, exist_ok=True)
+        self.state = {"digest": digest, "product": 0, "remainder": 0}
+        path = os.path.join(directory, MANIFEST_NAME)
+        try:
+            with open(path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            saved = None
+        if saved and saved.get("digest") == digest:
+            self.state = saved
+
+    def levels(self, kind: str) -> int:
+        return self.state[kind]
+
+    def load(self, kind: str, index: int) -> list:
+        return read_level(os.path.join(self.directory, f"{kind}-{index:02d}.bin"))
+
+    def save(self, kind: str, index: int, values) -> None:
+        write_level(os.path.join(self.directory, f"{kind}-{index:02d}.bin"), values)
+        self.state[kind] = index + 1
+        path = os.path.join(self.directory, MANIFEST_NAME)
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.state, f)
+        os.replace(path + ".tmp", path)
+
+
+# ----------------------------------------------------------------------
+# Scan
+
+
+def digest_moduli(moduli) -> str:
+    h = hashlib.sha256()
+    for n in moduli:
+        n = int(n)
+        data = n.to_bytes((n.bit_length() + 7) // 8, "big")
+        h.update(struct.pack("<Q", len(data)))
+        h.update(data)
+    return h.hexdigest()
+
+
+def scan(moduli: list, processes: int = 1, checkpoint: Checkpoint = None, log=None) -> list:
+    """gcd(n_i, product of the others) for every modulus (rsautils.batch_gcd)."""
+    log = log or (lambda message: None)
+    if len(moduli) < 2:
+        return [1] * len(moduli)
+
+    pool = None
+    if processes > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        pool = ProcessPoolExecutor(processes)
+
+    def run(fn, jobs):
+        if pool is None or len(jobs) < 2:
+            return [fn(job) for job in jobs]
+        return list(pool.map(fn, jobs, chunksize=max(1, len(jobs) // (processes * 4))))
+
+    height = 0
+
+    def level(kind, index, compute):
+        nonlocal height
+        start = time.perf_counter()
+        if checkpoint and index < checkpoint.levels(kind):
+            values = checkpoint.load(kind, index)
+            how = "loaded"
+        else:
+            values = compute()
+            if checkpoint:
+                checkpoint.save(kind, index, values)
+            how = "computed"
+        elapsed = time.perf_counter() - start
+        if kind == "product":
+            height = index + 1
+            log(f"product level {height}: {len(values)} nodes of ~{int(values[0]).bit_length()} bits, "
+                f"{how} in {elapsed:.2f}s")
+        else:
+            log(f"remainder level {height - 1 - index}: {len(values)} nodes, {how} in {elapsed:.2f}s")
+        return values
+
+    try:
+        return batch_gcd(moduli, run, level)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def findings(moduli: list, gcds: list) -> list:
+    """[(i, kind, factor)] for every modulus with a shared factor.
+
+    kind is "factor" when gcd < n (factor = gcd), or "repeated" when the
+    whole modulus is shared: a duplicate, or both primes used elsewhere.
+    For those, pairwise gcds among the flagged moduli pull the primes out.
+    """
+    flagged = [i for i, g in enumerate(gcds) if g != 1]
+    out = []
+    for i in flagged:
+        n, g = moduli[i], gcds[i]
+        if g != n:
+            out.append((i, "factor", g))
+            continue
+        factor = None
+        for j in flagged:
+            if j != i:
+                f = gcd(n, moduli[j])
+                if 1 < f < n:
+                    factor = f
+                    break
+        out.append((i, "repeated", factor))
+    return out
+
+
+def generate(count: int, bits: int, shared: int, seed: int) -> list:
+    """count moduli of `bits` bits; `shared` extra ones reuse a prime of an earlier modulus."""
+    from Crypto.Util.number import getPrime
+
+    rng = random.Random(seed)
+    primes = [(getPrime(bits // 2), getPrime(bits - bits // 2)) for _ in range(count)]
+    moduli = [p * q for p, q in primes]
+    for _ in range(shared):
+        p, _ = primes[rng.randrange(count)]
+        moduli.insert(rng.randrange(len(moduli) + 1), p * getPrime(bits - bits // 2))
+    return moduli
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find RSA moduli that share a prime (batch GCD).")
+    parser.add_argument("inputs", nargs="*", help="files with one modulus per line ('-' for stdin)")
+    parser.add_argument("-j", "--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--checkpoint", help="directory for finished tree levels (resumable)")
+    parser.add_argument("--json", action="store_true", help="report findings as JSON lines")
+    parser.add_argument("-q", "--quiet", action="store_true", help="no per-level progress")
+    parser.add_argument("--generate", type=int, metavar="COUNT", help="write COUNT test moduli instead")
+    parser.add_argument("--bits", type=int, default=1024, help="--generate: modulus size")
+    parser.add_argument("--shared", type=int, default=0, help="--generate: extra moduli reusing a prime")
+    parser.add_argument("--seed", type=int, default=1337)
+    parser.add_argument("-o", "--output", help="--generate: output file (default stdout)")
+    args = parser.parse_args()
+
+    if args.generate:
+        moduli = generate(args.generate, args.bits, args.shared, args.seed)
+        out = open(args.output, "w") if args.output else sys.stdout
+        try:
+            for n in moduli:
+                out.write(f"{n}\n")
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        return
+
+    if not args.inputs:
+        parser.error("no input files")
+    where = []
+    moduli = []
+    try:
+        for location, n in read_moduli(args.inputs):
+            where.append(location)
+            moduli.append(n)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    log = (lambda message: None) if args.quiet else (lambda message: print(message, file=sys.stderr))
+    checkpoint = Checkpoint(args.checkpoint, digest_moduli(moduli)) if args.checkpoint else None
+    start = time.perf_counter()
+    gcds = scan(moduli, args.processes, checkpoint, log)
+    elapsed = time.perf_counter() - start
+    found = findings(moduli, gcds)
+
+    for i, kind, factor in found:
+        if args.json:
+            print(json.dumps({"where": where[i], "kind": kind, "factor": factor and str(factor)}))
+        elif factor:
+            print(f"{where[i]}: {kind}, shares the {int(factor).bit_length()}-bit factor {factor}")
+        else:
+            print(f"{where[i]}: {kind} modulus")
+    print(f"{len(moduli)} moduli scanned in {elapsed:.2f}s with {args.processes} processes, "
+          f"{len(found)} share a factor", file=sys.stderr)
+    sys.exit(1 if found else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -16,8 +16,13 @@ Players see:
   - encrypt.py           (LCG structure, but A, C, seed removed)
 """
 
+import argparse
 import os
 import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from cryptoutils import LCG, lcg_encrypt, xor_bytes  # noqa: E402
 
 FLAG = b"shellmates{lCG_prng_k3Y_r3C0v3ry}"
 PLAINTEXT_KNOWN = (
@@ -25,59 +30,49 @@ PLAINTEXT_KNOWN = (
     b"ONCE YOU RECOVER THE GENERATOR, YOU CAN DECRYPT THE SECRET FLAG.\n"
 )
 
-MOD = 2**64
-
-
-def lcg_next(x: int, a: int, c: int) -> int:
-    return (a * x + c) % MOD
-
-
-def keystream(a: int, c: int, seed: int, n_blocks: int):
-    """Yield n_blocks successive 8-byte blocks from the LCG."""
-    x = seed
-    for _ in range(n_blocks):
-        x = lcg_next(x, a, c)
-        yield x.to_bytes(8, "big")
 
+def encrypt_instance(a: int, c: int, seed: int, known: bytes, flag: bytes, processes: int = 1):
+    """Return (ciphertext_known, ciphertext_flag) for one set of LCG parameters.
 
-def xor_bytes(a: bytes, b: bytes) -> bytes:
-    """XOR two byte strings (b is repeated if shorter)."""
-    return bytes(x ^ b[i % len(b)] for i, x in enumerate(a))
+    The known plaintext uses keystream blocks 0..k-1 (k = ceil(len/8)) and
+    the flag continues at block k. Long plaintexts are split into block
+    ranges across processes.
+    """
+    blocks_known = (len(known) + 7) // 8
+    ciphertext_known = lcg_encrypt(a, c, seed, known, processes=processes)
+    ks = LCG(a, c, seed).keystream
+    ciphertext_flag = xor_bytes(flag, ks[8 * blocks_known:8 * blocks_known + len(flag)])
+    return ciphertext_known, ciphertext_flag
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate the LCG Orbit challenge files.")
+    parser.add_argument("--out-dir", default=os.path.dirname(__file__),
+                        help="where to write the files (default: next to this script)")
+    parser.add_argument("--known-bytes", type=int,
+                        help="repeat the known plaintext up to this many bytes (stress variants)")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="encrypt the known plaintext in block ranges across processes")
+    args = parser.parse_args()
+
     random.seed(1337)
     # Secret LCG parameters (not revealed to players)
     A = 0x5851F42D4C957F2D  # odd multiplier
     C = 0x14057B7EF767814F  # increment
     SEED = random.getrandbits(64)
 
-    base_dir = os.path.dirname(__file__)
-
-    # Build keystream for known plaintext
-    blocks_known = (len(PLAINTEXT_KNOWN) + 7) // 8
-    ks_blocks = list(keystream(A, C, SEED, blocks_known))
-    ks_known = b"".join(ks_blocks)[: len(PLAINTEXT_KNOWN)]
-
-    ciphertext_known = xor_bytes(PLAINTEXT_KNOWN, ks_known)
+    base_dir = args.out_dir
+    os.makedirs(base_dir or ".", exist_ok=True)
 
-    # Continue keystream for flag (from where we stopped)
-    # Last state used in ks_blocks is the last element's state; recompute it:
-    # We can get the last x from ks_blocks[-1]
-    last_x = int.from_bytes(ks_blocks[-1], "big")
-    blocks_flag = (len(FLAG) + 7) // 8
-    ks_blocks_flag = []
-    x = last_x
-    for _ in range(blocks_flag):
-        x = lcg_next(x, A, C)
-        ks_blocks_flag.append(x.to_bytes(8, "big"))
-    ks_flag = b"".join(ks_blocks_flag)[: len(FLAG)]
+    known = PLAINTEXT_KNOWN
+    if args.known_bytes:
+        known = (PLAINTEXT_KNOWN * (args.known_bytes // len(PLAINTEXT_KNOWN) + 1))[: args.known_bytes]
 
-    ciphertext_flag = xor_bytes(FLAG, ks_flag)
+    ciphertext_known, ciphertext_flag = encrypt_instance(A, C, SEED, known, FLAG, args.processes)
 
     # Write files for the challenge
     with open(os.path.join(base_dir, "plaintext_known.txt"), "wb") as f:
-        f.write(PLAINTEXT_KNOWN)
+        f.write(known)
 
     with open(os.path.join(base_dir, "ciphertext_known.hex"), "w") as f:
         f.write(ciphertext_known.hex())
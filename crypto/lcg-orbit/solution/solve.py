@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Solver and instance checker for the LCG Orbit challenge.
+
+1. known plaintext XOR ciphertext_known -> keystream -> consecutive states x_1..x_n
+2. d_i = x_{i+1} - x_i satisfies d_{i+1} = A * d_i (mod 2^64). If the least
+   2-adic valuation among the d_i is v, A is only fixed modulo 2^(64-v):
+   the 2^v lifts A0 + t * 2^(64-v) are enumerated and checked against every
+   state, and C = x_2 - A * x_1 for each.
+3. any surviving (A, C) continues the stream at block ceil(len/8) and
+   decrypts the flag. Lifts that agree on the known states also agree on
+   every later state when A is odd, so the enumeration only matters for
+   even multipliers.
+
+    python solve.py                      # solve the shipped files
+    python solve.py --batch 5000 -j 8    # regenerate and solve random instances
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", ".."))
+sys.path.insert(0, os.path.join(HERE, ".."))
+from cryptoutils import LCG, MASK, xor_bytes  # noqa: E402
+from generate import encrypt_instance  # noqa: E402
+
+FLAG_PREFIX = b"shellmates{"
+
+
+class RecoveryError(Exception):
+    pass
+
+
+def valuation(x: int) -> int:
+    """2-adic valuation of x mod 2^64 (64 for zero)."""
+    x &= MASK
+    return (x & -x).bit_length() - 1 if x else 64
+
+
+def keystream_states(known: bytes, ciphertext: bytes):
+    """Full 64-bit states, plus (value, byte count) of a trailing partial block."""
+    ks = xor_bytes(known, ciphertext[: len(known)])
+    full = len(ks) // 8
+    states = [int.from_bytes(ks[8 * i:8 * i + 8], "big") for i in range(full)]
+    tail = ks[8 * full:]
+    return states, (int.from_bytes(tail, "big"), len(tail)) if tail else None
+
+
+def recover_parameters(states, partial=None, limit: int = 1 << 16):
+    """Return (candidates, v): every (A, C) consistent with the states.
+
+    Only the first `limit` of the 2^v lifts are tried; v is returned so
+    callers can tell when that happened (v > log2(limit)).
+    """
+    if len(states) < 3:
+        raise RecoveryError("need at least 3 consecutive states")
+    diffs = [(b - a) & MASK for a, b in zip(states, states[1:])]
+
+    # The most informative congruence A * d_i = d_{i+1} is the one with the
+    # smallest valuation of d_i.
+    best = None
+    for i in range(len(diffs) - 1):
+        v = valuation(diffs[i])
+        if best is None or v < best[0]:
+            best = (v, i)
+    v, i = best
+    if v == 64:
+        # Constant sequence: every A works, C is then fixed by A.
+        base, step = 0, 1
+    else:
+        d, nxt = diffs[i], diffs[i + 1]
+        if valuation(nxt) < v:
+            raise RecoveryError("states are not consecutive outputs of one LCG")
+        modulus = 1 << (64 - v)
+        base = ((nxt >> v) * pow(d >> v, -1, modulus)) % modulus
+        step = modulus
+
+    candidates = []
+    for t in range(min(1 << v, limit)):
+        a = base + t * step
+        c = (states[1] - a * states[0]) & MASK
+        if any((a * x + c) & MASK != y for x, y in zip(states, states[1:])):
+            continue
+        if partial is not None:
+            value, nbytes = partial
+            if ((a * states[-1] + c) & MASK) >> (64 - 8 * nbytes) != value:
+                continue
+        candidates.append((a, c))
+    if not candidates:
+        raise RecoveryError("no (A, C) reproduces the known keystream")
+    return candidates, v
+
+
+def decrypt_flag(a: int, c: int, first_state: int, ciphertext_flag: bytes, block: int) -> bytes:
+    """XOR ciphertext_flag with the keystream from 8-byte block `block` (x_1 is block 0)."""
+    if block < 1:
+        raise RecoveryError("flag keystream starts before the first known state")
+    # Seeded with x_1, the LCG's keystream starts at x_2, i.e. block 1
+    ks = LCG(a, c, first_state).keystream
+    start = 8 * (block - 1)
+    return xor_bytes(ciphertext_flag, ks[start:start + len(ciphertext_flag)])
+
+
+def solve(known: bytes, ciphertext_known: bytes, ciphertext_flag: bytes, limit: int = 1 << 16):
+    """Return (flag, candidates, v); flag is the decryption shared by the candidates."""
+    states, partial = keystream_states(known, ciphertext_known)
+    candidates, v = recover_parameters(states, partial, limit)
+    block = (len(known) + 7) // 8
+    plaintexts = {decrypt_flag(a, c, states[0], ciphertext_flag, block) for a, c in candidates}
+    if len(plaintexts) > 1:
+        flagged = [p for p in plaintexts if p.startswith(FLAG_PREFIX)]
+        if len(flagged) != 1:
+            raise RecoveryError(f"{len(plaintexts)} different decryptions, cannot choose")
+        return flagged[0], candidates, v
+    return plaintexts.pop(), candidates, v
+
+
+# ----------------------------------------------------------------------
+# Batch validation of regenerated instances
+
+
+def random_instance(rng: random.Random, even_multipliers: float = 0.0):
+    a = rng.getrandbits(64)
+    a = a & ~1 if rng.random() < even_multipliers else a | 1
+    c = rng.getrandbits(64)
+    seed = rng.getrandbits(64)
+    alphabet = b"ABCDEFGHIJKLMNOPQRSTUVWXYZ .,-0123456789\n"
+    known = bytes(rng.choice(alphabet) for _ in range(rng.randrange(24, 257)))
+    body = bytes(rng.choice(b"abcdefghijklmnopqrstuvwxyz0123456789_") for _ in range(rng.randrange(8, 48)))
+    flag = FLAG_PREFIX + body + b"}"
+    return a, c, seed, known, flag
+
+
+def check_instance(job):
+    """Regenerate instance `index` of a batch and solve it; returns an outcome name."""
+    seed, index, even_multipliers, limit = job
+    rng = random.Random(seed * 1_000_003 + index)
+    a, c, lcg_seed, known, flag = random_instance(rng, even_multipliers)
+    ciphertext_known, ciphertext_flag = encrypt_instance(a, c, lcg_seed, known, flag)
+    try:
+        recovered, candidates, v = solve(known, ciphertext_known, ciphertext_flag, limit)
+    except RecoveryError as e:
+        return "unsolved", index, str(e)
+    if recovered != flag:
+        return "wrong", index, f"A={a:#x} C={c:#x} seed={lcg_seed:#x}"
+    if not any(cand == (a, c) for cand in candidates) and v <= limit.bit_length() - 1:
+        return "wrong", index, f"A={a:#x} C={c:#x} missing from {len(candidates)} candidates"
+    return "ok", index, v
+
+
+def batch(count: int, processes: int, seed: int, even_multipliers: float, limit: int) -> bool:
+    jobs = [(seed, i, even_multipliers, limit) for i in range(count)]
+    start = time.perf_counter()
+    if processes > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(processes) as pool:
+            results = list(pool.map(check_instance, jobs, chunksize=max(1, count // (processes * 16))))
+    else:
+        results = [check_instance(job) for job in jobs]
+    elapsed = time.perf_counter() - start
+
+    outcomes = {}
+    ambiguous = 0
+    for outcome, index, detail in results:
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+        if outcome == "ok" and detail:
+            ambiguous += 1
+        elif outcome != "ok":
+            print(f"instance {index}: {outcome}: {detail}")
+    print(f"{count} instances in {elapsed:.2f}s ({count / elapsed:,.0f}/s): "
+          f"{outcomes.get('ok', 0)} solved ({ambiguous} with A only known mod 2^(64-v)), "
+          f"{outcomes.get('wrong', 0)} wrong, {outcomes.get('unsolved', 0)} unsolved")
+    return outcomes.get("ok", 0) == count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve or batch-check the LCG Orbit challenge.")
+    parser.add_argument("--dir", default=os.path.join(HERE, ".."), help="challenge files directory")
+    parser.add_argument("--batch", type=int, help="solve this many random regenerated instances")
+    parser.add_argument("-j", "--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=1337)
+    parser.add_argument("--even-multipliers", type=float, default=0.0,
+                        help="batch: fraction of instances with an even A (outside the challenge spec)")
+    parser.add_argument("--limit", type=int, default=1 << 16, help="max 2-adic lifts enumerated")
+    args = parser.parse_args()
+
+    if args.batch:
+        ok = batch(args.batch, args.processes, args.seed, args.even_multipliers, args.limit)
+        sys.exit(0 if ok else 1)
+
+    with open(os.path.join(args.dir, "plaintext_known.txt"), "rb") as f:
+        known = f.read()
+    with open(os.path.join(args.dir, "ciphertext_known.hex")) as f:
+        ciphertext_known = bytes.fromhex(f.read().strip())
+    with open(os.path.join(args.dir, "ciphertext_flag.hex")) as f:
+        ciphertext_flag = bytes.fromhex(f.read().strip())
+
+    flag, candidates, v = solve(known, ciphertext_known, ciphertext_flag, args.limit)
+    for a, c in candidates[:4]:
+        print(f"A = {a:#018x}  C = {c:#018x}")
+    if len(candidates) > 1:
+        print(f"... {len(candidates)} candidates, A is only known mod 2^{64 - v}")
+    print(flag.decode(errors="replace"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+RSA helpers for the crypto challenge generators and solvers.
+
+- RSAContext: a key with its CRT parameters; decrypt() and power() do two
+  half-size exponentiations with reduced exponents instead of one full one
+- rsa_context: contexts memoized per modulus, so checkers that see the
+  same N again reuse d, dp, dq and q^-1 mod p instead of redoing them
+- generate_keys: fresh keys, optionally over a process pool
+- product_tree / remainder_tree / batch_gcd: the factor every modulus
+  shares with all the others, in quasi-linear time instead of one gcd
+  per pair; hooks run each level on a pool or restore it from a
+  checkpoint (see gcdscan.py)
+
+CPython's long division is quadratic, which dominates the top of a
+remainder tree. Above NEWTON_BITS, remainders use a Newton reciprocal
+and multiplications only (Karatsuba). With gmpy2 installed the trees
+use GMP integers instead.
+
+Key generation needs pycryptodome (imported when first used), the rest
+is plain Python integers. Solvers import this file from the crypto/
+directory, like cryptoutils.py.
+"""
+
+from math import gcd
+
+try:
+    from gmpy2 import mpz
+except ImportError:
+    mpz = None
+
+DEFAULT_E = 65537
+# Contexts kept by rsa_context, oldest evicted first
+CONTEXT_CACHE = 4096
+# Moduli above this size are reduced with a Newton reciprocal, and
+# reciprocals below _RECIPROCAL_BITS come from one plain division
+NEWTON_BITS = 1 << 18
+_RECIPROCAL_BITS = 1 << 14
+
+_CONTEXTS = {}
+
+
+class RSAContext:
+    """RSA key (p, q, e) with the values CRT needs, computed once."""
+
+    def __init__(self, p: int, q: int, e: int = DEFAULT_E):
+        if p == q:
+            raise ValueError("p and q must be distinct")
+        self.p = p
+        self.q = q
+        self.e = e
+        self.n = p * q
+        self.phi = (p - 1) * (q - 1)
+        self.d = pow(e, -1, self.phi)
+        self.dp = self.d % (p - 1)
+        self.dq = self.d % (q - 1)
+        self.qinv = pow(q, -1, p)
+
+    def encrypt(self, m: int) -> int:
+        return pow(m, self.e, self.n)
+
+    def decrypt(self, c: int) -> int:
+        return self._combine(pow(c, self.dp, self.p), pow(c, self.dq, self.q))
+
+    def power(self, m: int, k: int) -> int:
+        """m^k mod n for any k >= 0 (e.g. p^2 + q^2), exponents reduced mod p-1 and q-1."""
+        if k < 0:
+            raise ValueError("negative exponent")
+        if k == 0:
+            return 1 % self.n
+        # Fermat only holds for m coprime to the prime; 0 stays 0 for k > 0
+        mp = m % self.p
+        mq = m % self.q
+        rp = pow(mp, k % (self.p - 1), self.p) if mp else 0
+        rq = pow(mq, k % (self.q - 1), self.q) if mq else 0
+        return self._combine(rp, rq)
+
+    def _combine(self, rp: int, rq: int) -> int:
+        """Garner: the x mod n with x = rp mod p and x = rq mod q."""
+        return rq + (self.qinv * (rp - rq) % self.p) * self.q
+
+
+def rsa_context(n: int, e: int = DEFAULT_E, factors: tuple = None) -> RSAContext:
+    """Context for modulus n, built once; (p, q) are needed the first time."""
+    key = (n, e)
+    ctx = _CONTEXTS.get(key)
+    if ctx is None:
+        if factors is None:
+            raise KeyError(f"no context for this modulus yet, factors needed (n = {n:#x})")
+        p, q = factors
+        if p * q != n:
+            raise ValueError("factors do not multiply to n")
+        ctx = RSAContext(p, q, e)
+        if len(_CONTEXTS) >= CONTEXT_CACHE:
+            del _CONTEXTS[next(iter(_CONTEXTS))]
+        _CONTEXTS[key] = ctx
+    return ctx
+
+
+def _generate_key(job) -> tuple:
+    bits, e = job
+    from Crypto.Util.number import getPrime
+
+    while True:
+        p = getPrime(bits // 2)
+        q = getPrime(bits - bits // 2)
+        if p != q and gcd(e, (p - 1) * (q - 1)) == 1:
+            return p, q
+
+
+def generate_keys(count: int, bits: int = 1024, e: int = DEFAULT_E, processes: int = 1) -> list:
+    """[(p, q)] for count fresh bits-bit moduli with e invertible."""
+    jobs = [(bits, e)] * count
+    if processes > 1 and count > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(processes) as pool:
+            return list(pool.map(_generate_key, jobs, chunksize=max(1, count // (processes * 8))))
+    return [_generate_key(job) for job in jobs]
+
+
+def reciprocal(m: int) -> int:
+    """floor(4^k / m) for k = m.bit_length(), by Newton iteration."""
+    k = m.bit_length()
+    if k <= _RECIPROCAL_BITS:
+        return (1 << (2 * k)) // m
+    # Half-precision reciprocal of the top bits, then one Newton step
+    # x += x * (4^k - m*x) / 4^k doubles the correct bits
+    h = (k >> 1) + 1
+    x = reciprocal(m >> (k - h)) << (k - h)
+    err = (1 << (2 * k)) - m * x
+    x += (x * err) >> (2 * k)
+    err = (1 << (2 * k)) - m * x
+    while err < 0:
+        x -= 1
+        err += m
+    while err >= m:
+        x += 1
+        err -= m
+    return x
+
+
+def reduce(x: int, m: int, recip: int = None) -> int:
+    """x mod m (x >= 0) with a precomputed reciprocal(m): Barrett reduction."""
+    if x < m:
+        return x
+    if recip is None:
+        if m.bit_length() <= NEWTON_BITS or mpz is not None:
+            return x % m
+        recip = reciprocal(m)
+    k = m.bit_length()
+    if x.bit_length() > 2 * k:
+        # reduce the high part first so that x < 4^k
+        x = (reduce(x >> k, m, recip) << k) | (x & ((1 << k) - 1))
+    r = x - ((x * recip) >> (2 * k)) * m
+    while r >= m:
+        r -= m
+    return r
+
+
+def _serial(fn, jobs) -> list:
+    return [fn(job) for job in jobs]
+
+
+def _compute(kind: str, index: int, compute) -> list:
+    return compute()
+
+
+def _multiply(pair):
+    return pair[0] * pair[1] if len(pair) == 2 else pair[0]
+
+
+def _reduce(job):
+    x, v, square = job
+    return reduce(x, v * v if square else v)
+
+
+def product_tree(values: list, run=None, level=None) -> list:
+    """Levels from the values (level 0) up to [product of all].
+
+    run(fn, jobs) maps fn over the jobs of one level, e.g. on a process
+    pool. level(kind, index, compute) returns the index-th computed level
+    of kind "product" (or "remainder"), usually compute() but possibly a
+    checkpointed copy. Both default to doing the work in place.
+    """
+    if not values:
+        raise ValueError("empty product tree")
+    run = run or _serial
+    level = level or _compute
+    tree = [list(map(mpz, values)) if mpz is not None else list(values)]
+    while len(tree[-1]) > 1:
+        below = tree[-1]
+        tree.append(level("product", len(tree) - 1,
+                          lambda: run(_multiply, [below[i:i + 2] for i in range(0, len(below), 2)])))
+    return tree
+
+
+def remainder_tree(tree: list, x: int = None, square: bool = False, run=None, level=None) -> list:
+    """x mod every leaf (mod leaf^2 with square), going down the product tree.
+
+    x defaults to the root, i.e. the product of all the leaves. run and
+    level are the hooks of product_tree, with levels counted from the top.
+    """
+    run = run or _serial
+    level = level or _compute
+    remainders = [tree[-1][0] if x is None else x]
+    for index, nodes in enumerate(reversed(tree[:-1] if x is None else tree)):
+        above = remainders
+        remainders = level("remainder", index,
+                           lambda: run(_reduce, [(above[i // 2], v, square) for i, v in enumerate(nodes)]))
+    return remainders
+
+
+def batch_gcd(moduli: list, run=None, level=None) -> list:
+    """gcd(n_i, product of the other moduli) for every n_i.
+
+    1 means n_i shares no factor with the rest; a repeated modulus
+    comes back as itself. run and level are passed to both trees.
+    """
+    tree = product_tree(moduli, run, level)
+    remainders = remainder_tree(tree, square=True, run=run, level=level)
+    return [int(gcd(r // n, n)) for r, n in zip(remainders, tree[0])]
@@ -4,58 +4,52 @@ Generator for the Signal Lost challenge.
 Produces: ciphertext1.hex, ciphertext2.hex, message_morse.txt
 - c1 = flag XOR key (repeating)
 - c2 = known_plaintext XOR key (same key, repeating)
-- message_morse.txt = known_plaintext encoded in Morse
+- message_morse.txt = known_plaintext encoded in Morse (morse.py)
 So: c1 XOR c2 = flag XOR known_plaintext => flag = (c1 XOR c2) XOR known_plaintext
 """
 
+import argparse
 import os
 import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from cryptoutils import xor_bytes  # noqa: E402
+from morse import encode as text_to_morse  # noqa: E402
 
 FLAG = b"shellmates{m0rs3_4nd_x0r_k3y_r3us3}"
 KNOWN_PLAINTEXT = b"IN CRYPTOGRAPHY REUSING A KEY CAN BE DANGEROUS"
 
-# Morse code (A-Z, 0-9, space)
-MORSE = {
-    "A": ".-", "B": "-...", "C": "-.-.", "D": "-..", "E": ".", "F": "..-.",
-    "G": "--.", "H": "....", "I": "..", "J": ".---", "K": "-.-", "L": ".-..",
-    "M": "--", "N": "-.", "O": "---", "P": ".--.", "Q": "--.-", "R": ".-.",
-    "S": "...", "T": "-", "U": "..-", "V": "...-", "W": ".--", "X": "-..-",
-    "Y": "-.--", "Z": "--..",
-    "0": "-----", "1": ".----", "2": "..---", "3": "...--", "4": "....-",
-    "5": ".....", "6": "-....", "7": "--...", "8": "---..", "9": "----.",
-    " ": " ",
-}
-
-
-def xor_bytes(a: bytes, b: bytes) -> bytes:
-    """XOR two byte strings (b is repeated if shorter)."""
-    return bytes(x ^ b[i % len(b)] for i, x in enumerate(a))
-
-
-def text_to_morse(text: str) -> str:
-    """Encode ASCII text to Morse (letters, digits, space)."""
-    out = []
-    for c in text.upper():
-        if c in MORSE:
-            out.append(MORSE[c])
-    return " ".join(out).replace("  ", " / ").strip()
-
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate the Signal Lost challenge files.")
+    parser.add_argument("--out-dir", default=os.path.dirname(__file__),
+                        help="where to write the files (default: next to this script)")
+    parser.add_argument("--known-bytes", type=int,
+                        help="repeat the known plaintext up to this many bytes (stress variants)")
+    args = parser.parse_args()
+
     random.seed(42)
     key_len = max(len(FLAG), len(KNOWN_PLAINTEXT))
     key = bytes(random.randint(0, 255) for _ in range(key_len))
 
+    known = KNOWN_PLAINTEXT
+    if args.known_bytes:
+        # Word-aligned repeats, so the Morse transcript stays decodable
+        unit = KNOWN_PLAINTEXT + b" "
+        known = (unit * (args.known_bytes // len(unit) + 1))[: args.known_bytes].rstrip()
+
     c1 = xor_bytes(FLAG, key)
-    c2 = xor_bytes(KNOWN_PLAINTEXT, key)
+    c2 = xor_bytes(known, key)
 
-    base = os.path.dirname(__file__)
+    base = args.out_dir
+    os.makedirs(base or ".", exist_ok=True)
     with open(os.path.join(base, "ciphertext1.hex"), "w") as f:
         f.write(c1.hex())
     with open(os.path.join(base, "ciphertext2.hex"), "w") as f:
         f.write(c2.hex())
 
-    morse_msg = text_to_morse(KNOWN_PLAINTEXT.decode("utf-8"))
+    morse_msg = text_to_morse(known.decode("utf-8"))
     with open(os.path.join(base, "message_morse.txt"), "w") as f:
         f.write(morse_msg)
 
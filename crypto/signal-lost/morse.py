@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Streaming Morse codec for Signal Lost transcripts.
+
+Letters are separated by one space and words by WORD_SEP (" /  ", the
+format generate.py has always written). The decoder accepts any of the
+usual word separators: "/", " / ", a run of two or more spaces or a
+newline.
+
+Both directions are incremental: feed() takes chunks of any size and
+returns what can already be emitted, finish() flushes the rest. Chunks
+are split into words and each distinct word is translated once (one
+str.translate to encode, a dict lookup per code to decode) and then
+served from a per-codec cache, so there is no per-character Python loop.
+
+    python morse.py encode plain.txt -o message_morse.txt
+    python morse.py decode message_morse.txt
+    python morse.py bench --mb 64
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+WORD_SEP = " /  "
+
+# International Morse: letters, digits and the usual punctuation
+MORSE = {
+    "A": ".-", "B": "-...", "C": "-.-.", "D": "-..", "E": ".", "F": "..-.",
+    "G": "--.", "H": "....", "I": "..", "J": ".---", "K": "-.-", "L": ".-..",
+    "M": "--", "N": "-.", "O": "---", "P": ".--.", "Q": "--.-", "R": ".-.",
+    "S": "...", "T": "-", "U": "..-", "V": "...-", "W": ".--", "X": "-..-",
+    "Y": "-.--", "Z": "--..",
+    "0": "-----", "1": ".----", "2": "..---", "3": "...--", "4": "....-",
+    "5": ".....", "6": "-....", "7": "--...", "8": "---..", "9": "----.",
+    ".": ".-.-.-", ",": "--..--", "?": "..--..", "'": ".----.", "!": "-.-.--",
+    "/": "-..-.", "(": "-.--.", ")": "-.--.-", "&": ".-...", ":": "---...",
+    ";": "-.-.-.", "=": "-...-", "+": ".-.-.", "-": "-....-", "_": "..--.-",
+    '"': ".-..-.", "$": "...-..-", "@": ".--.-.",
+}
+CODES = {code: ch for ch, code in MORSE.items()}
+
+# Whitespace other than a plain space is a word break in both directions
+_BLANKS = "\t\n\r\v\f"
+_BREAKS = str.maketrans({ch: "  " for ch in _BLANKS})
+# Each symbol followed by the letter gap, so a word is one translate call
+_ENCODE = str.maketrans({ch: code + " " for ch, code in MORSE.items()})
+# Deletes dots, dashes and gaps; whatever survives had no code
+_SYMBOLS = str.maketrans("", "", ".- ")
+
+# Words memoized per codec; text repeats words far more than letters
+CACHE_WORDS = 1 << 16
+
+
+class MorseError(ValueError):
+    pass
+
+
+def _breaks(text: str) -> str:
+    """Turn tabs and newlines into a double space (a word break)."""
+    if any(ch in text for ch in _BLANKS):
+        return text.translate(_BREAKS)
+    return text
+
+
+class MorseEncoder:
+    """Incremental text -> Morse. Characters without a code are dropped unless strict."""
+
+    def __init__(self, word_sep: str = WORD_SEP, strict: bool = False):
+        self.word_sep = word_sep
+        self.strict = strict
+        self._cache = {"": ""}
+        self._emitted = False  # a letter has been written
+        self._gap = False      # whitespace seen since the last letter
+
+    def feed(self, text: str) -> str:
+        words = _breaks(text).split(" ")
+        codes = list(map(self._word, words))
+        body = self.word_sep.join(filter(None, codes))
+        if not body:
+            self._gap = self._gap or len(words) > 1
+            return ""
+        if self._emitted:
+            body = (self.word_sep if self._gap or not codes[0] else " ") + body
+        self._emitted = True
+        self._gap = not codes[-1]
+        return body
+
+    def finish(self) -> str:
+        return ""
+
+    def _word(self, word: str) -> str:
+        code = self._cache.get(word)
+        if code is not None:
+            return code
+        upper = word.upper()
+        code = upper.translate(_ENCODE)
+        if code.translate(_SYMBOLS):
+            # some characters had no code and were left as they were
+            if self.strict:
+                bad = next(ch for ch in upper if ch not in MORSE)
+                raise MorseError(f"no Morse code for {bad!r}")
+            code = "".join([MORSE[ch] + " " for ch in upper if ch in MORSE])
+        code = code[:-1]
+        if len(self._cache) < CACHE_WORDS:
+            self._cache[word] = code
+        return code
+
+
+class MorseDecoder:
+    """Incremental Morse -> text; words come out separated by single spaces.
+
+    An unknown code raises MorseError in strict mode and decodes to
+    `unknown` otherwise.
+    """
+
+    def __init__(self, strict: bool = True, unknown: str = "?"):
+        self.strict = strict
+        self.unknown = unknown
+        self._cache = {}
+        self._carry = ""       # trailing token that may continue in the next chunk
+        self._emitted = False
+        self._gap = False
+
+    def feed(self, text: str) -> str:
+        text = self._carry + _breaks(text)
+        cut = text.rfind(" ")
+        if cut < 0:
+            self._carry = text
+            return ""
+        # the space at cut is consumed: consecutive complete parts are
+        # separated by exactly one space, as in the original stream
+        self._carry = text[cut + 1:]
+        return self._decode(text[:cut])
+
+    def finish(self) -> str:
+        text, self._carry = self._carry, ""
+        return self._decode(text) if text else ""
+
+    def _decode(self, part: str) -> str:
+        # "/" is always a word break; after mapping it to spaces, words
+        # are the runs of codes between double spaces
+        part = part.replace("/", "  ")
+        words = list(map(self._word, part.split("  ")))
+        text = " ".join(filter(None, words))
+        if not text:
+            # an empty part is an empty token, i.e. a doubled space
+            self._gap = True
+            return ""
+        if self._emitted and (self._gap or part[0] == " " or not words[0]):
+            text = " " + text
+        self._emitted = True
+        self._gap = part[-1] == " " or not words[-1]
+        return text
+
+    def _word(self, word: str) -> str:
+        letters = self._cache.get(word)
+        if letters is not None:
+            return letters
+        tokens = word.strip(" ").split(" ")
+        try:
+            letters = "".join([CODES[t] for t in tokens]) if tokens != [""] else ""
+        except KeyError:
+            letters = "".join([self._lookup(t) for t in tokens])
+        if len(self._cache) < CACHE_WORDS:
+            self._cache[word] = letters
+        return letters
+
+    def _lookup(self, token: str) -> str:
+        letter = CODES.get(token)
+        if letter is not None:
+            return letter
+        if self.strict:
+            raise MorseError(f"unknown Morse code {token!r}")
+        return self.unknown
+
+
+def encode(text: str, word_sep: str = WORD_SEP, strict: bool = False) -> str:
+    encoder = MorseEncoder(word_sep, strict)
+    return encoder.feed(text) + encoder.finish()
+
+
+def decode(morse: str, strict: bool = True) -> str:
+    decoder = MorseDecoder(strict)
+    return decoder.feed(morse) + decoder.finish()
+
+
+def transcode(codec, src, dst, chunk_size: int = 1 << 20) -> None:
+    """Pipe file object src through an encoder or decoder into dst."""
+    while True:
+        chunk = src.read(chunk_size)
+        if not chunk:
+            break
+        dst.write(codec.feed(chunk))
+    dst.write(codec.finish())
+
+
+def random_corpus(n_bytes: int, seed: int = 0) -> str:
+    """Upper-case words over the Morse alphabet, single spaces, about n_bytes long."""
+    rng = random.Random(seed)
+    alphabet = "".join(MORSE)
+    letters = "ETAOINSHRDLU" * 4 + alphabet
+    words = ["".join(rng.choice(letters) for _ in range(rng.randrange(1, 10))) for _ in range(4096)]
+    out = []
+    size = 0
+    while size < n_bytes:
+        word = rng.choice(words)
+        out.append(word)
+        size += len(word) + 1
+    return " ".join(out)
+
+
+def bench(mb: int, chunk_size: int, seed: int) -> bool:
+    text = random_corpus(mb << 20, seed)
+    start = time.perf_counter()
+    encoder = MorseEncoder()
+    parts = [encoder.feed(text[i:i + chunk_size]) for i in range(0, len(text), chunk_size)]
+    parts.append(encoder.finish())
+    morse = "".join(parts)
+    encode_time = time.perf_counter() - start
+
+    # decode with a chunk size that does not line up with the encoder's
+    step = chunk_size + 7
+    start = time.perf_counter()
+    decoder = MorseDecoder()
+    parts = [decoder.feed(morse[i:i + step]) for i in range(0, len(morse), step)]
+    parts.append(decoder.finish())
+    decoded = "".join(parts)
+    decode_time = time.perf_counter() - start
+
+    ok = decoded == text and morse == encode(text) and decode(morse) == text
+    print(f"encode: {len(text) / 1e6:.1f} MB text -> {len(morse) / 1e6:.1f} MB Morse "
+          f"in {encode_time:.2f}s ({len(text) / 1e6 / encode_time:.1f} MB/s of text)")
+    print(f"decode: {len(morse) / 1e6:.1f} MB Morse in {decode_time:.2f}s "
+          f"({len(morse) / 1e6 / decode_time:.1f} MB/s of Morse)")
+    print(f"round trip: {'ok' if ok else 'MISMATCH'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming Morse encoder/decoder.")
+    parser.add_argument("mode", choices=["encode", "decode", "bench"])
+    parser.add_argument("input", nargs="?", default="-", help="input file ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="output file ('-' for stdout)")
+    parser.add_argument("--word-sep", default=WORD_SEP, help="encode: separator between words")
+    parser.add_argument("--lenient", action="store_true",
+                        help="decode unknown codes as '?' instead of failing")
+    parser.add_argument("--strict", action="store_true", help="encode: fail on characters without a code")
+    parser.add_argument("--chunk-kb", type=int, default=1024, help="streaming chunk size")
+    parser.add_argument("--mb", type=int, default=32, help="bench: corpus size")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    chunk_size = args.chunk_kb << 10
+    if args.mode == "bench":
+        sys.exit(0 if bench(args.mb, chunk_size, args.seed) else 1)
+
+    codec = (MorseEncoder(args.word_sep, args.strict) if args.mode == "encode"
+             else MorseDecoder(not args.lenient))
+    src = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        transcode(codec, src, dst, chunk_size)
+    except MorseError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+    if args.mode == "decode" and dst is sys.stdout and os.isatty(1):
+        print()
+
+
+if __name__ == "__main__":
+    main()
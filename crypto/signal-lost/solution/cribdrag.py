@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Crib dragging for two-time-pad ciphertexts (Signal Lost and its variants).
+
+Every ciphertext pair is XORed once, and all pairs are concatenated into a
+single NumPy uint8 buffer. Cribs are grouped by length and slid across
+every offset of that buffer: one broadcast XOR gives the other message's
+fragment for every (crib, offset). Fragments that are not printable ASCII
+are dropped (checked column by column, densely for the first bytes and
+then only on surviving placements), and the rest are scored by an English
+letter-frequency likelihood ratio. A bounded heap keeps the best N.
+
+Both cribs and offsets are taken in blocks sized so the dense masks fit
+--chunk-mb, over a strided view of the buffer, so the working set beyond
+the XORed buffer itself stays near that budget however long the crib list
+and ciphertexts are.
+
+    python cribdrag.py                                   # shipped pair, built-in cribs
+    python cribdrag.py --pair a1.hex a2.hex --pair b1.hex b2.hex --cribs words.txt
+"""
+
+import argparse
+import heapq
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_CRIBS = [
+    "shellmates{", "THE ", " THE ", " AND ", " OF ", " TO ", " IN ", " A ", " IS ",
+    "IN ", "KEY", " KEY ", "CRYPTO", "CRYPTOGRAPHY", "REUSING", "DANGEROUS",
+    "the ", " the ", " and ", "flag", "_", "{", "}",
+]
+
+# Relative frequencies of English text, letters folded to lower case
+ENGLISH = {
+    " ": 18.3, "e": 10.3, "t": 7.5, "a": 6.5, "o": 6.2, "n": 5.7, "i": 5.7, "s": 5.3,
+    "r": 5.0, "h": 5.0, "l": 3.3, "d": 3.3, "u": 2.3, "c": 2.2, "m": 2.0, "f": 2.0,
+    "w": 1.7, "g": 1.6, "p": 1.5, "y": 1.4, "b": 1.3, "v": 0.8, "k": 0.6, "x": 0.14,
+    "j": 0.1, "q": 0.08, "z": 0.05,
+}
+
+
+def score_table():
+    """Per-byte log10 likelihood ratio of English text against uniform printable ASCII.
+
+    Fragments are scored by the sum over their bytes, so longer English
+    fragments rank higher and random printable noise drifts negative.
+    """
+    total = sum(ENGLISH.values())
+    uniform = math.log10(1 / 95)
+    table = np.full(256, -6.0)
+    table[32:127] = math.log10(0.01 / total) - uniform
+    for ch in "0123456789_{}.,'-":
+        table[ord(ch)] = math.log10(0.2 / total) - uniform
+    for ch, freq in ENGLISH.items():
+        table[ord(ch)] = math.log10(freq / total) - uniform
+        if ch.isalpha():
+            table[ord(ch.upper())] = math.log10(freq / total) - uniform
+    return table
+
+
+PRINTABLE = np.zeros(256, dtype=bool)
+PRINTABLE[32:127] = True
+
+# Columns checked densely over every (crib, offset) before switching to
+# the surviving placements only (~37% of random bytes are printable)
+DENSE_COLUMNS = 3
+# Fewest offsets per block, however many cribs share a length
+MIN_SPAN = 1 << 12
+
+
+def load_pairs(pairs):
+    """XOR each (path1, path2) hex pair; returns the joined buffer and segment bounds."""
+    parts = []
+    bounds = []
+    start = 0
+    for path1, path2 in pairs:
+        with open(path1) as f:
+            c1 = np.frombuffer(bytes.fromhex(f.read().strip()), dtype=np.uint8)
+        with open(path2) as f:
+            c2 = np.frombuffer(bytes.fromhex(f.read().strip()), dtype=np.uint8)
+        n = min(len(c1), len(c2))
+        parts.append(c1[:n] ^ c2[:n])
+        bounds.append((start, start + n))
+        start += n
+    buffer = np.concatenate(parts) if parts else np.empty(0, dtype=np.uint8)
+    return buffer, bounds
+
+
+def read_cribs(path, variants=False):
+    """Yield cribs from a file ('-' for stdin), one per line."""
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8", errors="replace")
+    try:
+        for line in f:
+            crib = line.rstrip("\r\n")
+            if not crib:
+                continue
+            yield from expand(crib) if variants else (crib,)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def expand(crib):
+    """Case and space-padded variants of a crib, without duplicates."""
+    seen = set()
+    for word in (crib, crib.upper(), crib.lower(), crib.title()):
+        for form in (word, f" {word}", f"{word} ", f" {word} "):
+            if form not in seen:
+                seen.add(form)
+                yield form
+
+
+class CribDragger:
+    def __init__(self, buffer, bounds, top=50, chunk_bytes=64 << 20, min_score=None):
+        self.buffer = buffer
+        self.bounds = bounds
+        self.top = top
+        self.chunk_bytes = chunk_bytes
+        self.min_score = min_score
+        self.table = score_table()
+        # sorted segment bounds, so cribs never straddle pairs
+        self.starts = np.array([start for start, _ in bounds], dtype=np.int64)
+        self.ends = np.array([end for _, end in bounds], dtype=np.int64)
+        self._heap = []  # (score, tiebreak, result)
+        self._kept = set()  # results currently in the heap
+        self._counter = 0
+        self.tested = 0
+        self.printable = 0
+
+    def segment(self, positions):
+        """Index of the pair each buffer position belongs to."""
+        return np.searchsorted(self.starts, positions, side="right") - 1
+
+    def drag(self, length, cribs):
+        """Slide same-length cribs (list of str) across every valid offset."""
+        n_offsets = len(self.buffer) - length + 1
+        if n_offsets <= 0 or not cribs:
+            return
+        encoded = [c.encode("latin-1", errors="replace") for c in cribs]
+        matrix = np.frombuffer(b"".join(encoded), dtype=np.uint8).reshape(len(cribs), length)
+        # (rows, span) blocks so that the dense step (XOR, lookup and mask,
+        # one byte each per placement) fits the budget
+        span = min(n_offsets, max(MIN_SPAN, self.chunk_bytes // (3 * len(cribs))))
+        rows = max(1, self.chunk_bytes // (3 * span))
+        for first in range(0, n_offsets, span):
+            last = min(first + span, n_offsets)
+            valid = self._valid(first, last, length)
+            if not valid.any():
+                continue
+            windows = np.lib.stride_tricks.sliding_window_view(self.buffer[first:last + length - 1], length)
+            for lo in range(0, len(cribs), rows):
+                self._drag_block(cribs, matrix[lo:lo + rows], lo, windows, valid, first)
+
+    def _valid(self, first, last, length):
+        """Offsets in [first, last) whose window stays inside one pair."""
+        valid = np.ones(last - first, dtype=bool)
+        lo = np.searchsorted(self.ends, first, side="right")
+        hi = np.searchsorted(self.ends, last + length - 1, side="left")
+        for end in self.ends[lo:hi]:
+            valid[max(0, end - length + 1 - first):end - first] = False
+        return valid
+
+    def _drag_block(self, cribs, block, lo, windows, valid, first):
+        length = block.shape[1]
+        dense = min(length, DENSE_COLUMNS)
+        self.tested += block.shape[0] * int(np.count_nonzero(valid))
+        mask = PRINTABLE[block[:, 0, None] ^ windows[None, :, 0]]
+        mask &= valid
+        for j in range(1, dense):
+            mask &= PRINTABLE[block[:, j, None] ^ windows[None, :, j]]
+        crib_idx, off_idx = np.nonzero(mask)
+        for j in range(dense, length):
+            if not len(crib_idx):
+                break
+            keep = PRINTABLE[block[crib_idx, j] ^ windows[off_idx, j]]
+            crib_idx, off_idx = crib_idx[keep], off_idx[keep]
+        if not len(crib_idx):
+            return
+        self.printable += len(crib_idx)
+        kept = block[crib_idx] ^ windows[off_idx]
+        scores = self.table[kept].sum(axis=1)
+        if self.min_score is not None:
+            sel = scores >= self.min_score
+            crib_idx, off_idx, kept, scores = crib_idx[sel], off_idx[sel], kept[sel], scores[sel]
+        if len(scores) > self.top:
+            best = np.argpartition(-scores, self.top)[: self.top]
+            crib_idx, off_idx, kept, scores = crib_idx[best], off_idx[best], kept[best], scores[best]
+        for k in range(len(scores)):
+            self._push(float(scores[k]), cribs[lo + crib_idx[k]], first + int(off_idx[k]), kept[k].tobytes())
+
+    def _push(self, score, crib, position, fragment):
+        segment = int(self.segment(position))
+        result = (segment, position - self.bounds[segment][0], crib, fragment.decode("ascii"))
+        if result in self._kept:
+            return
+        self._counter += 1
+        item = (score, -self._counter, result)
+        if len(self._heap) < self.top:
+            heapq.heappush(self._heap, item)
+        elif item > self._heap[0]:
+            self._kept.discard(heapq.heapreplace(self._heap, item)[2])
+        else:
+            return
+        self._kept.add(result)
+
+    def feed(self, cribs, batch=4096):
+        """Consume an iterable of cribs, dragging them in same-length batches."""
+        pending = {}
+        for crib in cribs:
+            group = pending.setdefault(len(crib), [])
+            group.append(crib)
+            if len(group) >= batch:
+                self.drag(len(crib), group)
+                pending[len(crib)] = []
+        for length, group in pending.items():
+            if group:
+                self.drag(length, group)
+
+    def results(self):
+        """[(score, pair, offset, crib, fragment)] best first."""
+        return [(score,) + result for score, _, result in sorted(self._heap, reverse=True)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crib-drag XORed ciphertext pairs.")
+    parser.add_argument("--pair", nargs=2, action="append", metavar=("C1", "C2"),
+                        help="two hex ciphertexts under the same key (repeatable)")
+    parser.add_argument("--cribs", help="crib file, one per line ('-' for stdin)")
+    parser.add_argument("--variants", action="store_true", help="also try case and space-padded variants")
+    parser.add_argument("--top", type=int, default=20, help="ranked fragments to keep")
+    parser.add_argument("--chunk-mb", type=int, default=64, help="memory budget per dragging step")
+    parser.add_argument("--min-score", type=float, help="drop fragments scoring below this")
+    parser.add_argument("--output", help="write all ranked fragments as TSV")
+    args = parser.parse_args()
+    if args.top < 1:
+        parser.error("--top must be at least 1")
+
+    pairs = args.pair or [(os.path.join(HERE, "..", "ciphertext1.hex"), os.path.join(HERE, "..", "ciphertext2.hex"))]
+    buffer, bounds = load_pairs(pairs)
+
+    if args.cribs:
+        cribs = read_cribs(args.cribs, args.variants)
+    else:
+        cribs = (v for c in DEFAULT_CRIBS for v in (expand(c) if args.variants else (c,)))
+
+    dragger = CribDragger(buffer, bounds, args.top, args.chunk_mb << 20, args.min_score)
+    start = time.perf_counter()
+    dragger.feed(cribs)
+    elapsed = time.perf_counter() - start
+
+    results = dragger.results()
+    print(f"{len(pairs)} pairs, {len(buffer)} XORed bytes, {dragger.tested:,} crib placements "
+          f"({dragger.printable:,} printable) in {elapsed:.2f}s "
+          f"({dragger.tested / elapsed if elapsed else 0:,.0f}/s)")
+    for score, pair, offset, crib, fragment in results:
+        print(f"{score:7.3f}  pair {pair} @{offset:<5} {crib!r:>20} -> {fragment!r}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write("score\tpair\toffset\tcrib\tfragment\n")
+            for score, pair, offset, crib, fragment in results:
+                f.write(f"{score:.4f}\t{pair}\t{offset}\t{crib}\t{fragment}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Seed-window tooling for the Too Many Nights challenge.
+
+chall.py seeds `random` twice from the clock:
+- int(time.time() / 600) before padding the flag with randbytes(1) until
+  pt + b"n" reaches n, so the padding changes every 10 minutes
+- int(time.time()) when the player answers, for the bit of n that is
+  flipped: n' = n ^ (1 << randint(0, n.bit_length()))
+
+Every second is a different seed, so the player picks the flipped bit by
+picking when to answer. About 1 in 700 odd 2048-bit numbers is prime;
+among the ~2049 positions a few usually make n' prime, and then
+pt = ct'^(e^-1 mod n'-1) mod n'. `plan` lists those seconds.
+
+`verify` checks a transcript the other way round: given the flag and a
+time window, it enumerates every padding seed and every answer second,
+rebuilds pt and n' for each, and redoes the encryptions to find the
+seeds that produced it. Seconds are split over a process pool. Many
+seconds map to the same bit, so each worker caches pow(pt, e, n') and
+primality results by modulus.
+
+    python solve.py simulate -o instance.json
+    python solve.py verify instance.json --window 7200 -j 8
+    python solve.py plan --n N --start 1700000000 --seconds 3600
+    python solve.py decrypt --n N --ct2 C --at 1700000123
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+from Crypto.Util.number import bytes_to_long, getPrime, isPrime, long_to_bytes
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+E = 0x10001
+PAD_PERIOD = 600
+FLAG_PREFIX = b"shellmates{"
+FLAG_END = b"}"
+
+# Per process, keyed by modulus: pt -> {modulus: pow(pt, E, modulus)}, modulus -> is prime
+_POW_CACHE = {}
+_PRIME_CACHE = {}
+
+
+class SolveError(Exception):
+    pass
+
+
+def padding_seed(t: float) -> int:
+    return int(t / PAD_PERIOD)
+
+
+def padded_plaintext(flag: bytes, n: int, seed: int) -> int:
+    """The plaintext chall.py encrypts when `random` was seeded with seed."""
+    rng = random.Random(seed)
+    pt = flag
+    while bytes_to_long(pt + b"n") < n:
+        pt += rng.randbytes(1)
+    return bytes_to_long(pt)
+
+
+def flip_position(seed: int, bits: int, rng: random.Random = None) -> int:
+    """randint(0, bits) right after random.seed(seed)."""
+    rng = rng or random.Random()
+    rng.seed(seed)
+    return rng.randint(0, bits)
+
+
+def flip_positions(start: int, stop: int, bits: int) -> list:
+    """Flipped bit for every answer second in [start, stop)."""
+    rng = random.Random()
+    seed = rng.seed
+    randint = rng.randint
+    out = []
+    for t in range(start, stop):
+        seed(t)
+        out.append(randint(0, bits))
+    return out
+
+
+def cached_is_prime(modulus: int) -> bool:
+    value = _PRIME_CACHE.get(modulus)
+    if value is None:
+        value = _PRIME_CACHE[modulus] = bool(isPrime(modulus))
+    return value
+
+
+def run_challenge(flag: bytes, n: int, connected: float, answered: float) -> dict:
+    """chall.py with the clock made explicit: the transcript a player sees."""
+    pt = padded_plaintext(flag, n, padding_seed(connected))
+    k = flip_position(int(answered), n.bit_length())
+    return {
+        "n": n,
+        "ct": pow(pt, E, n),
+        "ct2": pow(pt, E, n ^ (1 << k)),
+        "connected": connected,
+        "answered": answered,
+    }
+
+
+# ----------------------------------------------------------------------
+# Verification: which seeds produced a transcript
+
+
+def _scan(job):
+    """Answer seconds in [start, stop) whose flipped modulus reproduces ct2."""
+    n, pt, ct2, start, stop = job
+    table = _POW_CACHE.setdefault(pt, {})
+    matches = []
+    computed = 0
+    for t, k in zip(range(start, stop), flip_positions(start, stop, n.bit_length())):
+        modulus = n ^ (1 << k)
+        value = table.get(modulus)
+        if value is None:
+            value = table[modulus] = pow(pt, E, modulus)
+            computed += 1
+        if value == ct2:
+            matches.append((t, k))
+    return matches, computed
+
+
+def verify(transcript: dict, flag: bytes, start: int, stop: int, processes: int = 1,
+           chunk: int = 4096) -> dict:
+    """Padding seeds and answer seconds in [start, stop) consistent with the transcript."""
+    n, ct, ct2 = transcript["n"], transcript["ct"], transcript["ct2"]
+    t0 = time.perf_counter()
+    pad_seeds = range(padding_seed(start), padding_seed(stop - 1) + 1)
+    plaintexts = []
+    for seed in pad_seeds:
+        pt = padded_plaintext(flag, n, seed)
+        if pow(pt, E, n) == ct:
+            plaintexts.append((seed, pt))
+
+    jobs = [(n, pt, ct2, lo, min(lo + chunk, stop))
+            for _, pt in plaintexts for lo in range(start, stop, chunk)]
+    if processes > 1 and len(jobs) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(processes) as pool:
+            results = list(pool.map(_scan, jobs))
+    else:
+        results = [_scan(job) for job in jobs]
+    elapsed = time.perf_counter() - t0
+
+    per_pt = (stop - start + chunk - 1) // chunk
+    answers = []
+    for j, (matches, _) in enumerate(results):
+        seed = plaintexts[j // per_pt][0]
+        answers.extend((seed, t, k) for t, k in matches)
+    return {
+        "padding_seeds": len(pad_seeds),
+        "padding_matches": [seed for seed, _ in plaintexts],
+        "answer_seeds": (stop - start) * len(plaintexts),
+        "pow_computed": sum(computed for _, computed in results),
+        "answers": answers,
+        "elapsed": elapsed,
+    }
+
+
+# ----------------------------------------------------------------------
+# Attack: answer when the flipped modulus is prime
+
+
+def plaintext_bound(n: int) -> int:
+    """Exclusive upper bound on the padded plaintext for modulus n.
+
+    The padding loop stops once pt + b"n" reaches n, so pt has at most as
+    many bytes as n and starts with FLAG_PREFIX.
+    """
+    shift = 8 * ((n.bit_length() + 7) // 8 - len(FLAG_PREFIX))
+    return (bytes_to_long(FLAG_PREFIX) + 1) << shift
+
+
+def decryptable(modulus: int) -> bool:
+    """n' is prime and e is invertible mod n' - 1."""
+    return cached_is_prime(modulus) and (modulus - 1) % E != 0
+
+
+def _primality(job):
+    n, positions = job
+    return [(k, decryptable(n ^ (1 << k))) for k in positions]
+
+
+def plan(n: int, start: int, stop: int, processes: int = 1) -> list:
+    """[(second, k, safe)] in [start, stop) where n ^ (1 << k) is decryptable.
+
+    pt usually has as many bytes as n, so safe means n' is at least
+    plaintext_bound(n) and decryption returns pt itself: the leading
+    bytes of n' must exceed FLAG_PREFIX, not just its length.
+    """
+    bits = n.bit_length()
+    ks = flip_positions(start, stop, bits)
+    distinct = sorted(set(ks))
+    jobs = [(n, distinct[i::max(1, processes)]) for i in range(max(1, processes))]
+    if processes > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(processes) as pool:
+            results = list(pool.map(_primality, jobs))
+    else:
+        results = [_primality(job) for job in jobs]
+    usable = {k for result in results for k, ok in result if ok}
+    bound = plaintext_bound(n)
+    return [(t, k, n ^ (1 << k) >= bound) for t, k in zip(range(start, stop), ks) if k in usable]
+
+
+def decrypt(n: int, ct2: int, answered: int) -> bytes:
+    """Flag from the second ciphertext, if n' was prime for that answer second."""
+    k = flip_position(int(answered), n.bit_length())
+    modulus = n ^ (1 << k)
+    if not isPrime(modulus):
+        raise SolveError(f"n' (bit {k} flipped) is not prime, cannot decrypt directly")
+    if (modulus - 1) % E == 0:
+        raise SolveError(f"e divides n' - 1 (bit {k} flipped), e has no inverse")
+    pt = long_to_bytes(pow(ct2, pow(E, -1, modulus - 1), modulus))
+    end = pt.find(FLAG_END)
+    if not pt.startswith(FLAG_PREFIX) or end < 0:
+        raise SolveError("decryption does not look like a flag (pt larger than n'?)")
+    return pt[:end + 1]
+
+
+def load_flag() -> bytes:
+    sys.path.insert(0, os.path.join(HERE, ".."))
+    from secret import FLAG  # noqa: E402
+
+    return FLAG
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed-window tooling for Too Many Nights.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("simulate", help="generate a local transcript with a chosen clock")
+    p.add_argument("--flag", help="defaults to ../secret.py")
+    p.add_argument("--at", type=float, help="connection time (default: now)")
+    p.add_argument("--delay", type=float, help="seconds before answering (default: random, up to 1h)")
+    p.add_argument("--bits", type=int, default=1024, help="prime size")
+    p.add_argument("-o", "--output", help="write the transcript as JSON")
+
+    p = sub.add_parser("verify", help="find the seeds behind a transcript")
+    p.add_argument("transcript")
+    p.add_argument("--flag", help="defaults to ../secret.py")
+    p.add_argument("--start", type=int, help="window start (default: connection time)")
+    p.add_argument("--window", type=int, default=3600,
+                   help="seconds to enumerate (extended to the answer second when the transcript has it)")
+    p.add_argument("-j", "--processes", type=int, default=os.cpu_count() or 1)
+
+    p = sub.add_parser("plan", help="seconds at which answering makes n' prime")
+    p.add_argument("--n", type=int, required=True)
+    p.add_argument("--start", type=int, help="default: now")
+    p.add_argument("--seconds", type=int, default=3600)
+    p.add_argument("-j", "--processes", type=int, default=os.cpu_count() or 1)
+
+    p = sub.add_parser("decrypt", help="recover the flag from ct' and the answer second")
+    p.add_argument("--n", type=int, required=True)
+    p.add_argument("--ct2", type=int, required=True)
+    p.add_argument("--at", type=int, required=True, help="int(time.time()) when 'y' was sent")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "simulate":
+            flag = args.flag.encode() if args.flag else load_flag()
+            n = getPrime(args.bits) * getPrime(args.bits)
+            connected = time.time() if args.at is None else args.at
+            delay = random.uniform(1, 3600) if args.delay is None else args.delay
+            transcript = run_challenge(flag, n, connected, connected + delay)
+            text = json.dumps(transcript, indent=2)
+            if args.output:
+                with open(args.output, "w") as f:
+                    f.write(text + "\n")
+                print(f"connected {connected:.0f}, answered {connected + delay:.0f} -> {args.output}")
+            else:
+                print(text)
+
+        elif args.command == "verify":
+            with open(args.transcript) as f:
+                transcript = json.load(f)
+            flag = args.flag.encode() if args.flag else load_flag()
+            start = args.start
+            stop = None
+            if start is None:
+                start = int(transcript.get("connected", time.time()))
+                if "answered" in transcript:
+                    stop = int(transcript["answered"]) + 1
+            stop = max(stop or 0, start + args.window)
+            report = verify(transcript, flag, start, stop, args.processes)
+            elapsed = report["elapsed"]
+            seeds = report["padding_seeds"] + report["answer_seeds"]
+            print(f"window [{start}, {stop}): {report['padding_seeds']} padding seeds, "
+                  f"{report['answer_seeds']} answer seeds, {report['pow_computed']} pow() computed "
+                  f"({report['answer_seeds'] - report['pow_computed']} from the modulus cache)")
+            print(f"{seeds / elapsed:,.0f} seeds/s in {elapsed:.2f}s with {args.processes} processes")
+            if not report["padding_matches"]:
+                print("no padding seed reproduces ct")
+                sys.exit(1)
+            for seed in report["padding_matches"]:
+                print(f"padding seed {seed} (connected in [{seed * PAD_PERIOD}, {(seed + 1) * PAD_PERIOD}))")
+            for seed, t, k in report["answers"]:
+                print(f"answered at {t}: bit {k} flipped")
+            if not report["answers"]:
+                print("no answer second in the window reproduces ct2")
+                sys.exit(1)
+
+        elif args.command == "plan":
+            start = int(time.time()) if args.start is None else args.start
+            t0 = time.perf_counter()
+            rows = plan(args.n, start, start + args.seconds, args.processes)
+            elapsed = time.perf_counter() - t0
+            print(f"{args.seconds} seconds in {elapsed:.2f}s ({args.seconds / elapsed:,.0f} seeds/s)")
+            for t, k, safe in rows:
+                print(f"answer at {t} (+{t - start}s): bit {k}, n' prime{'' if safe else ', pt may exceed it'}")
+            if not rows:
+                print("no second in the window gives a prime n'")
+
+        elif args.command == "decrypt":
+            print(decrypt(args.n, args.ct2, args.at).decode(errors="replace"))
+    except SolveError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Streaming decoder for the Word Numbers challenge, with every valid parse.
+
+The number words are loaded into a trie keyed by their hyphen-separated
+parts ("twenty-five" -> twenty -> five), so "twenty five" with a space
+can be 25 (Y) or 20 5 (TE). A word that starts no multi-word entry is
+decoded by one dict lookup; only segments starting at a prefix word
+("twenty") are expanded, by a small DP over token positions that lists
+their parses. Segments are independent, so the whole ciphertext is a
+sequence of pieces: plain strings, or tuples of alternatives (best
+first). The number of parses is the product of the tuple sizes.
+
+"Best" follows the encoder by default (prefer="split"): hyphenated words
+are compounds and space-separated ones are separate letters. With
+prefer="join", spaced pairs that form a number are read as one letter.
+
+    python decode.py                            # the shipped ciphertext
+    python decode.py ../ciphertext.txt --all --limit 20
+    python decode.py --bench 100
+"""
+
+import argparse
+import itertools
+import math
+import os
+import random
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+from encode import ENGLISH_TO_NUM, NUM_TO_ENGLISH, decode as greedy_decode  # noqa: E402
+
+LETTER_OF = {word: chr(num - 1 + ord("A")) for word, num in ENGLISH_TO_NUM.items()}
+
+
+def build_trie(words):
+    """Trie over hyphen-separated parts; nodes are [letter or None, {part: node}]."""
+    root = [None, {}]
+    for word, letter in words.items():
+        node = root
+        for part in word.split("-"):
+            node = node[1].setdefault(part, [None, {}])
+        node[0] = letter
+    return root
+
+
+TRIE = build_trie(LETTER_OF)
+# Words whose trie node has children, i.e. that can start a longer entry
+PREFIXES = set()
+
+
+def _collect_prefixes(node, path):
+    for part, child in node[1].items():
+        if child[1]:
+            PREFIXES.add("-".join(path + [part]))
+        _collect_prefixes(child, path + [part])
+
+
+_collect_prefixes(TRIE, [])
+# Longest entry in words, the lookahead a segment needs
+DEPTH = max(len(word.split("-")) for word in LETTER_OF)
+
+
+class NeedMore(Exception):
+    """A segment runs into the end of the buffered tokens."""
+
+
+class WordNumberDecoder:
+    """Incremental decoder: feed() text chunks, get pieces back.
+
+    Unknown words are skipped (counted in self.unknown), like the
+    greedy decoder in encode.py.
+    """
+
+    def __init__(self, prefer: str = "split"):
+        if prefer not in ("split", "join"):
+            raise ValueError(f"prefer must be 'split' or 'join', not {prefer!r}")
+        self.prefer = prefer
+        self.tokens = 0
+        self.unknown = 0
+        self._carry = ""     # partial word at the end of the last chunk
+        self._pending = []   # tokens of a segment that may continue
+        self._segments = {}  # token window -> (length, piece)
+
+    def feed(self, text: str) -> list:
+        text = self._carry + text
+        cut = len(text)
+        while cut and not text[cut - 1].isspace():
+            cut -= 1
+        self._carry = text[cut:]
+        return self._parse(text[:cut].lower().split(), final=False)
+
+    def finish(self) -> list:
+        text, self._carry = self._carry, ""
+        return self._parse(text.lower().split(), final=True)
+
+    def _parse(self, words, final):
+        self.tokens += len(words)
+        tokens = self._pending + words if self._pending else words
+        self._pending = []
+        letters = [LETTER_OF.get(t, "") for t in tokens]
+        starts = [i for i, t in enumerate(tokens) if t in PREFIXES]
+        pieces = []
+        append = pieces.append
+        cached = self._segments.get
+        done = 0
+        for i in starts:
+            if i < done:
+                continue
+            segment = cached(tuple(tokens[i:i + DEPTH]))
+            if segment is None:
+                try:
+                    segment = self._segment(tokens, i, final)
+                except NeedMore:
+                    self._pending = tokens[i:]
+                    del letters[i:]
+                    break
+            if i > done:
+                append("".join(letters[done:i]))
+            append(segment[1])
+            done = i + segment[0]
+        else:
+            i = len(tokens)
+        if i > done:
+            pieces.append("".join(letters[done:i]))
+        self.unknown += letters.count("")
+        # unknown words leave empty strings behind
+        return [p for p in pieces if p]
+
+    def _segment(self, tokens, i, final):
+        """(token count, piece) for the segment starting at prefix token i."""
+        window = tuple(tokens[i:i + DEPTH])
+        matches = {}
+        reach = i + 1
+        seen = i
+        k = i
+        while k < reach:
+            found, last = self._matches(tokens, k, final)
+            matches[k] = found
+            seen = max(seen, last)
+            for end, _, _ in found:
+                reach = max(reach, end)
+            k += 1
+
+        # DP over token positions: every parse of tokens[k:reach]
+        parses = {reach: [(0, "")]}
+        for k in range(reach - 1, i - 1, -1):
+            options = []
+            for end, letter, loose in matches[k] or [(k + 1, "", 0)]:
+                cost = loose if self.prefer == "split" else -loose
+                options.extend((cost + c, letter + rest) for c, rest in parses[end])
+            parses[k] = options
+        texts = []
+        for _, text in sorted(parses[i]):
+            if text not in texts:
+                texts.append(text)
+        result = (reach - i, texts[0] if len(texts) == 1 else tuple(texts))
+        if seen < i + len(window):
+            # only tokens inside the window were looked at
+            self._segments[window] = result
+        return result
+
+    @staticmethod
+    def _matches(tokens, k, final):
+        """([(end, letter, spaces crossed)] for entries starting at token k, last token read)."""
+        found = []
+        node = TRIE
+        for end in range(k, len(tokens)):
+            for part in tokens[end].split("-"):
+                node = node[1].get(part)
+                if node is None:
+                    return found, end
+            if node[0] is not None:
+                found.append((end + 1, node[0], end - k))
+            if not node[1]:
+                return found, end
+        if not final:
+            raise NeedMore
+        return found, len(tokens) - 1
+
+
+def parse(text: str, prefer: str = "split") -> list:
+    decoder = WordNumberDecoder(prefer)
+    return decoder.feed(text) + decoder.finish()
+
+
+def best(pieces) -> str:
+    return "".join(p if isinstance(p, str) else p[0] for p in pieces)
+
+
+def count_parses(pieces) -> int:
+    return math.prod(len(p) for p in pieces if not isinstance(p, str))
+
+
+def enumerate_parses(pieces, limit=None):
+    """Yield decodings, best first per segment (lexicographic over segments)."""
+    options = [(p,) if isinstance(p, str) else p for p in pieces]
+    return itertools.islice(map("".join, itertools.product(*options)), limit)
+
+
+def decode(ciphertext: str, prefer: str = "split") -> str:
+    return best(parse(ciphertext, prefer))
+
+
+def decode_stream(f, prefer: str = "split", chunk_size: int = 1 << 20):
+    """Yield pieces from a text file object without reading it whole."""
+    decoder = WordNumberDecoder(prefer)
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        yield from decoder.feed(chunk)
+    yield from decoder.finish()
+
+
+# ----------------------------------------------------------------------
+# Benchmark
+
+
+def random_ciphertext(n_bytes: int, seed: int = 0, spaced: bool = False) -> str:
+    """Encoder output for random letters, about n_bytes long; spaced drops the hyphens."""
+    rng = random.Random(seed)
+    words = [NUM_TO_ENGLISH[n] for n in range(1, 27)]
+    avg = sum(len(w) + 1 for w in words) / len(words)
+    text = " ".join(rng.choices(words, k=int(n_bytes / avg)))
+    return text.replace("-", " ") if spaced else text
+
+
+def bench(mb: int, chunk_size: int, seed: int) -> bool:
+    ok = True
+    for spaced in (False, True):
+        text = random_ciphertext(mb << 20, seed, spaced)
+        size = len(text) / 1e6
+        chunks = []
+        start = 0
+        while start < len(text):
+            end = text.find(" ", start + chunk_size)
+            end = len(text) if end < 0 else end
+            chunks.append(text[start:end])
+            start = end
+
+        t0 = time.perf_counter()
+        old = "".join(greedy_decode(chunk) for chunk in chunks)
+        old_time = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        decoder = WordNumberDecoder()
+        pieces = [p for chunk in chunks for p in decoder.feed(chunk)] + decoder.finish()
+        new = best(pieces)
+        new_time = time.perf_counter() - t0
+
+        same = new == old
+        ok &= same
+        ambiguous = sum(1 for p in pieces if not isinstance(p, str))
+        label = "spaced compounds" if spaced else "encoder output"
+        print(f"{label}: {size:.1f} MB, {decoder.tokens:,} words")
+        print(f"  greedy (encode.decode): {old_time:6.2f}s  {size / old_time:6.1f} MB/s")
+        print(f"  trie/DP (best parse):   {new_time:6.2f}s  {size / new_time:6.1f} MB/s  "
+              f"({old_time / new_time:.1f}x)")
+        print(f"  {ambiguous:,} ambiguous segments, "
+              f"~10^{sum(math.log10(len(p)) for p in pieces if not isinstance(p, str)):,.0f} parses; "
+              f"best parse {'matches' if same else 'DIFFERS from'} greedy")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Decode Word Numbers ciphertexts.")
+    parser.add_argument("ciphertext", nargs="?", default=os.path.join(HERE, "..", "ciphertext.txt"),
+                        help="ciphertext file ('-' for stdin)")
+    parser.add_argument("--prefer", choices=["split", "join"], default="split",
+                        help="reading of ambiguous 'twenty five' for the best parse")
+    parser.add_argument("--all", action="store_true", help="list every parse instead of the best one")
+    parser.add_argument("--limit", type=int, default=100, help="--all: parses to print")
+    parser.add_argument("--bench", type=int, metavar="MB", help="benchmark against encode.decode")
+    parser.add_argument("--chunk-kb", type=int, default=1024)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.bench:
+        sys.exit(0 if bench(args.bench, args.chunk_kb << 10, args.seed) else 1)
+
+    f = sys.stdin if args.ciphertext == "-" else open(args.ciphertext)
+    try:
+        if not args.all:
+            for piece in decode_stream(f, args.prefer, args.chunk_kb << 10):
+                sys.stdout.write(piece if isinstance(piece, str) else piece[0])
+            print()
+            return
+        pieces = list(decode_stream(f, args.prefer, args.chunk_kb << 10))
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+    total = count_parses(pieces)
+    print(f"{total} parses")
+    for text in enumerate_parses(pieces, args.limit):
+        print(text)
+    if total > args.limit:
+        print(f"... {total - args.limit} more")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,8 +4,15 @@ ByteForge VM Assembler
 Converts assembly-like syntax to VM bytecode
 """
 
+import argparse
+import glob
+import hashlib
+import io
+import json
+import os
 import sys
 import struct
+import time
 
 # Opcode definitions
 OPCODES = {
@@ -41,108 +48,380 @@ def parse_value(s):
         return int(s, 16)
     return int(s)
 
-def assemble(code):
-    """Assemble code into bytecode"""
-    bytecode = bytearray()
+# Encoded size and operand format of each instruction
+OPERAND_FORMATS = {
+    'PUSH': '<Q',
+    'LOAD': '<H',
+    'STORE': '<H',
+    'JMP': '<H',
+    'JZ': '<H',
+    'CALL': '<H',
+}
+LABEL_OPERANDS = ('JMP', 'JZ', 'CALL')
+MAX_INSTRUCTION_SIZE = 9
+
+class AssemblyError(Exception):
+    """Raised for invalid assembly source"""
+
+    def __init__(self, message, line_num=None):
+        self.line_num = line_num
+        if line_num is not None:
+            message = f"Error on line {line_num}: {message}"
+        else:
+            message = f"Error: {message}"
+        super().__init__(message)
+
+def assemble_lines(lines, size_hint=0, symbols=None):
+    """Assemble an iterable of source lines in a single pass
+
+    If symbols is a dict it receives the final label -> offset table.
+    """
+    # Preallocated output buffer, grown by doubling if the hint was short
+    bytecode = bytearray(max(size_hint, 4096))
+    capacity = len(bytecode)
+    pos = 0
     labels = {}
-    instructions = []
-    
-    # First pass: collect labels and instructions
-    for line_num, line in enumerate(code.split('\n'), 1):
+    # Jump operands are patched once every label is known: (offset, operand, line)
+    fixups = []
+
+    opcodes = OPCODES
+    formats = OPERAND_FORMATS
+    pack_into = struct.pack_into
+
+    for line_num, line in enumerate(lines, 1):
         # Remove comments
         if ';' in line:
             line = line[:line.index(';')]
-        
+
         line = line.strip()
         if not line:
             continue
-        
+
         # Check for label
         if ':' in line:
             label, rest = line.split(':', 1)
-            labels[label.strip()] = len(bytecode)
+            labels[label.strip()] = pos
             line = rest.strip()
             if not line:
                 continue
-        
-        # Parse instruction
+
         parts = line.split()
-        if not parts:
+        op = parts[0].upper()
+        opcode = opcodes.get(op)
+        if opcode is None:
+            raise AssemblyError(f"Unknown opcode '{op}'", line_num)
+
+        if pos + MAX_INSTRUCTION_SIZE > capacity:
+            bytecode.extend(bytes(capacity))
+            capacity *= 2
+
+        bytecode[pos] = opcode
+        fmt = formats.get(op)
+        if fmt is None:
+            pos += 1
             continue
-        
+
+        if len(parts) < 2:
+            raise AssemblyError(f"{op} requires an argument", line_num)
+        arg = parts[1]
+
+        if op in LABEL_OPERANDS:
+            # Label or number is decided at the end, like a second pass would
+            fixups.append((pos + 1, arg, line_num))
+        else:
+            try:
+                pack_into(fmt, bytecode, pos + 1, parse_value(arg))
+            except (ValueError, struct.error) as e:
+                raise AssemblyError(f"bad {op} operand '{arg}': {e}", line_num)
+        pos += 3 if fmt == '<H' else 9
+
+    for offset, arg, line_num in fixups:
+        addr = labels.get(arg)
+        try:
+            if addr is None:
+                addr = parse_value(arg)
+            pack_into('<H', bytecode, offset, addr)
+        except (ValueError, struct.error) as e:
+            raise AssemblyError(f"bad jump target '{arg}': {e}", line_num)
+
+    if symbols is not None:
+        symbols.update(labels)
+    del bytecode[pos:]
+    return bytes(bytecode)
+
+class Statement:
+    """One parsed instruction with the labels defined just before it"""
+    __slots__ = ('line_num', 'labels', 'op', 'arg')
+
+    def __init__(self, line_num, labels, op, arg=None):
+        self.line_num = line_num
+        self.labels = labels
+        self.op = op
+        self.arg = arg
+
+def parse_lines(lines):
+    """Parse source lines into Statements, same rules as assemble_lines
+
+    Operands are kept as written, so label-or-number is still decided when
+    the statements are rendered and assembled. Labels after the last
+    instruction end up on a final Statement whose op is None.
+    """
+    statements = []
+    labels = []
+
+    for line_num, line in enumerate(lines, 1):
+        if ';' in line:
+            line = line[:line.index(';')]
+
+        line = line.strip()
+        if not line:
+            continue
+
+        if ':' in line:
+            label, rest = line.split(':', 1)
+            labels.append(label.strip())
+            line = rest.strip()
+            if not line:
+                continue
+
+        parts = line.split()
         op = parts[0].upper()
         if op not in OPCODES:
-            print(f"Error on line {line_num}: Unknown opcode '{op}'")
-            sys.exit(1)
-        
-        instructions.append((len(bytecode), op, parts[1:] if len(parts) > 1 else []))
-        
-        # Calculate bytecode size for this instruction
-        bytecode.append(OPCODES[op])
-        
-        if op == 'PUSH':
-            bytecode.extend([0] * 8)  # Placeholder for 64-bit value
-        elif op in ['LOAD', 'STORE', 'JMP', 'JZ', 'CALL']:
-            bytecode.extend([0] * 2)  # Placeholder for 16-bit value
-    
-    # Second pass: encode instructions with resolved labels
-    bytecode = bytearray()
-    
-    for offset, op, args in instructions:
-        bytecode.append(OPCODES[op])
-        
-        if op == 'PUSH':
-            if not args:
-                print(f"Error: PUSH requires an argument")
-                sys.exit(1)
-            val = parse_value(args[0])
-            bytecode.extend(struct.pack('<Q', val))
-        
-        elif op in ['LOAD', 'STORE']:
-            if not args:
-                print(f"Error: {op} requires an argument")
-                sys.exit(1)
-            val = parse_value(args[0])
-            bytecode.extend(struct.pack('<H', val))
-        
-        elif op in ['JMP', 'JZ', 'CALL']:
-            if not args:
-                print(f"Error: {op} requires an argument")
-                sys.exit(1)
-            
-            # Check if it's a label or a number
-            if args[0] in labels:
-                addr = labels[args[0]]
-            else:
-                addr = parse_value(args[0])
-            
-            bytecode.extend(struct.pack('<H', addr))
-    
-    return bytes(bytecode)
+            raise AssemblyError(f"Unknown opcode '{op}'", line_num)
+        if op in OPERAND_FORMATS:
+            if len(parts) < 2:
+                raise AssemblyError(f"{op} requires an argument", line_num)
+            statements.append(Statement(line_num, labels, op, parts[1]))
+        else:
+            statements.append(Statement(line_num, labels, op))
+        labels = []
+
+    if labels:
+        statements.append(Statement(None, labels, None))
+    return statements
+
+def format_statements(statements):
+    """Render Statements back to source lines for assemble_lines"""
+    for stmt in statements:
+        for label in stmt.labels:
+            yield f"{label}:"
+        if stmt.op is not None:
+            yield f"    {stmt.op} {stmt.arg}" if stmt.arg is not None else f"    {stmt.op}"
+
+def assemble(code):
+    """Assemble code into bytecode"""
+    lines = code.split('\n')
+    return assemble_lines(lines, size_hint=len(lines) * MAX_INSTRUCTION_SIZE)
+
+def check_operands(statements):
+    """Raise the AssemblyError assemble_lines would give for a bad operand
+
+    The optimizer drops instructions without encoding them (PUSH x; POP,
+    dead code), so operands are checked before it runs.
+    """
+    labels = {label for stmt in statements for label in stmt.labels}
+    for stmt in statements:
+        fmt = OPERAND_FORMATS.get(stmt.op)
+        if fmt is None or (stmt.op in LABEL_OPERANDS and stmt.arg in labels):
+            continue
+        try:
+            struct.pack(fmt, parse_value(stmt.arg))
+        except (ValueError, struct.error) as e:
+            what = "jump target" if stmt.op in LABEL_OPERANDS else f"{stmt.op} operand"
+            raise AssemblyError(f"bad {what} '{stmt.arg}': {e}", stmt.line_num)
+
+def assemble_source(source, optimize=False):
+    """Assemble an iterable of lines; returns (bytecode, optimizer report or None)"""
+    if not optimize:
+        return assemble_lines(source), None
+    from peephole import optimize as optimize_statements
+    statements = parse_lines(source)
+    statements, report = optimize_statements(statements)
+    return assemble_lines(format_statements(statements)), report
+
+# ----------------------------------------------------------------------
+# Batch mode: many sources across a process pool, skipping the unchanged
+
+MANIFEST_NAME = '.asm-manifest.json'
+
+def toolchain_digest():
+    """Hash of the assembler sources, so a new assembler rebuilds everything"""
+    h = hashlib.sha256()
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in ('asm.py', 'peephole.py'):
+        try:
+            with open(os.path.join(here, name), 'rb') as f:
+                h.update(f.read())
+        except IOError:
+            pass
+    return h.hexdigest()
+
+def expand_inputs(patterns):
+    """Directories (searched recursively), globs and plain paths -> sorted .asm paths"""
+    found = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, files in os.walk(pattern):
+                found.update(os.path.join(root, name) for name in files if name.endswith('.asm'))
+        elif glob.has_magic(pattern):
+            found.update(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+        else:
+            found.add(pattern)
+    return sorted(found)
+
+def output_path(input_file, out_dir, base):
+    stem = os.path.splitext(input_file)[0] + '.bin'
+    if out_dir is None:
+        return stem
+    return os.path.join(out_dir, os.path.relpath(stem, base))
+
+def _batch_job(job):
+    input_file, output_file, optimize = job
+    start = time.perf_counter()
+    try:
+        with open(input_file, 'rb') as f:
+            data = f.read()
+        text = data.decode()
+        bytecode, _ = assemble_source(io.StringIO(text, newline=None), optimize)
+        os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+        with open(output_file, 'wb') as f:
+            f.write(bytecode)
+    except AssemblyError as e:
+        return input_file, None, 0, time.perf_counter() - start, str(e)
+    except Exception as e:
+        return input_file, None, 0, time.perf_counter() - start, f"Assembly error: {e}"
+    return input_file, hashlib.sha256(data).hexdigest(), len(bytecode), time.perf_counter() - start, None
+
+def load_manifest(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return {}
+
+def save_manifest(path, manifest):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+def file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def batch(patterns, out_dir=None, optimize=False, jobs=None, manifest_path=None, force=False):
+    """Assemble every matched source; returns True if none failed"""
+    start = time.perf_counter()
+    inputs = expand_inputs(patterns)
+    if not inputs:
+        print("No .asm files matched")
+        return False
+
+    base = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in inputs])
+    if manifest_path is None:
+        manifest_path = os.path.join(out_dir or '.', MANIFEST_NAME)
+    manifest = {} if force else load_manifest(manifest_path)
+    toolchain = toolchain_digest()
+
+    todo = []
+    skipped = 0
+    for input_file in inputs:
+        output_file = output_path(os.path.abspath(input_file), out_dir, base)
+        entry = manifest.get(os.path.abspath(input_file))
+        try:
+            digest = file_digest(input_file)
+        except IOError as e:
+            print(f"Error reading input file: {e}")
+            todo.append((input_file, output_file, optimize))
+            continue
+        if (entry and entry['source'] == digest and entry['output'] == output_file
+                and entry['optimize'] == optimize and entry['toolchain'] == toolchain
+                and os.path.isfile(output_file) and os.path.getsize(output_file) == entry['bytes']):
+            skipped += 1
+            continue
+        todo.append((input_file, output_file, optimize))
+
+    failed = 0
+    total_bytes = 0
+    cpu = 0.0
+    if todo:
+        workers = jobs or os.cpu_count() or 1
+        if workers > 1 and len(todo) > 1:
+            # Imported here: it costs ~25ms of startup in single-file mode
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(min(workers, len(todo))) as pool:
+                chunksize = max(1, len(todo) // (workers * 8))
+                results = list(pool.map(_batch_job, todo, chunksize=chunksize))
+        else:
+            results = [_batch_job(job) for job in todo]
+        outputs = {job[0]: job[1] for job in todo}
+        for input_file, digest, size, elapsed, error in results:
+            cpu += elapsed
+            key = os.path.abspath(input_file)
+            if error:
+                failed += 1
+                manifest.pop(key, None)
+                print(f"{input_file}: {error}")
+                continue
+            total_bytes += size
+            manifest[key] = {
+                'source': digest,
+                'output': outputs[input_file],
+                'bytes': size,
+                'optimize': optimize,
+                'toolchain': toolchain,
+            }
+        save_manifest(manifest_path, manifest)
+
+    elapsed = time.perf_counter() - start
+    built = len(todo) - failed
+    rate = f", {built / elapsed:.0f} files/s" if built and elapsed else ''
+    print(f"Assembled {built} files ({total_bytes} bytes), {skipped} unchanged, {failed} failed "
+          f"in {elapsed:.2f}s (assembly {cpu:.2f}s across workers{rate})")
+    return failed == 0
 
 def main():
-    if len(sys.argv) != 3:
-        print(f"Usage: {sys.argv[0]} <input.asm> <output.bin>")
+    parser = argparse.ArgumentParser(description='ByteForge VM assembler')
+    parser.add_argument('paths', nargs='*', metavar='path',
+                        help='<input.asm> <output.bin>, or with --batch: directories, globs or files')
+    parser.add_argument('--optimize', action='store_true', help='run the peephole optimizer')
+    parser.add_argument('--batch', action='store_true', help='assemble many files in parallel')
+    parser.add_argument('--out-dir', help='batch: mirror outputs here instead of next to each source')
+    parser.add_argument('-j', '--jobs', type=int, help='batch: worker processes (default: CPU count)')
+    parser.add_argument('--manifest', help=f'batch: content-hash manifest (default: {MANIFEST_NAME})')
+    parser.add_argument('--force', action='store_true', help='batch: ignore the manifest')
+    args = parser.parse_args()
+
+    if args.batch:
+        if not args.paths:
+            parser.error('--batch needs at least one directory, glob or file')
+        ok = batch(args.paths, args.out_dir, args.optimize, args.jobs, args.manifest, args.force)
+        sys.exit(0 if ok else 1)
+
+    if len(args.paths) != 2:
+        print(f"Usage: {sys.argv[0]} [--optimize] <input.asm> <output.bin>")
         sys.exit(1)
     
-    input_file = sys.argv[1]
-    output_file = sys.argv[2]
+    input_file, output_file = args.paths
     
-    # Read assembly code
+    # Read and assemble the source line by line
     try:
         with open(input_file, 'r') as f:
-            code = f.read()
+            bytecode, report = assemble_source(f, args.optimize)
     except IOError as e:
         print(f"Error reading input file: {e}")
         sys.exit(1)
-    
-    # Assemble
-    try:
-        bytecode = assemble(code)
+    except AssemblyError as e:
+        print(e)
+        sys.exit(1)
     except Exception as e:
         print(f"Assembly error: {e}")
         sys.exit(1)
     
+    if report is not None:
+        from peephole import format_report
+        print(format_report(report))
+    
     # Write bytecode
     try:
         with open(output_file, 'wb') as f:
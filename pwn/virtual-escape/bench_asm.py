@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+ByteForge assembler benchmark
+Generates large programs, checks the single-pass assembler against the
+previous two-pass one byte for byte, and reports lines/second
+"""
+
+import argparse
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+
+from asm import OPCODES, assemble, assemble_lines, parse_value
+
+def legacy_assemble(code):
+    """Previous two-pass assembler, kept as the reference encoding"""
+    bytecode = bytearray()
+    labels = {}
+    instructions = []
+
+    for line_num, line in enumerate(code.split('\n'), 1):
+        if ';' in line:
+            line = line[:line.index(';')]
+        line = line.strip()
+        if not line:
+            continue
+        if ':' in line:
+            label, rest = line.split(':', 1)
+            labels[label.strip()] = len(bytecode)
+            line = rest.strip()
+            if not line:
+                continue
+        parts = line.split()
+        op = parts[0].upper()
+        if op not in OPCODES:
+            raise ValueError(f"line {line_num}: unknown opcode '{op}'")
+        instructions.append((len(bytecode), op, parts[1:]))
+        bytecode.append(OPCODES[op])
+        if op == 'PUSH':
+            bytecode.extend([0] * 8)
+        elif op in ['LOAD', 'STORE', 'JMP', 'JZ', 'CALL']:
+            bytecode.extend([0] * 2)
+
+    bytecode = bytearray()
+    for offset, op, args in instructions:
+        bytecode.append(OPCODES[op])
+        if op == 'PUSH':
+            bytecode.extend(struct.pack('<Q', parse_value(args[0])))
+        elif op in ['LOAD', 'STORE']:
+            bytecode.extend(struct.pack('<H', parse_value(args[0])))
+        elif op in ['JMP', 'JZ', 'CALL']:
+            if args[0] in labels:
+                addr = labels[args[0]]
+            else:
+                addr = parse_value(args[0])
+            bytecode.extend(struct.pack('<H', addr))
+    return bytes(bytecode)
+
+def generate_program(num_lines, seed):
+    """Random program mixing labels, forward/backward jumps, comments and blank lines"""
+    rng = random.Random(seed)
+    plain = ['POP', 'DUP', 'ADD', 'SUB', 'MUL', 'RET', 'PRINT', 'HALT', 'dup', 'Add']
+    num_labels = max(1, min(num_lines // 20, 2000))
+    # Jump operands are 16-bit, so labels must land in the first 64KB
+    label_limit = 0xF000
+    undefined = set(range(num_labels))
+    offset = 0
+    lines = []
+    for i in range(num_lines):
+        r = rng.random()
+        if offset < label_limit and r < 0.05:
+            label = rng.randrange(num_labels)
+            undefined.discard(label)
+            if rng.random() < 0.5:
+                lines.append(f"l{label}:")
+            else:
+                lines.append(f"l{label}: {rng.choice(plain)}")
+                offset += 1
+        elif r < 0.08:
+            lines.append(f"; comment {i}")
+        elif r < 0.10:
+            lines.append('')
+        elif r < 0.35:
+            val = rng.getrandbits(rng.choice((8, 16, 64)))
+            lines.append(f"    PUSH {hex(val) if rng.random() < 0.5 else val}")
+            offset += 9
+        elif r < 0.45:
+            lines.append(f"    {rng.choice(('LOAD', 'STORE'))} {rng.randrange(8)}")
+            offset += 3
+        elif r < 0.65:
+            op = rng.choice(('JMP', 'JZ', 'CALL'))
+            target = f"l{rng.randrange(num_labels)}" if rng.random() < 0.9 else hex(rng.randrange(0x10000))
+            lines.append(f"    {op} {target}  ; to {target}")
+            offset += 3
+        else:
+            lines.append(f"    {rng.choice(plain)}")
+            offset += 1
+        if offset >= label_limit and undefined:
+            # Labels still unseen are defined here, after their first uses
+            lines.extend(f"l{label}:" for label in sorted(undefined))
+            undefined.clear()
+    lines.extend(f"l{label}:" for label in sorted(undefined))
+    return '\n'.join(lines) + '\n'
+
+def best_of(fn, arg, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+def assemble_path(path):
+    with open(path, 'r') as f:
+        return assemble_lines(f)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the ByteForge assembler')
+    parser.add_argument('--lines', type=int, default=1000000, help='lines per generated program')
+    parser.add_argument('--programs', type=int, default=3, help='number of generated programs')
+    parser.add_argument('--seed', type=int, default=1337)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'program':>8} {'bytes':>10} {'two-pass':>14} {'one-pass':>14} {'from file':>14} {'speedup':>8}")
+    for n in range(args.programs):
+        code = generate_program(args.lines, args.seed + n)
+
+        expected, t_old = best_of(legacy_assemble, code, args.repeat)
+        actual, t_new = best_of(assemble, code, args.repeat)
+        if actual != expected:
+            print(f"program {n}: output differs from the two-pass assembler")
+            sys.exit(1)
+
+        with tempfile.NamedTemporaryFile('w', suffix='.asm', delete=False) as f:
+            f.write(code)
+        try:
+            streamed, t_file = best_of(assemble_path, f.name, args.repeat)
+        finally:
+            os.unlink(f.name)
+        if streamed != expected:
+            print(f"program {n}: streamed output differs from the two-pass assembler")
+            sys.exit(1)
+
+        rate = lambda t: f"{args.lines / t / 1e6:.2f} Mlines/s"
+        print(f"{n:>8} {len(actual):>10} {rate(t_old):>14} {rate(t_new):>14} {rate(t_file):>14} {t_old / t_new:>7.1f}x")
+
+if __name__ == '__main__':
+    main()
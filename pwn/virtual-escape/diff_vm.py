@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+ByteForge VM differential check
+Builds the C VM from src/ and runs the same programs through it and vm.py,
+comparing stdout, stderr and exit status
+"""
+
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+from asm import assemble
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Programs that once diverged between the two VMs; each must match exactly
+REGRESSIONS = {
+    # CALL with call_sp = 25: the return-address slot is struct VM.pc,
+    # which `pc = addr` overwrites again right after the store
+    'call-slot-aliases-pc': """
+        PUSH 25
+        STORE 1672
+        CALL target
+        PUSH 1
+        PRINT
+        HALT
+    target:
+        PUSH 2
+        PRINT
+        HALT
+    """,
+    # An enlarged bytecode_size only matters once pc actually runs past the code
+    'bytecode-size-grown': """
+        PUSH 3000
+        STORE 1760
+        PUSH 5
+        PRINT
+        HALT
+    """,
+    # A shrunk bytecode_size truncates the operand of a PUSH that was
+    # already decoded under the old size: the second pass must fault
+    'bytecode-size-shrunk': """
+    top:
+        LOAD 0
+        JZ first
+        PUSH 22
+        STORE 1760
+    again:
+        PUSH 7
+        PRINT
+        JMP top
+    first:
+        PUSH 1
+        STORE 0
+        JMP again
+    """,
+    'call-stack-overflow': """
+    f:
+        CALL f
+    """,
+}
+
+def build_vm(out_dir):
+    binary = os.path.join(out_dir, 'vm')
+    sources = [os.path.join(HERE, 'src', name) for name in ('main.c', 'vm.c')]
+    subprocess.run(['gcc', '-w', '-no-pie', '-fno-stack-protector', '-o', binary, *sources], check=True)
+    return binary
+
+def run(cmd, stdin, timeout):
+    try:
+        proc = subprocess.run(cmd, input=stdin, capture_output=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return None
+    status = proc.returncode if proc.returncode >= 0 else 128 - proc.returncode
+    return proc.stdout, proc.stderr, status
+
+def random_program(rng, length):
+    """Short straight-line-heavy program that pokes at the struct VM fields"""
+    lines = []
+    for i in range(length):
+        r = rng.random()
+        if r < 0.35:
+            lines.append(f"PUSH {rng.choice((0, 1, rng.randrange(64), rng.getrandbits(64)))}")
+        elif r < 0.50:
+            lines.append(f"{rng.choice(('LOAD', 'STORE'))} {rng.choice((rng.randrange(0, 512, 8), rng.randrange(1536, 1752, 8)))}")
+        elif r < 0.60:
+            lines.append(f"{rng.choice(('JMP', 'JZ', 'CALL'))} l{rng.randrange(length)}")
+        else:
+            lines.append(rng.choice(('POP', 'DUP', 'ADD', 'SUB', 'MUL', 'RET', 'PRINT', 'GETINT',
+                                     'DUMP_STACK', 'HALT')))
+    return '\n'.join(f"l{i}: {line}" for i, line in enumerate(lines)) + '\n'
+
+def compare(binary, name, bytecode, stdin, exact, timeout):
+    with tempfile.NamedTemporaryFile(suffix='.bin', delete=False) as f:
+        f.write(bytecode)
+    try:
+        c = run([binary, f.name], stdin, timeout)
+        py = run([sys.executable, os.path.join(HERE, 'vm.py'), f.name, '--max-steps', '100000'],
+                 stdin, timeout)
+    finally:
+        os.unlink(f.name)
+    if c is None or py is None:
+        return True
+    if b'error_handler hijacked' in py[0]:
+        return True
+    if not exact and (c[2] >= 128 or py[2] == 139):
+        # A crash loses C's buffered stdout; only the outcome is comparable
+        return (c[2] >= 128) == (py[2] == 139)
+    if c == py:
+        return True
+    print(f"{name}: C and vm.py disagree")
+    for label, (out, err, status) in (('C', c), ('vm.py', py)):
+        print(f"  {label}: exit {status}\n    stdout {out!r}\n    stderr {err!r}")
+    return False
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare vm.py against the C ByteForge VM')
+    parser.add_argument('--programs', type=int, default=200, help='number of random programs')
+    parser.add_argument('--length', type=int, default=40, help='instructions per random program')
+    parser.add_argument('--seed', type=int, default=1337)
+    parser.add_argument('--timeout', type=float, default=5.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='byteforge-diff-') as tmp:
+        binary = build_vm(tmp)
+        failures = 0
+        for name, code in REGRESSIONS.items():
+            failures += not compare(binary, name, assemble(code), b'', True, args.timeout)
+        rng = random.Random(args.seed)
+        for n in range(args.programs):
+            code = random_program(rng, args.length)
+            stdin = ' '.join(str(rng.randrange(100)) for _ in range(8)).encode()
+            failures += not compare(binary, f"random program {n}", assemble(code), stdin, False, args.timeout)
+
+    total = len(REGRESSIONS) + args.programs
+    print(f"{total - failures}/{total} programs matched")
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+ByteForge VM Disassembler
+Linear-sweep disassembly and basic-block control-flow graphs for VM bytecode
+
+The text listing uses asm.py syntax: jump targets that fall on an
+instruction boundary get labels, so well-formed images reassemble to the
+same bytes. LOAD/STORE operands past the 512-byte memory are annotated
+with the struct VM field they reach.
+"""
+
+import json
+import sys
+from collections import namedtuple
+
+from asm import OPCODES, OPERAND_FORMATS
+from vm import (
+    CALL_SP_OFF,
+    CALL_STACK_OFF,
+    HANDLER_OFF,
+    MEMORY_SIZE,
+    PC_OFF,
+    REGS_OFF,
+    SIZE_OFF,
+    SP_OFF,
+    STACK_OFF,
+    STATUS_OFF,
+    BYTECODE_OFF,
+    VM_STRUCT_SIZE,
+)
+
+# Operand bytes: PUSH takes a u64, LOAD/STORE/JMP/JZ/CALL a u16
+OPERAND_WIDTHS = {name: 8 if fmt == '<Q' else 2 for name, fmt in OPERAND_FORMATS.items()}
+
+BRANCHES = ('JMP', 'JZ', 'CALL')
+# Instructions after which execution never falls through
+TERMINATORS = ('JMP', 'RET', 'HALT', 'TRIGGER_ERROR')
+
+STRUCT_FIELDS = (
+    (STACK_OFF, 'stack'),
+    (SP_OFF, 'sp'),
+    (CALL_STACK_OFF, 'call_stack'),
+    (CALL_SP_OFF, 'call_sp'),
+    (REGS_OFF, 'registers'),
+    (PC_OFF, 'pc'),
+    (BYTECODE_OFF, 'bytecode'),
+    (SIZE_OFF, 'bytecode_size'),
+    (HANDLER_OFF, 'error_handler'),
+    (STATUS_OFF, 'exit_code'),
+    (STATUS_OFF + 4, 'halted'),
+)
+
+# name is None for bytes that are not a valid instruction (unknown opcode
+# or an operand running past the end of the image).
+Instruction = namedtuple('Instruction', 'offset opcode name operand size')
+
+
+def _decode_tables():
+    names = [None] * 256
+    widths = [0] * 256
+    for name, opcode in OPCODES.items():
+        names[opcode] = name
+        widths[opcode] = OPERAND_WIDTHS.get(name, 0)
+    return names, widths
+
+
+def disassemble(code):
+    """Linear sweep over code; returns a list of Instruction."""
+    code = bytes(code)
+    names, widths = _decode_tables()
+    from_bytes = int.from_bytes
+    size = len(code)
+    out = []
+    append = out.append
+    pc = 0
+    while pc < size:
+        opcode = code[pc]
+        name = names[opcode]
+        width = widths[opcode]
+        if name is None:
+            append(Instruction(pc, opcode, None, None, 1))
+            pc += 1
+        elif not width:
+            append(Instruction(pc, opcode, name, None, 1))
+            pc += 1
+        elif pc + width >= size:
+            # The VM reads the operand past bytecode_size and errors out
+            append(Instruction(pc, opcode, None, None, size - pc))
+            pc = size
+        else:
+            append(Instruction(pc, opcode, name, from_bytes(code[pc + 1:pc + 1 + width], 'little'), width + 1))
+            pc += width + 1
+    return out
+
+
+def struct_field(index):
+    """Name of the struct VM field a LOAD/STORE at index touches, if any."""
+    if index < MEMORY_SIZE:
+        return None
+    if index >= VM_STRUCT_SIZE:
+        return 'past struct VM'
+    name = None
+    for offset, field in STRUCT_FIELDS:
+        if offset > index:
+            break
+        base, name = offset, field
+    if name in ('stack', 'call_stack', 'registers'):
+        return f"{name}[{(index - base) // 8}]" + (f"+{(index - base) % 8}" if (index - base) % 8 else '')
+    return name if index == base else f"{name}+{index - base}"
+
+
+class BasicBlock:
+    def __init__(self, start, instructions):
+        self.start = start
+        self.instructions = instructions
+        self.end = instructions[-1].offset + instructions[-1].size
+        # (target offset or None, kind); kind is one of fallthrough, jump,
+        # taken, call, return, exit
+        self.successors = []
+
+    @property
+    def last(self):
+        return self.instructions[-1]
+
+
+class ControlFlowGraph:
+    """Basic blocks split at branch targets and after JMP/JZ/CALL/RET/HALT."""
+
+    def __init__(self, code, instructions=None):
+        self.code = bytes(code)
+        self.size = len(self.code)
+        self.instructions = instructions if instructions is not None else disassemble(self.code)
+        self.blocks = {}
+        # Branch targets that land inside an instruction (overlapping code)
+        self.misaligned_targets = []
+        self._build()
+
+    def _build(self):
+        size = self.size
+        starts = bytearray(size + 1)
+        for ins in self.instructions:
+            starts[ins.offset] = 1
+
+        leaders = bytearray(size + 1)
+        if size:
+            leaders[0] = 1
+        for ins in self.instructions:
+            name = ins.name
+            if name in BRANCHES or name in TERMINATORS or name is None:
+                leaders[ins.offset + ins.size] = 1
+                if name in BRANCHES and ins.operand < size:
+                    if starts[ins.operand]:
+                        leaders[ins.operand] = 1
+                    else:
+                        self.misaligned_targets.append((ins.offset, ins.operand))
+
+        block = []
+        blocks = []
+        for ins in self.instructions:
+            if leaders[ins.offset] and block:
+                blocks.append(BasicBlock(block[0].offset, block))
+                block = []
+            block.append(ins)
+        if block:
+            blocks.append(BasicBlock(block[0].offset, block))
+
+        for b in blocks:
+            self.blocks[b.start] = b
+            self._link(b)
+
+    def _target(self, offset):
+        return offset if offset < self.size else None
+
+    def _link(self, block):
+        ins = block.last
+        name = ins.name
+        after = self._target(block.end)
+        if name == 'JMP':
+            block.successors.append((self._target(ins.operand), 'jump'))
+        elif name == 'JZ':
+            block.successors.append((self._target(ins.operand), 'taken'))
+            block.successors.append((after, 'fallthrough'))
+        elif name == 'CALL':
+            block.successors.append((self._target(ins.operand), 'call'))
+            block.successors.append((after, 'return'))
+        elif name in TERMINATORS or name is None:
+            block.successors.append((None, 'exit'))
+        else:
+            block.successors.append((after, 'fallthrough'))
+
+    # ------------------------------------------------------------------
+
+    def label(self, offset, labels=None):
+        if labels and offset in labels:
+            return labels[offset]
+        return f"L_{offset:04x}"
+
+    def branch_targets(self):
+        """Offsets that need a label in a reassemblable listing."""
+        targets = set()
+        for ins in self.instructions:
+            if ins.name in BRANCHES and ins.operand in self.blocks:
+                targets.add(ins.operand)
+        return targets
+
+    def to_dict(self, labels=None):
+        blocks = []
+        for start, b in self.blocks.items():
+            blocks.append({
+                'label': self.label(start, labels),
+                'start': b.start,
+                'end': b.end,
+                'instructions': [describe(ins) for ins in b.instructions],
+                'successors': [
+                    {'target': None if t is None else self.label(t, labels), 'offset': t, 'kind': kind}
+                    for t, kind in b.successors
+                ],
+            })
+        return {
+            'size': self.size,
+            'instructions': len(self.instructions),
+            'blocks': blocks,
+            'misaligned_targets': [{'from': f, 'to': t} for f, t in self.misaligned_targets],
+        }
+
+    def to_json(self, labels=None, indent=2):
+        return json.dumps(self.to_dict(labels), indent=indent)
+
+    def to_dot(self, labels=None):
+        styles = {
+            'jump': 'color=blue',
+            'taken': 'color=darkgreen, label="zero"',
+            'fallthrough': '',
+            'call': 'color=purple, style=dashed, label="call"',
+            'return': 'style=dotted',
+        }
+        lines = ['digraph bytecode {', '    node [shape=box, fontname="monospace"];']
+        has_exit = False
+        for start, b in self.blocks.items():
+            name = self.label(start, labels)
+            body = [f"{name}:"] + [describe(ins) for ins in b.instructions]
+            text = ''.join(line.replace('"', '\\"') + '\\l' for line in body)
+            lines.append(f'    "{name}" [label="{text}"];')
+            for target, kind in b.successors:
+                if target is None:
+                    has_exit = True
+                    dest = 'exit'
+                else:
+                    dest = self.label(target, labels)
+                style = styles.get(kind, '')
+                lines.append(f'    "{name}" -> "{dest}"' + (f' [{style}];' if style else ';'))
+        if has_exit:
+            lines.append('    "exit" [shape=doublecircle];')
+        lines.append('}')
+        return '\n'.join(lines) + '\n'
+
+
+def format_instruction(ins, label=None):
+    """asm.py source text for ins; label(offset) names branch targets."""
+    if ins.name is None:
+        return ''
+    if ins.operand is None:
+        return ins.name
+    if ins.name in BRANCHES:
+        name = label(ins.operand) if label else None
+        return f"{ins.name} {name or f'{ins.operand:#x}'}"
+    if ins.name in ('LOAD', 'STORE'):
+        return f"{ins.name} {ins.operand}"
+    return f"{ins.name} {ins.operand:#x}" if ins.operand > 9 else f"{ins.name} {ins.operand}"
+
+
+def annotate(ins):
+    """Comment for bytes that do not decode and for out-of-memory LOAD/STORE."""
+    if ins.name is None:
+        if ins.size == 1 and ins.opcode not in _OPCODE_NAMES:
+            return f".byte 0x{ins.opcode:02x} (unknown opcode)"
+        return f"{ins.size} bytes (truncated {_OPCODE_NAMES.get(ins.opcode)})"
+    if ins.name in ('LOAD', 'STORE'):
+        return struct_field(ins.operand)
+    return None
+
+
+def describe(ins):
+    """One-line form for JSON/DOT: the instruction and its annotation, if any."""
+    text = format_instruction(ins)
+    note = annotate(ins)
+    if not note:
+        return text
+    return f"{text}  ; {note}" if text else f"; {note}"
+
+
+_OPCODE_NAMES = {value: name for name, value in OPCODES.items()}
+
+
+def listing(code, instructions=None, cfg=None, labels=None):
+    """Disassembly text in asm.py syntax, with byte offsets as comments."""
+    if cfg is None:
+        cfg = ControlFlowGraph(code, instructions)
+    targets = cfg.branch_targets()
+
+    def label(offset):
+        return cfg.label(offset, labels) if offset in targets else None
+
+    out = []
+    for ins in cfg.instructions:
+        if ins.offset in targets:
+            out.append(f"{cfg.label(ins.offset, labels)}:")
+        text = format_instruction(ins, label)
+        note = annotate(ins)
+        comment = f"{ins.offset:#06x}" + (f"  {note}" if note else '')
+        out.append(f"    {text:<24}; {comment}" if text else f"    ; {comment}")
+    return '\n'.join(out) + '\n'
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Disassemble ByteForge bytecode.")
+    parser.add_argument('bytecode', help="program to disassemble (.bin)")
+    parser.add_argument('--format', choices=('asm', 'dot', 'json'), default='asm',
+                        help="asm listing, or the control-flow graph as DOT/JSON")
+    parser.add_argument('-o', '--output', help="write to this file instead of stdout")
+    args = parser.parse_args()
+
+    try:
+        with open(args.bytecode, 'rb') as f:
+            code = f.read()
+    except IOError as e:
+        print(f"Error: Cannot open file '{args.bytecode}': {e}", file=sys.stderr)
+        sys.exit(1)
+
+    cfg = ControlFlowGraph(code)
+    if args.format == 'dot':
+        text = cfg.to_dot()
+    elif args.format == 'json':
+        text = cfg.to_json() + '\n'
+    else:
+        text = listing(code, cfg=cfg)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+        print(f"{len(cfg.instructions)} instructions, {len(cfg.blocks)} blocks -> {args.output}",
+              file=sys.stderr)
+    else:
+        sys.stdout.write(text)
+    for origin, target in cfg.misaligned_targets:
+        print(f"Warning: branch at {origin:#06x} targets {target:#06x}, inside an instruction",
+              file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+ByteForge peephole optimizer
+Source-level rewrites applied between parsing and encoding (asm.py --optimize)
+
+- PUSH x; POP / DUP; POP / PUSH 0; ADD / PUSH 0; SUB / PUSH 1; MUL vanish
+- branches to a JMP are threaded to its final target
+- JMP to the next instruction vanishes, JZ to it becomes POP
+- code after JMP/RET/HALT is dropped up to the next referenced label
+Label offsets are recomputed when the statements are encoded again.
+
+The rewrites assume the program does not rely on stack faults (128-slot
+overflow, underflow). Programs whose behaviour depends on the byte
+layout are left untouched: numeric branch targets, LOAD/STORE past the
+512-byte memory (pc, call stack, error_handler...), redefined labels and
+DUMP_REGS, which prints pc.
+"""
+
+import io
+import random
+import sys
+
+from asm import (
+    OPERAND_FORMATS,
+    AssemblyError,
+    Statement,
+    assemble_lines,
+    check_operands,
+    format_statements,
+    parse_lines,
+    parse_value,
+)
+from vm import MEMORY_SIZE, VM, StepLimitExceeded
+
+BRANCHES = ('JMP', 'JZ', 'CALL')
+NO_FALLTHROUGH = ('JMP', 'RET', 'HALT')
+
+# (first op, required first operand or None for any, second op) -> rule name
+PAIR_RULES = {
+    ('PUSH', None, 'POP'): 'push_pop',
+    ('DUP', None, 'POP'): 'dup_pop',
+    ('PUSH', 0, 'ADD'): 'add_zero',
+    ('PUSH', 0, 'SUB'): 'sub_zero',
+    ('PUSH', 1, 'MUL'): 'mul_one',
+}
+
+
+def instruction_size(op):
+    if op is None:
+        return 0
+    fmt = OPERAND_FORMATS.get(op)
+    if fmt is None:
+        return 1
+    return 9 if fmt == '<Q' else 3
+
+
+def layout_dependency(statements):
+    """Why the program cannot be relocated, or None if it can."""
+    defined = set()
+    for stmt in statements:
+        for label in stmt.labels:
+            if label in defined:
+                return f"label '{label}' is defined twice"
+            defined.add(label)
+    for stmt in statements:
+        if stmt.op in BRANCHES and stmt.arg not in defined:
+            return f"line {stmt.line_num}: {stmt.op} to a numeric address"
+        if stmt.op in ('LOAD', 'STORE'):
+            try:
+                index = parse_value(stmt.arg)
+            except ValueError:
+                return f"line {stmt.line_num}: bad {stmt.op} operand"
+            if index + 8 > MEMORY_SIZE:
+                return f"line {stmt.line_num}: {stmt.op} {stmt.arg} reaches VM state"
+        if stmt.op == 'DUMP_REGS':
+            return f"line {stmt.line_num}: DUMP_REGS prints pc"
+    return None
+
+
+def _operand(stmt):
+    try:
+        return parse_value(stmt.arg)
+    except ValueError:
+        return None
+
+
+def _pair_rule(first, second):
+    if first.op == 'PUSH':
+        value = _operand(first)
+        return PAIR_RULES.get(('PUSH', None, second.op)) or (
+            PAIR_RULES.get(('PUSH', value, second.op)) if value in (0, 1) else None
+        )
+    return PAIR_RULES.get((first.op, None, second.op))
+
+
+class Optimizer:
+    def __init__(self, statements):
+        self.statements = [Statement(s.line_num, list(s.labels), s.op, s.arg) for s in statements]
+        self.counts = {name: 0 for name in PAIR_RULES.values()}
+        self.counts.update(threaded=0, jump_to_next=0, dead=0)
+
+    def referenced(self):
+        return {s.arg for s in self.statements if s.op in BRANCHES}
+
+    def strip_labels(self):
+        used = self.referenced()
+        for stmt in self.statements:
+            stmt.labels = [label for label in stmt.labels if label in used]
+        self.statements = [s for s in self.statements if s.op is not None or s.labels]
+
+    def peephole(self):
+        """Drop matching pairs; labels of a dropped pair move to what follows."""
+        out = []
+        carry = []
+        changed = False
+        for stmt in self.statements:
+            if out and not stmt.labels and not carry and stmt.op is not None:
+                rule = _pair_rule(out[-1], stmt)
+                if rule:
+                    carry = out.pop().labels
+                    self.counts[rule] += 1
+                    changed = True
+                    continue
+            if carry:
+                stmt.labels = carry + stmt.labels
+                carry = []
+            out.append(stmt)
+        if carry:
+            out.append(Statement(None, carry, None))
+        self.statements = out
+        return changed
+
+    def thread_jumps(self):
+        targets = {}
+        for stmt in self.statements:
+            for label in stmt.labels:
+                targets[label] = stmt
+        changed = False
+        for stmt in self.statements:
+            if stmt.op not in BRANCHES:
+                continue
+            label = stmt.arg
+            seen = {label}
+            while True:
+                dest = targets.get(label)
+                if dest is None or dest.op != 'JMP':
+                    break
+                if dest.arg in seen:
+                    # JMP loop: leave the branch alone
+                    label = stmt.arg
+                    break
+                label = dest.arg
+                seen.add(label)
+            if label != stmt.arg:
+                stmt.arg = label
+                self.counts['threaded'] += 1
+                changed = True
+        return changed
+
+    def jumps_to_next(self):
+        out = []
+        changed = False
+        statements = self.statements
+        for i, stmt in enumerate(statements):
+            if stmt.op in ('JMP', 'JZ') and i + 1 < len(statements) and stmt.arg in statements[i + 1].labels:
+                self.counts['jump_to_next'] += 1
+                changed = True
+                if stmt.op == 'JMP':
+                    statements[i + 1].labels = stmt.labels + statements[i + 1].labels
+                    continue
+                stmt = Statement(stmt.line_num, stmt.labels, 'POP')
+            out.append(stmt)
+        self.statements = out
+        return changed
+
+    def eliminate_dead_code(self):
+        used = self.referenced()
+        out = []
+        live = True
+        changed = False
+        for stmt in self.statements:
+            if not live and any(label in used for label in stmt.labels):
+                live = True
+            if not live:
+                self.counts['dead'] += stmt.op is not None
+                changed = True
+                continue
+            out.append(stmt)
+            if stmt.op in NO_FALLTHROUGH:
+                live = False
+        self.statements = out
+        return changed
+
+    def run(self):
+        self.strip_labels()
+        while True:
+            changed = self.thread_jumps()
+            changed |= self.eliminate_dead_code()
+            self.strip_labels()
+            changed |= self.peephole()
+            changed |= self.jumps_to_next()
+            if not changed:
+                return self.statements
+
+
+def optimize(statements):
+    """Return (optimized statements, report dict)."""
+    report = {
+        'instructions_before': sum(s.op is not None for s in statements),
+        'bytes_before': sum(instruction_size(s.op) for s in statements),
+    }
+    check_operands(statements)
+    reason = layout_dependency(statements)
+    if reason:
+        optimized = statements
+        report['skipped'] = reason
+    else:
+        optimizer = Optimizer(statements)
+        optimized = optimizer.run()
+        report['rewrites'] = optimizer.counts
+    report['instructions_after'] = sum(s.op is not None for s in optimized)
+    report['bytes_after'] = sum(instruction_size(s.op) for s in optimized)
+    return optimized, report
+
+
+def format_report(report):
+    lines = [
+        f"instructions: {report['instructions_before']} -> {report['instructions_after']}",
+        f"bytes:        {report['bytes_before']} -> {report['bytes_after']}",
+    ]
+    if 'skipped' in report:
+        lines.append(f"not optimized: {report['skipped']}")
+    else:
+        hits = [f"{name}={count}" for name, count in report['rewrites'].items() if count]
+        lines.append("rewrites:     " + (", ".join(hits) if hits else "none"))
+    return "\n".join(lines)
+
+
+# ----------------------------------------------------------------------
+# Equivalence checking under the Python emulator
+
+
+def execute(bytecode, stdin_text, max_steps):
+    """Run bytecode; (stdout, stderr, exit_code, steps), steps None on timeout."""
+    stdout, stderr = io.StringIO(), io.StringIO()
+    vm = VM(bytecode, stdin=io.StringIO(stdin_text), stdout=stdout, stderr=stderr)
+    try:
+        result = vm.run(max_steps)
+    except StepLimitExceeded:
+        return stdout.getvalue(), stderr.getvalue(), None, None
+    return stdout.getvalue(), stderr.getvalue(), result.exit_code, result.steps
+
+
+def check_equivalence(source, stdin_text='', max_steps=1000000):
+    """Assemble source with and without --optimize and compare their runs.
+
+    Returns (verdict, detail): verdict is 'equal', 'mismatch', 'unchanged'
+    when the optimizer declined the program, or 'inconclusive' when the original program faults or does not halt
+    within max_steps, which the rewrites do not have to preserve.
+    """
+    lines = source.split('\n')
+    original = assemble_lines(lines)
+    optimized_statements, report = optimize(parse_lines(lines))
+    if 'skipped' in report:
+        return 'unchanged', report
+    optimized = assemble_lines(format_statements(optimized_statements))
+
+    out_a, err_a, code_a, steps_a = execute(original, stdin_text, max_steps)
+    if steps_a is None or err_a:
+        return 'inconclusive', report
+    out_b, err_b, code_b, steps_b = execute(optimized, stdin_text, max_steps)
+    if (out_a, code_a) != (out_b, code_b) or err_b or steps_b is None or steps_b > steps_a:
+        return 'mismatch', {
+            'report': report,
+            'original': (out_a, code_a, steps_a),
+            'optimized': (out_b, err_b, code_b, steps_b),
+        }
+    report['steps_before'] = steps_a
+    report['steps_after'] = steps_b
+    return 'equal', report
+
+
+def random_program(rng, length=60):
+    """Terminating, mostly stack-safe program seeded with optimizable patterns."""
+    lines = ["    GETINT", "    GETINT"]
+    depth = 2
+    pending = []  # forward labels still to be placed
+    n = 0
+
+    def label():
+        nonlocal n
+        n += 1
+        return f"L{n}"
+
+    for _ in range(length):
+        r = rng.random()
+        if pending and r < 0.15:
+            lines.append(f"{pending.pop(rng.randrange(len(pending)))}:")
+        elif r < 0.25:
+            lines.append(f"    PUSH {rng.randrange(8)}")
+            lines.append(rng.choice(["    POP", "    ADD", "    SUB", "    MUL"]))
+        elif r < 0.3:
+            lines.append("    DUP")
+            lines.append("    POP")
+        elif r < 0.4:
+            lines.append(f"    PUSH {rng.choice((0, 1, rng.randrange(1 << 64)))}")
+            lines.append(f"    {rng.choice(('ADD', 'SUB', 'MUL'))}")
+        elif r < 0.5 and depth < 20:
+            lines.append(f"    PUSH {rng.randrange(100)}")
+            depth += 1
+        elif r < 0.55 and depth > 2:
+            lines.append("    PRINT")
+            depth -= 1
+        elif r < 0.65:
+            # forward jump, maybe through a chain of JMPs and dead code
+            target = label()
+            pending.append(target)
+            if rng.random() < 0.5 and depth > 1:
+                lines.append("    DUP")
+                lines.append(f"    JZ {target}")
+            else:
+                lines.append(f"    JMP {target}")
+                lines.append(f"    PUSH {rng.randrange(100)}")
+                lines.append("    PRINT")
+        elif r < 0.7:
+            hop = label()
+            target = label()
+            pending.append(target)
+            lines.append(f"    JMP {hop}")
+            lines.append("    HALT")
+            lines.append(f"{hop}: JMP {target}")
+        elif r < 0.8:
+            lines.append(f"    CALL sub{rng.randrange(3)}")
+        else:
+            lines.append(f"    STORE {8 * rng.randrange(8)}")
+            lines.append(f"    LOAD {8 * rng.randrange(8)}")
+    for target in pending:
+        lines.append(f"{target}:")
+    lines.append("    PRINT")
+    lines.append("    HALT")
+    lines.append("    PRINT  ; unreachable")
+    for i in range(3):
+        lines.append(f"sub{i}: PUSH {i}")
+        lines.append("    ADD")
+        lines.append("    DUP")
+        lines.append("    POP")
+        lines.append("    RET")
+        lines.append("    HALT")
+    return "\n".join(lines) + "\n"
+
+
+def fuzz(count, seed, verbose=False):
+    rng = random.Random(seed)
+    verdicts = {'equal': 0, 'inconclusive': 0}
+    saved = 0
+    for i in range(count):
+        source = random_program(rng)
+        stdin_text = f"{rng.randrange(5)} {rng.randrange(1 << 64)}\n"
+        verdict, detail = check_equivalence(source, stdin_text)
+        if verdict == 'mismatch':
+            print(f"program {i}: optimized run differs: {detail}")
+            print(source)
+            return False
+        verdicts[verdict] += 1
+        if verdict == 'equal':
+            saved += detail['steps_before'] - detail['steps_after']
+    print(f"{count} programs: {verdicts['equal']} equivalent, "
+          f"{verdicts['inconclusive']} faulting originals skipped, {saved} VM steps saved")
+    return True
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check the peephole optimizer under the emulator.")
+    parser.add_argument('sources', nargs='*', help=".asm files to optimize and compare")
+    parser.add_argument('--input', default='', help="text fed to GETINT")
+    parser.add_argument('--max-steps', type=int, default=1000000)
+    parser.add_argument('--fuzz', type=int, default=0, help="also check this many random programs")
+    parser.add_argument('--seed', type=int, default=1337)
+    args = parser.parse_intermixed_args()
+
+    ok = True
+    for path in args.sources:
+        with open(path, 'r') as f:
+            source = f.read()
+        try:
+            verdict, detail = check_equivalence(source, args.input, args.max_steps)
+        except AssemblyError as e:
+            print(f"{path}: {e}")
+            ok = False
+            continue
+        print(f"{path}: {verdict}")
+        if verdict == 'mismatch':
+            print(f"  {detail}")
+            ok = False
+        else:
+            print("  " + format_report(detail).replace("\n", "\n  "))
+            if verdict == 'equal':
+                print(f"  VM steps:     {detail['steps_before']} -> {detail['steps_after']}")
+    if args.fuzz:
+        ok &= fuzz(args.fuzz, args.seed)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
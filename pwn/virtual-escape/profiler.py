@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+ByteForge VM Profiler
+Runs a program under the Python emulator and reports where cycles go
+
+- executed instructions per opcode and per basic block (disasm.py CFG)
+- maximum data stack and call stack depth
+- hottest loops, found from taken backward JMP/JZ edges
+- flamegraph.pl compatible folded stacks: one frame per CALL target,
+  plus the nearest .asm label as the leaf, weighted by instructions
+
+Labels come from the .asm source; without one, blocks are named L_xxxx.
+"""
+
+import bisect
+import io
+import os
+import sys
+import time
+from collections import Counter
+
+from asm import AssemblyError, assemble_lines
+from disasm import ControlFlowGraph
+from vm import VM, VMFault, VMResult
+
+ROOT_FRAME = 'main'
+
+
+class Profile:
+    def __init__(self, cfg, labels, contexts, backedges, max_sp, max_call_sp, result, stopped=None):
+        self.cfg = cfg
+        # offset -> label, first label in source order wins
+        self.labels = labels
+        self._label_offsets = sorted(labels)
+        # call stack (tuple of CALL targets) -> Counter of per-pc executions
+        self.contexts = contexts
+        # (from pc, to pc) -> times a backward JMP/JZ was taken
+        self.backedges = backedges
+        self.max_sp = max_sp
+        self.max_call_sp = max_call_sp
+        self.result = result
+        self.stopped = stopped
+
+        self.pc_counts = [0] * cfg.size
+        for counts in contexts.values():
+            for pc, n in counts.items():
+                self.pc_counts[pc] += n
+        self.steps = sum(self.pc_counts)
+
+    def name(self, offset):
+        label = self.labels.get(offset)
+        return label if label is not None else f"L_{offset:04x}"
+
+    def enclosing_label(self, offset):
+        """Nearest label at or before offset, None if there is none."""
+        i = bisect.bisect_right(self._label_offsets, offset)
+        return self.labels[self._label_offsets[i - 1]] if i else None
+
+    def opcode_counts(self):
+        totals = {}
+        for ins in self.cfg.instructions:
+            n = self.pc_counts[ins.offset]
+            if n:
+                name = ins.name or f"<invalid 0x{ins.opcode:02x}>"
+                totals[name] = totals.get(name, 0) + n
+        return sorted(totals.items(), key=lambda item: -item[1])
+
+    def block_counts(self):
+        """[(block, entries, instructions executed)] for blocks that ran."""
+        rows = []
+        for block in self.cfg.blocks.values():
+            executed = sum(self.pc_counts[ins.offset] for ins in block.instructions)
+            if executed:
+                rows.append((block, self.pc_counts[block.start], executed))
+        return rows
+
+    def unaligned_steps(self):
+        """Instructions executed at offsets the linear sweep did not decode."""
+        aligned = sum(self.pc_counts[ins.offset] for ins in self.cfg.instructions)
+        return self.steps - aligned
+
+    def loops(self):
+        """[(header, latch, iterations, instructions executed in [header, latch])]."""
+        rows = []
+        for (latch, header), taken in self.backedges.items():
+            body = sum(self.pc_counts[header:latch + 1])
+            rows.append((header, latch, taken, body))
+        return sorted(rows, key=lambda row: -row[3])
+
+    def folded(self):
+        """Folded stack lines: 'main;callee;label count'."""
+        stacks = {}
+        for context, counts in self.contexts.items():
+            frames = [ROOT_FRAME] + ['?' if target is None else self.name(target) for target in context]
+            for pc, n in counts.items():
+                leaf = self.enclosing_label(pc)
+                key = ';'.join(frames if leaf is None or leaf == frames[-1] else frames + [leaf])
+                stacks[key] = stacks.get(key, 0) + n
+        return [f"{stack} {n}" for stack, n in sorted(stacks.items())]
+
+    def report(self, top=10):
+        out = []
+        status = self.stopped or (
+            f"error_handler hijacked -> {self.result.hijacked_handler:#x}"
+            if self.result.hijacked_handler is not None
+            else f"exit code {self.result.exit_code}"
+        )
+        out.append(f"{self.steps} instructions, {status}")
+        if self.result.elapsed:
+            out.append(f"{self.result.instructions_per_second:,.0f} instr/s under the profiler")
+        out.append(f"max stack depth {self.max_sp}/128, max call depth {self.max_call_sp}/16")
+
+        out.append("\n== opcodes ==")
+        for name, n in self.opcode_counts():
+            out.append(f"  {name:<14} {n:>12} {100 * n / self.steps:6.2f}%")
+
+        out.append(f"\n== hottest blocks (top {top}) ==")
+        out.append(f"  {'block':<20} {'offset':>8} {'entries':>10} {'instructions':>13} {'share':>7}")
+        for block, entries, executed in sorted(self.block_counts(), key=lambda row: -row[2])[:top]:
+            out.append(f"  {self.name(block.start):<20} {block.start:#08x} {entries:>10} "
+                       f"{executed:>13} {100 * executed / self.steps:6.2f}%")
+        unaligned = self.unaligned_steps()
+        if unaligned:
+            out.append(f"  {unaligned} instructions ran at offsets inside other instructions")
+
+        loops = self.loops()
+        out.append(f"\n== hottest loops (top {top}) ==")
+        if not loops:
+            out.append("  none")
+        for header, latch, taken, body in loops[:top]:
+            out.append(f"  {self.name(header)} <- {self.enclosing_label(latch) or f'{latch:#06x}'} "
+                       f"@{latch:#06x}: {taken} iterations, {body} instructions "
+                       f"({100 * body / self.steps:.2f}%)")
+        return '\n'.join(out)
+
+
+class ProfilingVM(VM):
+    """VM whose run loop records per-pc counts under each call context.
+
+    Unlike VM.run, hitting max_steps stops the run instead of raising, so
+    programs that never halt can still be profiled. When call_sp is
+    rewritten upwards through memory, the skipped levels become a single
+    None ("?") frame; widths keeps how many levels each frame stands for.
+    """
+
+    def profile(self, max_steps=None):
+        decoded = self._decoded
+        decode = self._decode
+        contexts = {(): Counter()}
+        counts = contexts[()]
+        stack = []
+        widths = []
+        backedges = {}
+        max_sp = max_call_sp = 0
+        jumps = {self._op_jmp, self._op_jz}
+        steps = 0
+        start = time.perf_counter()
+        while not self.halted and self.pc < self.size:
+            pc = self.pc
+            try:
+                entry = decoded[pc]
+            except IndexError:
+                raise self._fetch_fault() from None
+            if entry is None:
+                entry = decoded[pc] = decode(pc)
+            handler, arg, self.pc = entry
+            call_sp = self.call_sp
+            handler(arg)
+            counts[pc] += 1
+            if self.sp > max_sp:
+                max_sp = self.sp
+            if self.pc <= pc and handler in jumps:
+                key = (pc, self.pc)
+                backedges[key] = backedges.get(key, 0) + 1
+            if self.call_sp != call_sp:
+                if self.call_sp == call_sp + 1:
+                    stack.append(self.pc)
+                    widths.append(1)
+                elif self.call_sp < call_sp:
+                    drop = call_sp - self.call_sp
+                    while widths and drop >= widths[-1]:
+                        drop -= widths.pop()
+                        stack.pop()
+                    if widths and drop:
+                        widths[-1] -= drop
+                else:
+                    # call_sp rewritten through memory: frames are unknown
+                    stack.append(None)
+                    widths.append(self.call_sp - call_sp)
+                if self.call_sp > max_call_sp:
+                    max_call_sp = self.call_sp
+                key = tuple(stack)
+                counts = contexts.get(key)
+                if counts is None:
+                    counts = contexts[key] = Counter()
+            steps += 1
+            if max_steps is not None and steps >= max_steps:
+                break
+        result = VMResult(self, steps, time.perf_counter() - start)
+        return result, contexts, backedges, max_sp, max_call_sp
+
+
+def profile(bytecode, symbols=None, stdin=None, stdout=None, stderr=None, max_steps=None):
+    """Run bytecode under the profiler; symbols maps label -> offset."""
+    labels = {}
+    for label, offset in (symbols or {}).items():
+        labels.setdefault(offset, label)
+    vm = ProfilingVM(bytecode, stdin=stdin, stdout=stdout, stderr=stderr)
+    result, contexts, backedges, max_sp, max_call_sp = vm.profile(max_steps)
+    stopped = None
+    if not vm.halted and vm.pc < vm.size:
+        stopped = f"stopped after {result.steps} instructions at pc={vm.pc:#06x}"
+    cfg = ControlFlowGraph(bytecode)
+    return Profile(cfg, labels, contexts, backedges, max_sp, max_call_sp, result, stopped)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Profile a ByteForge program under the emulator.")
+    parser.add_argument('program', help=".asm source (assembled on the fly) or .bin image")
+    parser.add_argument('--source', help="with a .bin: the .asm it was built from, for label names")
+    parser.add_argument('--input', help="text fed to GETINT instead of stdin")
+    parser.add_argument('--max-steps', type=int,
+                        help="stop profiling after this many instructions (report is still printed)")
+    parser.add_argument('--top', type=int, default=10, help="rows in the block and loop tables")
+    parser.add_argument('--folded', help="write flamegraph folded stacks to this file ('-' for stdout)")
+    parser.add_argument('--quiet', action='store_true', help="discard the program's own output")
+    args = parser.parse_args()
+
+    symbols = {}
+    try:
+        if args.program.endswith('.asm'):
+            with open(args.program, 'r') as f:
+                bytecode = assemble_lines(f, symbols=symbols)
+        else:
+            with open(args.program, 'rb') as f:
+                bytecode = f.read()
+            if args.source:
+                with open(args.source, 'r') as f:
+                    if assemble_lines(f, symbols=symbols) != bytecode:
+                        print(f"Warning: {args.source} does not assemble to {args.program}, "
+                              f"labels may be wrong", file=sys.stderr)
+    except IOError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    except AssemblyError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+
+    stdin = io.StringIO(args.input) if args.input is not None else sys.stdin
+    stdout = io.StringIO() if args.quiet else sys.stdout
+    stderr = io.StringIO() if args.quiet else sys.stderr
+    try:
+        prof = profile(bytecode, symbols, stdin=stdin, stdout=stdout, stderr=stderr,
+                       max_steps=args.max_steps)
+    except VMFault as e:
+        print(f"Emulation stopped: {e}", file=sys.stderr)
+        sys.exit(139)
+
+    report = sys.stderr if args.folded == '-' else sys.stdout
+    print(prof.report(args.top), file=report)
+
+    if args.folded:
+        text = '\n'.join(prof.folded()) + '\n'
+        if args.folded == '-':
+            sys.stdout.write(text)
+        else:
+            with open(args.folded, 'w') as f:
+                f.write(text)
+            print(f"\nfolded stacks -> {args.folded} "
+                  f"(flamegraph.pl {os.path.basename(args.folded)} > profile.svg)", file=report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+"""
+ByteForge VM Emulator
+Executes VM bytecode in Python, mirroring src/vm.c
+
+The C `struct VM` (x86-64 layout) is modelled as one preallocated
+array('Q') image, so out-of-bounds LOAD/STORE and call-stack overflows
+land on the same fields as in the real VM (stack pointer, pc,
+error_handler, ...). A hijacked error_handler stops emulation and is
+reported instead of being called.
+"""
+
+import io
+import struct
+import sys
+import time
+from array import array
+
+from asm import OPCODES
+
+# struct VM field offsets (bytes)
+MEMORY_SIZE = 512
+STACK_SLOTS = 128
+CALL_SLOTS = 16
+STACK_OFF = 512
+STACK_BASE = STACK_OFF // 8
+SP_OFF = 1536
+CALL_STACK_OFF = 1544
+CALL_SP_OFF = 1672
+REGS_OFF = 1680
+PC_OFF = 1744
+BYTECODE_OFF = 1752
+SIZE_OFF = 1760
+HANDLER_OFF = 1768
+STATUS_OFF = 1776  # int exit_code; int halted;
+VM_STRUCT_SIZE = 1784
+
+# LOAD/STORE take a u16 index, so everything they can reach is modelled
+IMAGE_BYTES = 0x10000 + 8
+
+DEFAULT_ERROR_HANDLER = 0x401256
+DEFAULT_BYTECODE_ADDR = 0x4052A0
+
+MASK64 = (1 << 64) - 1
+
+
+class VMFault(Exception):
+    """Access outside the modelled VM state (a crash in the C VM)."""
+
+
+class StepLimitExceeded(Exception):
+    """Raised when a run exceeds its instruction budget."""
+
+
+class VMResult:
+    def __init__(self, vm, steps, elapsed):
+        self.exit_code = vm.exit_code
+        self.halted = vm.halted
+        self.hijacked_handler = vm.hijacked_handler
+        self.pc = vm.pc
+        self.steps = steps
+        self.elapsed = elapsed
+
+    @property
+    def instructions_per_second(self):
+        return self.steps / self.elapsed if self.elapsed else 0.0
+
+
+class VM:
+    """Python model of struct VM and vm_execute()."""
+
+    def __init__(
+        self,
+        bytecode,
+        stdin=None,
+        stdout=None,
+        stderr=None,
+        error_handler_addr=DEFAULT_ERROR_HANDLER,
+        bytecode_addr=DEFAULT_BYTECODE_ADDR,
+    ):
+        self.code = bytes(bytecode)
+        self.size = len(self.code)
+        self.stdin = stdin if stdin is not None else sys.stdin
+        self.stdout = stdout if stdout is not None else sys.stdout
+        self.stderr = stderr if stderr is not None else sys.stderr
+
+        self.image = array('Q', bytes(IMAGE_BYTES))
+        self.mem = memoryview(self.image).cast('B')
+
+        self.sp = 0
+        self.call_sp = 0
+        self.pc = 0
+        self.bytecode_addr = bytecode_addr
+        self.default_handler = error_handler_addr
+        self.error_handler = error_handler_addr
+        self.exit_code = 0
+        self.halted = 0
+        self.hijacked_handler = None
+
+        self._pending_tokens = []
+        self._decoded = [None] * self.size
+        self._dispatch = self._build_dispatch()
+
+    # ------------------------------------------------------------------
+    # Control fields live in Python attributes for speed and are only
+    # written to / read back from the image when memory accesses alias them.
+
+    def _flush_control(self):
+        image = self.image
+        image[SP_OFF // 8] = self.sp & MASK64
+        image[CALL_SP_OFF // 8] = self.call_sp & MASK64
+        image[PC_OFF // 8] = self.pc & MASK64
+        image[BYTECODE_OFF // 8] = self.bytecode_addr & MASK64
+        image[SIZE_OFF // 8] = self.size & MASK64
+        image[HANDLER_OFF // 8] = self.error_handler & MASK64
+        image[STATUS_OFF // 8] = (self.exit_code & 0xFFFFFFFF) | ((self.halted & 0xFFFFFFFF) << 32)
+
+    def _load_control(self):
+        image = self.image
+        self.sp = image[SP_OFF // 8]
+        # stack[sp - 1] must stay inside the image, or every pop and the
+        # ADD/SUB/MUL/DUP/LOAD/STORE fast paths would index past it
+        if STACK_OFF + 8 * self.sp > IMAGE_BYTES:
+            raise VMFault(f"stack pointer overwritten with {self.sp:#x}")
+        self.call_sp = image[CALL_SP_OFF // 8]
+        self.pc = image[PC_OFF // 8]
+        self.bytecode_addr = image[BYTECODE_OFF // 8]
+        self.error_handler = image[HANDLER_OFF // 8]
+        status = image[STATUS_OFF // 8]
+        self.exit_code = struct.unpack('<i', struct.pack('<I', status & 0xFFFFFFFF))[0]
+        self.halted = status >> 32
+        size = image[SIZE_OFF // 8]
+        if size != self.size:
+            # Operand truncation is decided against the size at decode time,
+            # so drop every cached decode whose operand could reach either end.
+            decoded = self._decoded
+            for pc in range(max(0, min(size, self.size) - 8), len(decoded)):
+                decoded[pc] = None
+            self.size = size
+
+    # ------------------------------------------------------------------
+
+    def error(self):
+        if self.error_handler != self.default_handler:
+            # Control flow would jump to an attacker-chosen address.
+            self.hijacked_handler = self.error_handler
+            self.halted = 1
+            return
+        self.stderr.write(f"VM Error at PC={self.pc}\n")
+        self.halted = 1
+        self.exit_code = 1
+
+    def push(self, val):
+        if self.sp >= STACK_SLOTS:
+            self.stderr.write("Stack overflow!\n")
+            self.error()
+            return
+        self.image[STACK_BASE + self.sp] = val & MASK64
+        self.sp += 1
+
+    def pop(self):
+        if self.sp == 0:
+            self.stderr.write("Stack underflow!\n")
+            self.error()
+            return 0
+        self.sp -= 1
+        return self.image[STACK_BASE + self.sp]
+
+    def read_mem(self, idx):
+        if idx + 8 > SP_OFF and idx < VM_STRUCT_SIZE:
+            self._flush_control()
+        if idx & 7 == 0:
+            return self.image[idx >> 3]
+        return struct.unpack_from('<Q', self.mem, idx)[0]
+
+    def write_mem(self, idx, val):
+        aliased = idx + 8 > SP_OFF and idx < VM_STRUCT_SIZE
+        if aliased:
+            self._flush_control()
+        if idx & 7 == 0:
+            self.image[idx >> 3] = val
+        else:
+            struct.pack_into('<Q', self.mem, idx, val)
+        if aliased:
+            self._load_control()
+
+    def read_int(self):
+        """scanf("%lu") over self.stdin; 0 when no integer is available."""
+        while not self._pending_tokens:
+            line = self.stdin.readline()
+            if not line:
+                return 0
+            self._pending_tokens = line.split()[::-1]
+        token = self._pending_tokens[-1]
+        try:
+            val = int(token, 10)
+        except ValueError:
+            return 0
+        self._pending_tokens.pop()
+        return val & MASK64
+
+    # ------------------------------------------------------------------
+    # Opcode handlers: called with the decoded operand, after self.pc has
+    # been advanced past the instruction. Common cases touch the stack words
+    # directly; anything that could fault goes through push/pop/read_mem.
+
+    def _op_push(self, arg):
+        sp = self.sp
+        if sp < STACK_SLOTS:
+            self.image[STACK_BASE + sp] = arg
+            self.sp = sp + 1
+        else:
+            self.push(arg)
+
+    def _op_pop(self, arg):
+        if self.sp:
+            self.sp -= 1
+        else:
+            self.pop()
+
+    def _op_dup(self, arg):
+        sp = self.sp
+        if sp == 0:
+            self.error()
+        elif sp < STACK_SLOTS:
+            image = self.image
+            image[STACK_BASE + sp] = image[STACK_BASE + sp - 1]
+            self.sp = sp + 1
+        else:
+            self.push(self.image[STACK_BASE + sp - 1])
+
+    def _op_add(self, arg):
+        sp = self.sp
+        if sp >= 2:
+            image = self.image
+            image[STACK_BASE + sp - 2] = (image[STACK_BASE + sp - 2] + image[STACK_BASE + sp - 1]) & MASK64
+            self.sp = sp - 1
+            return
+        b = self.pop()
+        a = self.pop()
+        self.push(a + b)
+
+    def _op_sub(self, arg):
+        sp = self.sp
+        if sp >= 2:
+            image = self.image
+            image[STACK_BASE + sp - 2] = (image[STACK_BASE + sp - 2] - image[STACK_BASE + sp - 1]) & MASK64
+            self.sp = sp - 1
+            return
+        b = self.pop()
+        a = self.pop()
+        self.push(a - b)
+
+    def _op_mul(self, arg):
+        sp = self.sp
+        if sp >= 2:
+            image = self.image
+            image[STACK_BASE + sp - 2] = (image[STACK_BASE + sp - 2] * image[STACK_BASE + sp - 1]) & MASK64
+            self.sp = sp - 1
+            return
+        b = self.pop()
+        a = self.pop()
+        self.push(a * b)
+
+    def _op_load(self, arg):
+        if arg < MEMORY_SIZE and not arg & 7 and self.sp < STACK_SLOTS:
+            self.image[STACK_BASE + self.sp] = self.image[arg >> 3]
+            self.sp += 1
+            return
+        if MEMORY_SIZE <= arg < 2048:
+            self.stderr.write(f"Warning: Load from extended memory at {arg}\n")
+        self.push(self.read_mem(arg))
+
+    def _op_store(self, arg):
+        if arg < MEMORY_SIZE and not arg & 7 and self.sp:
+            self.sp -= 1
+            self.image[arg >> 3] = self.image[STACK_BASE + self.sp]
+            return
+        val = self.pop()
+        if MEMORY_SIZE <= arg < 2048:
+            self.stderr.write(f"Warning: Store to extended memory at {arg}\n")
+        self.write_mem(arg, val)
+
+    def _op_jmp(self, arg):
+        self.pc = arg
+
+    def _op_jz(self, arg):
+        sp = self.sp
+        if sp:
+            self.sp = sp - 1
+            if self.image[STACK_BASE + sp - 1] == 0:
+                self.pc = arg
+        elif self.pop() == 0:
+            self.pc = arg
+
+    def _op_call(self, arg):
+        slot = self.call_sp
+        self.call_sp += 1
+        if slot < CALL_SLOTS:
+            self.image[CALL_STACK_OFF // 8 + slot] = self.pc
+            self.pc = arg
+            return
+        # No bounds check in the C VM: the return address overwrites the
+        # fields that follow call_stack[16], starting with call_sp itself.
+        offset = CALL_STACK_OFF + 8 * slot
+        if offset + 8 > IMAGE_BYTES:
+            raise VMFault(f"call stack write at struct offset {offset:#x}")
+        self.pc, ret = arg, self.pc
+        self._flush_control()
+        self.image[offset // 8] = ret
+        self._load_control()
+        # C stores the return address before `pc = addr`, so a slot that
+        # aliases pc is overwritten by the jump target.
+        self.pc = arg
+
+    def _op_ret(self, arg):
+        if self.call_sp == 0:
+            self.stderr.write("Call stack underflow\n")
+            self.error()
+            return
+        self.call_sp -= 1
+        offset = CALL_STACK_OFF + 8 * self.call_sp
+        if self.call_sp < CALL_SLOTS:
+            self.pc = self.image[offset // 8]
+            return
+        if offset + 8 > IMAGE_BYTES:
+            raise VMFault(f"call stack read at struct offset {offset:#x}")
+        self._flush_control()
+        self.pc = self.image[offset // 8]
+
+    def _op_print(self, arg):
+        self.stdout.write(f"{self.pop()}\n")
+
+    def _op_getint(self, arg):
+        self.push(self.read_int())
+
+    def _op_dump_regs(self, arg):
+        out = ["=== Register Dump ===\n"]
+        for i in range(8):
+            out.append(f"R{i}: 0x{self.image[REGS_OFF // 8 + i]:016x}\n")
+        out.append(f"PC: 0x{self.pc:016x}\n")
+        out.append(f"SP: {self.sp}\n")
+        out.append(f"Call SP: {self.call_sp}\n")
+        self.stdout.write("".join(out))
+
+    def _op_dump_stack(self, arg):
+        out = ["=== Stack Dump ===\n", f"Stack pointer: {self.sp}\n"]
+        for i in range(min(self.sp, 10)):
+            out.append(f"[{i}]: 0x{self.image[STACK_BASE + i]:016x}\n")
+        if self.sp > 10:
+            out.append(f"... ({self.sp - 10} more entries)\n")
+        self.stdout.write("".join(out))
+
+    def _op_trigger_error(self, arg):
+        self.error()
+
+    def _op_halt(self, arg):
+        self.halted = 1
+
+    def _op_unknown(self, opcode):
+        self.stderr.write(f"Unknown opcode: 0x{opcode:02x} at PC={self.pc - 1}\n")
+        self.error()
+
+    def _build_dispatch(self):
+        """256-entry table: opcode -> (handler, operand width)."""
+        handlers = {
+            'PUSH': (self._op_push, 8),
+            'POP': (self._op_pop, 0),
+            'DUP': (self._op_dup, 0),
+            'ADD': (self._op_add, 0),
+            'SUB': (self._op_sub, 0),
+            'MUL': (self._op_mul, 0),
+            'LOAD': (self._op_load, 2),
+            'STORE': (self._op_store, 2),
+            'JMP': (self._op_jmp, 2),
+            'JZ': (self._op_jz, 2),
+            'CALL': (self._op_call, 2),
+            'RET': (self._op_ret, 0),
+            'PRINT': (self._op_print, 0),
+            'GETINT': (self._op_getint, 0),
+            'DUMP_REGS': (self._op_dump_regs, 0),
+            'DUMP_STACK': (self._op_dump_stack, 0),
+            'TRIGGER_ERROR': (self._op_trigger_error, 0),
+            'HALT': (self._op_halt, 0),
+        }
+        table = [None] * 256
+        for name, opcode in OPCODES.items():
+            table[opcode] = handlers[name]
+        return table
+
+    def _decode(self, pc):
+        """Decode the instruction at pc into (handler, operand, next_pc)."""
+        opcode = self.code[pc]
+        entry = self._dispatch[opcode]
+        if entry is None:
+            return (self._op_unknown, opcode, pc + 1)
+        handler, width = entry
+        if width == 0:
+            return (handler, 0, pc + 1)
+        # read_u16/read_u64 refuse when pc + width - 1 >= size: the error
+        # handler runs, pc stays after the opcode, and the operand reads as 0.
+        if pc + width >= self.size:
+            def truncated(arg, handler=handler):
+                self.error()
+                handler(0)
+            return (truncated, 0, pc + 1)
+        if pc + width >= len(self.code):
+            raise VMFault(f"operand at pc={pc} read past the bytecode buffer")
+        arg = int.from_bytes(self.code[pc + 1:pc + 1 + width], 'little')
+        return (handler, arg, pc + 1 + width)
+
+    def _fetch_fault(self):
+        # Only reachable once bytecode_size has been overwritten upwards: the
+        # C VM would read the heap past its bytecode allocation.
+        return VMFault(f"pc={self.pc} past the {len(self.code)}-byte bytecode buffer")
+
+    def step(self):
+        if self.pc >= len(self.code):
+            raise self._fetch_fault()
+        entry = self._decoded[self.pc]
+        if entry is None:
+            entry = self._decoded[self.pc] = self._decode(self.pc)
+        handler, arg, self.pc = entry
+        handler(arg)
+
+    def run(self, max_steps=None):
+        decoded = self._decoded
+        decode = self._decode
+        steps = 0
+        start = time.perf_counter()
+        while not self.halted and self.pc < self.size:
+            pc = self.pc
+            try:
+                entry = decoded[pc]
+            except IndexError:
+                raise self._fetch_fault() from None
+            if entry is None:
+                entry = decoded[pc] = decode(pc)
+            handler, arg, self.pc = entry
+            handler(arg)
+            steps += 1
+            if max_steps is not None and steps >= max_steps:
+                raise StepLimitExceeded(f"no HALT after {steps} instructions (pc={self.pc})")
+        return VMResult(self, steps, time.perf_counter() - start)
+
+
+def run_file(path, stdin=None, stdout=None, stderr=None, max_steps=None):
+    with open(path, 'rb') as f:
+        bytecode = f.read()
+    return VM(bytecode, stdin=stdin, stdout=stdout, stderr=stderr).run(max_steps)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run ByteForge bytecode in Python.")
+    parser.add_argument('bytecode', help="program to run (.bin)")
+    parser.add_argument('--input', help="text fed to GETINT instead of stdin")
+    parser.add_argument('--max-steps', type=int, help="abort after this many instructions")
+    parser.add_argument('--win-addr', type=lambda s: int(s, 0),
+                        help="exit 0 if error_handler is hijacked to this address")
+    parser.add_argument('--stats', action='store_true', help="print instructions/sec to stderr")
+    args = parser.parse_args()
+
+    try:
+        with open(args.bytecode, 'rb') as f:
+            bytecode = f.read()
+    except IOError as e:
+        print(f"Error: Cannot open file '{args.bytecode}': {e}", file=sys.stderr)
+        sys.exit(1)
+    if not bytecode:
+        print("Error: Empty bytecode file", file=sys.stderr)
+        sys.exit(1)
+
+    stdin = io.StringIO(args.input) if args.input is not None else sys.stdin
+
+    print("ByteForge VM v1.0")
+    print(f"Loaded {len(bytecode)} bytes of bytecode")
+    print("Starting execution...\n")
+
+    try:
+        result = VM(bytecode, stdin=stdin).run(args.max_steps)
+    except (VMFault, StepLimitExceeded) as e:
+        print(f"Emulation stopped: {e}", file=sys.stderr)
+        sys.exit(139)
+
+    if args.stats:
+        print(f"{result.steps} instructions in {result.elapsed:.4f}s "
+              f"({result.instructions_per_second:,.0f} instr/s)", file=sys.stderr)
+
+    if result.hijacked_handler is not None:
+        print(f"\nerror_handler hijacked -> {result.hijacked_handler:#x}")
+        sys.exit(0 if result.hijacked_handler == args.win_addr else 139)
+
+    print(f"\nVM halted with exit code: {result.exit_code}")
+    sys.exit(result.exit_code)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,18 @@
-from Crypto.Util.number import inverse
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", ".."))
+from revutils import Pipeline, affine, index_xor, key_add, key_xor  # noqa: E402
 
 a = 13
 b = 37
-a_inv = inverse(a, 256)
 
 target_key = [
     0x10, 0x4f, 0xff, 0xcd, 0xe1, 0xfd, 0x5f, 0xb8,
     0x1e, 0xab, 0x27, 0xdb, 0x3d, 0xbd, 0x09, 0x07]
 
-enc_flag  = [ 
+enc_flag = [
     0x74, 0x6a, 0x7f, 0x70, 0x80, 0x6d, 0x73, 0x93, 0x7c, 0x81, 0x8d, 0x55,
     0x49, 0x86, 0x55, 0x71, 0x75, 0x4a, 0x83, 0x57, 0x73, 0x44, 0x87, 0x83,
     0x5c, 0x6d, 0x73, 0x6d, 0x6e, 0x59, 0x60, 0x71, 0x4a, 0x70, 0x70, 0x4d,
@@ -16,28 +20,25 @@ enc_flag  = [
     0x66, 0x58, 0x4d, 0x76, 0x38, 0x49, 0x60, 0x66, 0x76, 0x70, 0x45, 0x6f,
     0x3c, 0x64, 0x8d]
 
+# checkEnvKey: target[i] = (a * KEY[i] + b * i) % 256
+check_env_key = Pipeline(affine(a, step=b))
+# generateSecretKey: secret_key[i] = KEY[i] ^ i ^ 0x51
+generate_secret_key = Pipeline(index_xor(), key_xor([0x51]))
 
-def getEnvVariable(s, a_inv, b):
-    return [(a_inv * (s[i] - b * i)) % 256 for i in range(len(s))]
-
-def generateSecretKey(e):
-    seckey = []
-    for i in range(16):
-        seckey.append((e[i]) ^ i ^ 0x51)
-    return seckey
 
+def pipeline():
+    # fun: output[i] = (password[i] + secret_key[i % 16]) % 256
+    environ_key = check_env_key.decrypt(target_key)
+    return Pipeline(key_add(generate_secret_key.encrypt(environ_key)))
 
-def decryptflag(decryptionkey , encrypted_flag , len_enc):
-    flag = []
-    for i in range(len_enc):
-        flag.append(encrypted_flag[i] - decryptionkey[i % len(decryptionkey)])
-    return "".join(chr(x) for x in flag)
 
+def ciphertext():
+    return enc_flag
 
 
+def solve():
+    return pipeline().decrypt(ciphertext()).tobytes().decode()
 
 
-environ_key = getEnvVariable(target_key, a_inv, b)
-dec_key = generateSecretKey(environ_key)
-flag = decryptflag(dec_key , enc_flag , len(enc_flag))
-print(flag)
+if __name__ == "__main__":
+    print(solve())
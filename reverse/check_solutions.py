@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Run every reverse solver and check it against its challenge.
+
+For each <challenge>/solution/*.py, the solver is imported and its
+solve() must return the flag listed in challenge.yml (and in
+challenge/flag.txt, when there is one). Solvers built on a revutils
+Pipeline also expose pipeline() and ciphertext(): the flag is then
+encrypted forward again and must reproduce the shipped artifact
+byte for byte.
+
+Everything runs in one process, so a full check costs one NumPy import.
+Exits non-zero if any solver fails.
+
+    python check_solutions.py
+    python check_solutions.py A-rabbit-hole VIP-ONLY
+"""
+
+import argparse
+import importlib.util
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+from revutils import as_bytes  # noqa: E402
+
+_FLAG_LINE = re.compile(r"""^\s*-\s*["']?(.*?)["']?\s*$""")
+
+
+class CheckError(Exception):
+    pass
+
+
+def challenge_flags(directory: str) -> set:
+    """Flags from the `flags:` list of challenge.yml, and challenge/flag.txt."""
+    flags = set()
+    with open(os.path.join(directory, "challenge.yml")) as f:
+        in_flags = False
+        for line in f:
+            if re.match(r"^flags\s*:", line):
+                in_flags = True
+            elif in_flags:
+                match = _FLAG_LINE.match(line)
+                if not match:
+                    break
+                flags.add(match.group(1))
+    path = os.path.join(directory, "challenge", "flag.txt")
+    if os.path.exists(path):
+        with open(path) as f:
+            text = f.read().strip()
+        if flags and text not in flags:
+            raise CheckError(f"flag.txt does not match challenge.yml: {text!r}")
+        flags.add(text)
+    return flags
+
+
+def solvers(directory: str) -> list:
+    solution = os.path.join(directory, "solution")
+    if not os.path.isdir(solution):
+        return []
+    return sorted(os.path.join(solution, name) for name in os.listdir(solution) if name.endswith(".py"))
+
+
+def load(path: str):
+    name = "solution_" + re.sub(r"\W", "_", os.path.relpath(path, HERE))
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def check(path: str, flags: set) -> str:
+    """What was checked; raises CheckError on a mismatch."""
+    module = load(path)
+    if not hasattr(module, "solve"):
+        raise CheckError("no solve() function")
+    flag = module.solve()
+    if flag not in flags:
+        raise CheckError(f"solve() returned {flag!r}")
+    if hasattr(module, "pipeline"):
+        expected = as_bytes(module.ciphertext())
+        if not np.array_equal(module.pipeline().encrypt(flag), expected):
+            raise CheckError("re-encrypting the flag does not reproduce the challenge output")
+        return "flag, round trip"
+    return "flag"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check every reverse solver against its challenge.")
+    parser.add_argument("challenges", nargs="*", help="challenge directories (default: all)")
+    args = parser.parse_args()
+
+    names = args.challenges or sorted(
+        name for name in os.listdir(HERE) if os.path.exists(os.path.join(HERE, name, "challenge.yml")))
+    failed = 0
+    start = time.perf_counter()
+    for name in names:
+        directory = os.path.join(HERE, name)
+        paths = solvers(directory)
+        if not paths:
+            print(f"{name}: no solver")
+            continue
+        for path in paths:
+            t0 = time.perf_counter()
+            try:
+                what = check(path, challenge_flags(directory))
+            except Exception as e:
+                failed += 1
+                print(f"{name}/{os.path.basename(path)}: FAILED ({type(e).__name__}: {e})")
+                continue
+            print(f"{name}/{os.path.basename(path)}: ok ({what}, {time.perf_counter() - t0:.3f}s)")
+    print(f"{len(names)} challenges in {time.perf_counter() - start:.2f}s, {failed} failed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
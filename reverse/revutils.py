@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Byte transforms for the reverse challenge solvers, on NumPy uint8 arrays.
+
+Each transform is a Transform: a forward map (what the challenge binary
+does) and its inverse, with the parameters bound. A Pipeline chains
+them in the binary's order; encrypt() runs them forward and decrypt()
+runs the inverses backwards, so a solver only has to describe the
+binary once.
+
+- gray: x ^ (x >> 1), and its prefix-XOR inverse
+- index_xor: x_i ^ (i + start)
+- affine: (a * x_i + b + step * i) mod 256, for odd a
+- parity_shift: x_i + i if x_i is even, else x_i - i (A-rabbit-hole)
+- key_xor / key_add: a repeating key, XORed or added mod 256
+
+Indices run along the last axis, so a 2-D array is a batch of
+equal-length buffers (e.g. one row per candidate key) handled in one go.
+
+Solvers import this file from the reverse/ directory:
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+    python revutils.py --bench 16        # round-trips and MB/s per transform
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+
+def as_bytes(data) -> np.ndarray:
+    """uint8 array from bytes, a str, a list of ints or an array."""
+    if isinstance(data, str):
+        data = data.encode("latin-1")
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return np.frombuffer(bytes(data), dtype=np.uint8).copy()
+    array = np.asarray(data)
+    if array.dtype != np.uint8:
+        if array.size and (array.min() < 0 or array.max() > 0xFF):
+            raise ValueError("values do not fit in a byte")
+        array = array.astype(np.uint8)
+    return array
+
+
+def from_hex(text: str) -> np.ndarray:
+    return as_bytes(bytes.fromhex(text.strip()))
+
+
+def _index(data: np.ndarray, start: int = 0, step: int = 1) -> np.ndarray:
+    """(start + step * i) mod 256 along the last axis."""
+    return ((np.arange(data.shape[-1]) * step + start) & 0xFF).astype(np.uint8)
+
+
+def _key(data: np.ndarray, key) -> np.ndarray:
+    key = as_bytes(key)
+    if not key.size:
+        raise ValueError("empty key")
+    return np.resize(key, data.shape[-1])
+
+
+# ----------------------------------------------------------------------
+# Forward maps and their inverses
+
+
+def gray_encode(data: np.ndarray) -> np.ndarray:
+    return data ^ (data >> 1)
+
+
+def gray_decode(data: np.ndarray) -> np.ndarray:
+    data = data ^ (data >> 1)
+    data ^= data >> 2
+    data ^= data >> 4
+    return data
+
+
+def xor_index(data: np.ndarray, start: int = 0) -> np.ndarray:
+    return data ^ _index(data, start)
+
+
+def affine_encode(data: np.ndarray, a: int, b: int = 0, step: int = 0) -> np.ndarray:
+    return data * np.uint8(a & 0xFF) + _index(data, b, step)
+
+
+def affine_decode(data: np.ndarray, a: int, b: int = 0, step: int = 0) -> np.ndarray:
+    return (data - _index(data, b, step)) * np.uint8(pow(a, -1, 256))
+
+
+def parity_encode(data: np.ndarray) -> np.ndarray:
+    # x + i, minus 2i for odd x
+    return data + _index(data) - (data & 1) * _index(data, 0, 2)
+
+
+def parity_decode(data: np.ndarray) -> np.ndarray:
+    # x - i and x + i keep the parity of x, and so does y - i from either
+    down = data - _index(data)
+    return down + (down & 1) * _index(data, 0, 2)
+
+
+def xor_key(data: np.ndarray, key) -> np.ndarray:
+    return data ^ _key(data, key)
+
+
+def add_key(data: np.ndarray, key) -> np.ndarray:
+    return data + _key(data, key)
+
+
+def sub_key(data: np.ndarray, key) -> np.ndarray:
+    return data - _key(data, key)
+
+
+# ----------------------------------------------------------------------
+# Transforms and pipelines
+
+
+class Transform:
+    """A forward byte map, its inverse, and their parameters."""
+
+    def __init__(self, name: str, forward, backward, **params):
+        self.name = name
+        self.forward = forward
+        self.backward = backward
+        self.params = params
+
+    def apply(self, data) -> np.ndarray:
+        return self.forward(as_bytes(data), **self.params)
+
+    def invert(self, data) -> np.ndarray:
+        return self.backward(as_bytes(data), **self.params)
+
+    def __repr__(self) -> str:
+        args = ", ".join(f"{k}={v!r}" for k, v in self.params.items())
+        return f"{self.name}({args})"
+
+
+def gray() -> Transform:
+    return Transform("gray", gray_encode, gray_decode)
+
+
+def index_xor(start: int = 0) -> Transform:
+    return Transform("index_xor", xor_index, xor_index, start=start)
+
+
+def affine(a: int, b: int = 0, step: int = 0) -> Transform:
+    if a % 2 == 0:
+        raise ValueError("a must be odd to be invertible mod 256")
+    return Transform("affine", affine_encode, affine_decode, a=a, b=b, step=step)
+
+
+def parity_shift() -> Transform:
+    return Transform("parity_shift", parity_encode, parity_decode)
+
+
+def key_xor(key) -> Transform:
+    return Transform("key_xor", xor_key, xor_key, key=bytes(as_bytes(key)))
+
+
+def key_add(key) -> Transform:
+    return Transform("key_add", add_key, sub_key, key=bytes(as_bytes(key)))
+
+
+class Pipeline:
+    """Transforms in the order the binary applies them."""
+
+    def __init__(self, *steps: Transform):
+        self.steps = steps
+
+    def encrypt(self, data) -> np.ndarray:
+        data = as_bytes(data)
+        for step in self.steps:
+            data = step.apply(data)
+        return data
+
+    def decrypt(self, data) -> np.ndarray:
+        data = as_bytes(data)
+        for step in reversed(self.steps):
+            data = step.invert(data)
+        return data
+
+    def __repr__(self) -> str:
+        return " -> ".join(map(repr, self.steps)) or "identity"
+
+
+def bench(mb: int, seed: int = 1337) -> bool:
+    rng = np.random.default_rng(seed)
+    data = rng.integers(0, 256, mb << 20, dtype=np.uint8).reshape(-1, 256)
+    transforms = [gray(), index_xor(7), affine(13, 5, 37), parity_shift(),
+                  key_xor(b"bugsbunny"), key_add(b"1337")]
+    ok = True
+    for t in transforms + [Pipeline(*transforms)]:
+        name = f"pipeline of {len(t.steps)}" if isinstance(t, Pipeline) else repr(t)
+        start = time.perf_counter()
+        out = t.encrypt(data) if isinstance(t, Pipeline) else t.apply(data)
+        back = t.decrypt(out) if isinstance(t, Pipeline) else t.invert(out)
+        elapsed = time.perf_counter() - start
+        good = np.array_equal(back, data)
+        ok &= good
+        print(f"{name:<32} {2 * mb / elapsed:8.0f} MB/s  {'ok' if good else 'MISMATCH'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and round-trip the reverse transforms.")
+    parser.add_argument("--bench", type=int, default=16, metavar="MB")
+    parser.add_argument("--seed", type=int, default=1337)
+    args = parser.parse_args()
+    sys.exit(0 if bench(args.bench, args.seed) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,35 @@
+import json
 import os
 import queue
+import sqlite3
 import threading
+import time
 import uuid
+from collections import deque
 from urllib.parse import urlencode
 
-from flask import Flask, redirect, render_template, request
+from flask import Flask, Response, jsonify, redirect, render_template, request
 from lxml import etree
 from playwright.sync_api import sync_playwright
 
 
 app = Flask(__name__)
 
-SUBMISSIONS = {}
-JOB_QUEUE = queue.Queue()
-
 BOT_BASE_URL = os.getenv("BOT_BASE_URL", "http://127.0.0.1:5000")
 FLAG = os.getenv("FLAG", "SHELLMATES{fake_flag}")
 
+SUBMISSIONS_DB = os.getenv(
+    "SUBMISSIONS_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "submissions.db")
+)
+SUBMISSION_TTL = int(os.getenv("SUBMISSION_TTL", "900"))
+SUBMISSION_MAX = int(os.getenv("SUBMISSION_MAX", "10000"))
+BOT_WORKERS = max(1, int(os.getenv("BOT_WORKERS", "2")))
+BOT_RECYCLE_AFTER = int(os.getenv("BOT_RECYCLE_AFTER", "200"))
+BOT_RELAUNCH_DELAY = 1.0
+BOT_RELAUNCH_MAX_DELAY = 30.0
+JOB_TTL = int(os.getenv("JOB_TTL", "300"))
+STATUS_MAX_WAIT = 30
+
 XML_DATA = f"""<?xml version=\"1.0\"?>
 <inventory>
     <knownspells>
@@ -41,35 +54,300 @@ XML_DATA = f"""<?xml version=\"1.0\"?>
 </inventory>
 """
 
+# Parsed and compiled once; the query is bound as an XPath variable rather
+# than formatted into the expression.
+INVENTORY = etree.fromstring(XML_DATA.encode("utf-8"))
+SEARCH_XPATH = etree.XPath(
+    "//knownspells/item[contains(name, $q) or contains(description, $q)]"
+)
 
-def bot_worker():
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        while True:
-            job_id = JOB_QUEUE.get()
-            if job_id is None:
-                JOB_QUEUE.task_done()
-                break
-            url = f"{BOT_BASE_URL}/view/{job_id}"
-            page = None
+
+def build_search_index(root):
+    """Flatten searchable items to (id, name, description) rows."""
+    return [
+        (
+            item.findtext("id", default=""),
+            item.findtext("name", default=""),
+            item.findtext("description", default=""),
+        )
+        for item in root.iterfind("knownspells/item")
+    ]
+
+
+SEARCH_INDEX = build_search_index(INVENTORY) if os.getenv("SEARCH_INDEX", "1") == "1" else None
+
+
+class SubmissionStore:
+    """SQLite-backed submissions, bounded in count and expired after a TTL."""
+
+    def __init__(self, path, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS submissions (
+                id TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                sort TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS submissions_created_at ON submissions (created_at)"
+        )
+        self._db.commit()
+
+    def add(self, submission_id, text, sort):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO submissions (id, text, sort, created_at) VALUES (?, ?, ?, ?)",
+                (submission_id, text, sort, now),
+            )
+            self._db.execute("DELETE FROM submissions WHERE created_at < ?", (now - self.ttl,))
+            self._db.execute(
+                """
+                DELETE FROM submissions WHERE id IN (
+                    SELECT id FROM submissions ORDER BY created_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            self._db.commit()
+
+    def get(self, submission_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT text, sort, created_at FROM submissions WHERE id = ?",
+                (submission_id,),
+            ).fetchone()
+        if row is None or row[2] < time.time() - self.ttl:
+            return None
+        return {"text": row[0], "sort": row[1]}
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM submissions WHERE created_at >= ?",
+                (time.time() - self.ttl,),
+            ).fetchone()[0]
+
+
+class BotStats:
+    """Queue wait and visit timings shared by all bot workers."""
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self.busy = 0
+        self.processed = 0
+        self.failed = 0
+        self.wait_times = deque(maxlen=window)
+        self.visit_times = deque(maxlen=window)
+
+    def started(self, waited):
+        with self._lock:
+            self.busy += 1
+            self.wait_times.append(waited)
+
+    def finished(self, elapsed, ok):
+        with self._lock:
+            self.busy -= 1
+            self.processed += 1
+            if not ok:
+                self.failed += 1
+            self.visit_times.append(elapsed)
+
+    @staticmethod
+    def _describe(samples):
+        if not samples:
+            return {"count": 0, "avg_ms": None, "p95_ms": None, "max_ms": None}
+        ordered = sorted(samples)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return {
+            "count": len(ordered),
+            "avg_ms": round(sum(ordered) / len(ordered) * 1000, 1),
+            "p95_ms": round(p95 * 1000, 1),
+            "max_ms": round(ordered[-1] * 1000, 1),
+        }
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "busy": self.busy,
+                "processed": self.processed,
+                "failed": self.failed,
+                "wait": self._describe(self.wait_times),
+                "visit": self._describe(self.visit_times),
+            }
+
+
+class JobTracker:
+    """Lifecycle of bot jobs: queued -> running -> done | failed."""
+
+    FINAL_STATES = ("done", "failed")
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._jobs = {}
+        self._changed = threading.Condition()
+
+    def _set(self, job_id, state, stamp):
+        with self._changed:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job["state"] = state
+            job[stamp] = time.time()
+            self._changed.notify_all()
+
+    def queued(self, job_id):
+        with self._changed:
+            self._purge()
+            self._jobs[job_id] = {
+                "state": "queued",
+                "queued_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+            }
+
+    def running(self, job_id):
+        self._set(job_id, "running", "started_at")
+
+    def finished(self, job_id, ok):
+        self._set(job_id, "done" if ok else "failed", "finished_at")
+
+    def _purge(self):
+        cutoff = time.time() - self.ttl
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job["finished_at"] is not None and job["finished_at"] < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._changed:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def wait(self, job_id, known_state, timeout):
+        """Block until the job leaves known_state, is final, or timeout expires."""
+        with self._changed:
+            self._changed.wait_for(
+                lambda: job_id not in self._jobs
+                or self._jobs[job_id]["state"] != known_state
+                or known_state in self.FINAL_STATES,
+                timeout,
+            )
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def counts(self):
+        with self._changed:
+            counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+            for job in self._jobs.values():
+                counts[job["state"]] += 1
+            return counts
+
+
+def describe_job(job_id, job):
+    info = {"id": job_id, **job}
+    if job["started_at"] is not None:
+        info["wait_ms"] = round((job["started_at"] - job["queued_at"]) * 1000, 1)
+    if job["finished_at"] is not None:
+        info["visit_ms"] = round((job["finished_at"] - job["started_at"]) * 1000, 1)
+    if job["state"] == "queued":
+        info["queue_depth"] = JOB_QUEUE.qsize()
+    return info
+
+
+SUBMISSIONS = SubmissionStore(SUBMISSIONS_DB, SUBMISSION_TTL, SUBMISSION_MAX)
+JOB_QUEUE = queue.Queue()
+BOT_STATS = BotStats()
+JOBS = JobTracker(JOB_TTL)
+
+
+def visit(browser, job_id):
+    url = f"{BOT_BASE_URL}/view/{job_id}"
+    page = None
+    try:
+        page = browser.new_page()
+        page.goto(url, wait_until="networkidle", timeout=10000)
+        page.wait_for_timeout(1000)
+        return True
+    except Exception:
+        return False
+    finally:
+        if page is not None:
             try:
-                page = browser.new_page()
-                page.goto(url, wait_until="networkidle", timeout=10000)
-                page.wait_for_timeout(1000)
+                page.close()
             except Exception:
                 pass
-            finally:
-                if page is not None:
-                    try:
-                        page.close()
-                    except Exception:
-                        pass
-                JOB_QUEUE.task_done()
+
+
+def launch_browser(p):
+    """Launch Chromium, retrying with backoff until it starts."""
+    delay = BOT_RELAUNCH_DELAY
+    while True:
+        try:
+            return p.chromium.launch(headless=True)
+        except Exception:
+            app.logger.exception("bot browser launch failed, retrying in %.0fs", delay)
+            time.sleep(delay)
+            delay = min(delay * 2, BOT_RELAUNCH_MAX_DELAY)
+
+
+def close_browser(browser):
+    try:
         browser.close()
+    except Exception:
+        app.logger.exception("bot browser close failed")
+
 
+def serve_jobs(p, jobs):
+    """Visit jobs from the queue until the None sentinel arrives."""
+    browser = launch_browser(p)
+    visits = 0
+    while True:
+        job = jobs.get()
+        if job is None:
+            jobs.task_done()
+            break
+        job_id, enqueued_at = job
+        started_at = time.monotonic()
+        BOT_STATS.started(started_at - enqueued_at)
+        JOBS.running(job_id)
+        ok = visit(browser, job_id)
+        BOT_STATS.finished(time.monotonic() - started_at, ok)
+        JOBS.finished(job_id, ok)
+        jobs.task_done()
 
-_worker_thread = threading.Thread(target=bot_worker, daemon=True)
-_worker_thread.start()
+        visits += 1
+        if BOT_RECYCLE_AFTER and visits >= BOT_RECYCLE_AFTER:
+            close_browser(browser)
+            browser = launch_browser(p)
+            visits = 0
+    close_browser(browser)
+
+
+def bot_worker():
+    # Playwright's sync API is bound to the thread that started it, so each
+    # worker owns one browser of the pool and relaunches it periodically.
+    with sync_playwright() as p:
+        serve_jobs(p, JOB_QUEUE)
+
+
+_worker_threads = [
+    threading.Thread(target=bot_worker, name=f"bot-worker-{i}", daemon=True)
+    for i in range(BOT_WORKERS)
+]
+for _worker_thread in _worker_threads:
+    _worker_thread.start()
 
 @app.get("/")
 def index():
@@ -81,8 +359,9 @@ def submit():
     text = request.form.get("text", "")
     sort = request.form.get("sort", "asc")
     submission_id = str(uuid.uuid4())
-    SUBMISSIONS[submission_id] = {"text": text, "sort": sort}
-    JOB_QUEUE.put(submission_id)
+    SUBMISSIONS.add(submission_id, text, sort)
+    JOBS.queued(submission_id)
+    JOB_QUEUE.put((submission_id, time.monotonic()))
     return render_template("submitted.html", submission_id=submission_id)
 
 
@@ -104,6 +383,63 @@ def view(submission_id):
     return render_template("view.html")
 
 
+@app.get("/bot/stats")
+def bot_stats():
+    stats = BOT_STATS.snapshot()
+    stats["queue_depth"] = JOB_QUEUE.qsize()
+    stats["workers"] = BOT_WORKERS
+    stats["stored_submissions"] = len(SUBMISSIONS)
+    stats["jobs"] = JOBS.counts()
+    return jsonify(stats)
+
+
+@app.get("/status/<job_id>")
+def job_status(job_id):
+    """Job state; ?wait=N&state=S long-polls until the state differs from S."""
+    try:
+        wait = min(float(request.args.get("wait", "0")), STATUS_MAX_WAIT)
+    except ValueError:
+        wait = 0
+    known_state = request.args.get("state")
+    if wait > 0 and known_state:
+        job = JOBS.wait(job_id, known_state, wait)
+    else:
+        job = JOBS.get(job_id)
+    if job is None:
+        return jsonify({"id": job_id, "state": "unknown"}), 404
+    return jsonify(describe_job(job_id, job))
+
+
+@app.get("/status/<job_id>/events")
+def job_events(job_id):
+    """Server-sent events, one per state change, closed once the job is final."""
+
+    def stream():
+        known_state = None
+        deadline = time.monotonic() + STATUS_MAX_WAIT * 4
+        while time.monotonic() < deadline:
+            if known_state is None:
+                job = JOBS.get(job_id)
+            else:
+                job = JOBS.wait(job_id, known_state, STATUS_MAX_WAIT)
+            if job is None:
+                yield "event: unknown\ndata: {}\n\n"
+                return
+            if job["state"] != known_state:
+                known_state = job["state"]
+                yield f"data: {json.dumps(describe_job(job_id, job))}\n\n"
+            else:
+                yield ": keepalive\n\n"
+            if known_state in JobTracker.FINAL_STATES:
+                return
+
+    return Response(
+        stream(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.get("/preview")
 def preview():
     return render_template("view.html")
@@ -114,19 +450,20 @@ def xpath_search():
     if remote_addr not in ("127.0.0.1", "::1"):
         return "Not Found", 404
     query = request.args.get("q", "")
-    xml_root = etree.fromstring(XML_DATA.encode("utf-8"))
-    xpath_expr = f"//knownspells/item[contains(name, '{query}') or contains(description, '{query}')]"
-    matches = xml_root.xpath(xpath_expr)
+    if SEARCH_INDEX is not None:
+        matches = [row for row in SEARCH_INDEX if query in row[1] or query in row[2]]
+    else:
+        matches = [
+            (
+                item.findtext("id", default=""),
+                item.findtext("name", default=""),
+                item.findtext("description", default=""),
+            )
+            for item in SEARCH_XPATH(INVENTORY, q=query)
+        ]
     if not matches:
         return "No matches"
-    lines = []
-    for item in matches:
-        item_id = item.findtext("id", default="")
-        name = item.findtext("name", default="")
-        description = item.findtext("description", default="")
-        lines.append(f"{item_id} | {name} | {description}")
-    return "\n".join(lines)
-
+    return "\n".join(" | ".join(row) for row in matches)
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=False)
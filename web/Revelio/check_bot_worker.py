@@ -0,0 +1,87 @@
+"""Check that a bot worker keeps serving jobs when a browser relaunch fails.
+
+Runs serve_jobs() against a fake Playwright whose first recycle raises,
+so no Chromium is needed. The app's own workers still start on import.
+
+    python check_bot_worker.py
+"""
+
+import logging
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+# Removed at exit; the app opens its store on import
+_DB_DIR = tempfile.TemporaryDirectory(prefix="revelio-check-")
+os.environ["SUBMISSIONS_DB"] = os.path.join(_DB_DIR.name, "submissions.db")
+
+import app  # noqa: E402
+
+JOBS_TO_RUN = 5
+
+
+class FakeBrowser:
+    def close(self):
+        pass
+
+
+class FakeChromium:
+    def __init__(self, failures):
+        self.failures = failures
+        self.launches = 0
+
+    def launch(self, headless=True):
+        self.launches += 1
+        if self.launches in self.failures:
+            raise RuntimeError(f"launch {self.launches} failed")
+        return FakeBrowser()
+
+
+class FakePlaywright:
+    def __init__(self, failures):
+        self.chromium = FakeChromium(failures)
+
+
+def main():
+    app.app.logger.setLevel(logging.CRITICAL)
+    app.visit = lambda browser, job_id: True
+    app.BOT_RECYCLE_AFTER = 1
+    app.BOT_RELAUNCH_DELAY = 0.01
+
+    # launch 1 starts the worker, launch 2 is the first recycle
+    p = FakePlaywright(failures={2, 3})
+    jobs = queue.Queue()
+    worker = threading.Thread(target=app.serve_jobs, args=(p, jobs), daemon=True)
+    worker.start()
+
+    job_ids = []
+    for _ in range(JOBS_TO_RUN):
+        job_id = str(uuid.uuid4())
+        app.JOBS.queued(job_id)
+        jobs.put((job_id, time.monotonic()))
+        job_ids.append(job_id)
+
+    states = {}
+    deadline = time.monotonic() + 10
+    for job_id in job_ids:
+        job = app.JOBS.get(job_id)
+        while job["state"] not in app.JobTracker.FINAL_STATES and time.monotonic() < deadline:
+            job = app.JOBS.wait(job_id, job["state"], 1)
+        states[job_id] = job["state"]
+
+    jobs.put(None)
+    worker.join(5)
+
+    done = sum(state == "done" for state in states.values())
+    print(f"{done}/{JOBS_TO_RUN} jobs done, {p.chromium.launches} launches "
+          f"({len(p.chromium.failures)} failed), worker {'stopped' if not worker.is_alive() else 'still running'}")
+    if done != JOBS_TO_RUN or worker.is_alive():
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,12 +8,59 @@ and use |attr() in the template to reach __class__, __subclasses__, etc.
 import json
 import os
 import re
+import threading
 from flask import Flask, request, jsonify
+from jinja2 import Environment
+
+from render_pool import RenderPool
+from template_cache import TemplateCache
 
 app = Flask(__name__)
 FLAG = os.environ.get("FLAG", "shellmates{s7i_byp4ss_v1a_c0nt3xt_p0llut10n}")
 
-# Forbidden keywords in the template *body* only (not in context values)
+# Same defaults as jinja2.Template(...), shared by every render
+TEMPLATES = TemplateCache(
+    Environment(),
+    max_templates=int(os.environ.get("TEMPLATE_CACHE_ENTRIES", "512")),
+    max_template_bytes=int(os.environ.get("TEMPLATE_CACHE_BYTES", str(8 * 1024 * 1024))),
+    max_bytecode_bytes=int(os.environ.get("BYTECODE_CACHE_BYTES", str(32 * 1024 * 1024))),
+    max_entry_bytes=int(os.environ.get("TEMPLATE_CACHE_ENTRY_BYTES", str(1024 * 1024))),
+    bytecode_dir=os.environ.get("BYTECODE_CACHE_DIR") or None,
+)
+
+# Renders run in resource-bounded worker processes; 0 workers renders inline
+RENDER_WORKERS = int(os.environ.get("RENDER_WORKERS", "4"))
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+
+def get_render_pool():
+    """Start the worker pool on first use (never at import, see multiprocessing forkserver)."""
+    global _render_pool
+    if RENDER_WORKERS <= 0:
+        return None
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = RenderPool(
+                size=RENDER_WORKERS,
+                cpu_seconds=int(os.environ.get("RENDER_CPU_SECONDS", "2")),
+                timeout=float(os.environ.get("RENDER_TIMEOUT", "5")),
+                memory_bytes=int(os.environ.get("RENDER_MEMORY_MB", "256")) * 1024 * 1024,
+                max_output=int(os.environ.get("RENDER_MAX_OUTPUT", str(1024 * 1024))),
+                max_renders=int(os.environ.get("RENDER_MAX_RENDERS", "500")),
+                recycle_rss=int(os.environ.get("RENDER_RECYCLE_RSS_MB", "128")) * 1024 * 1024,
+                cache={
+                    "max_templates": TEMPLATES.max_templates,
+                    "max_template_bytes": TEMPLATES.max_template_bytes,
+                    "max_bytecode_bytes": TEMPLATES.max_bytecode_bytes,
+                    "max_entry_bytes": TEMPLATES.max_entry_bytes,
+                    "bytecode_dir": os.environ.get("BYTECODE_CACHE_DIR") or None,
+                },
+            )
+        return _render_pool
+
+# Forbidden keywords in the template *body* only (not in context values).
+# Reference definition; is_template_blocked() implements it with a faster scanner.
 BLOCKLIST = re.compile(
     r"config|request|self|flag|open|eval|exec|"
     r"__class__|__globals__|__builtins__|__init__|"
@@ -23,9 +70,40 @@ BLOCKLIST = re.compile(
 )
 
 
+# Same accept/reject decision as BLOCKLIST.search, without the per-position
+# alternation: the template is case-folded once, every literal is then a
+# C-level substring search, and the two regex patterns only run when their
+# literal anchor is present.
+BLOCKLIST_LITERALS = (
+    "config", "request", "self", "flag", "open", "eval", "exec",
+    "__class__", "__globals__", "__builtins__", "__init__",
+    "lipsum", "cycler", "namespace", "get_flashed_messages", "joiner",
+    "subprocess", "os.", "file(",
+)  # "popen" is implied by "open"
+BLOCKLIST_REGEXES = (
+    (".read", re.compile(r"\.read\s*\(")),
+    (".write", re.compile(r"\.write\s*\(")),
+)
+# ASCII lower-casing plus the non-ASCII characters that re.IGNORECASE
+# matches against a letter used in BLOCKLIST (checked by bench_blocklist.py).
+BLOCKLIST_FOLD = {
+    **{ord(c): ord(c.lower()) for c in "ABCDEFGHIJKLMNOPQRSTUVWXYZ"},
+    0x130: ord("i"),  # LATIN CAPITAL LETTER I WITH DOT ABOVE
+    0x131: ord("i"),  # LATIN SMALL LETTER DOTLESS I
+    0x17F: ord("s"),  # LATIN SMALL LETTER LONG S
+}
+
+
 def is_template_blocked(template: str) -> bool:
     """Check if the template contains a blocklisted string."""
-    return bool(BLOCKLIST.search(template))
+    folded = template.lower() if template.isascii() else template.translate(BLOCKLIST_FOLD)
+    for literal in BLOCKLIST_LITERALS:
+        if literal in folded:
+            return True
+    for anchor, pattern in BLOCKLIST_REGEXES:
+        if anchor in folded and pattern.search(folded):
+            return True
+    return False
 
 
 @app.route("/")
@@ -66,15 +144,39 @@ def render():
         return jsonify({"error": f"Invalid JSON context: {e}"}), 400
 
     # We do not inject request/config: only the provided context is used
+    pool = get_render_pool()
     try:
-        from jinja2 import Template
-        t = Template(template)
-        out = t.render(**context)
+        if pool is not None:
+            out = pool.render(template, context)
+        else:
+            t = TEMPLATES.get_template(template)
+            try:
+                out = t.render(**context)
+            except Exception:
+                TEMPLATES.discard(template)
+                raise
     except Exception as e:
         return jsonify({"error": str(e), "rendered": None}), 400
 
     return jsonify({"rendered": out})
 
 
+@app.route("/cache-stats")
+def cache_stats():
+    pool = get_render_pool()
+    if pool is not None:
+        return jsonify(pool.snapshot()["cache"])
+    return jsonify(TEMPLATES.snapshot())
+
+
+@app.route("/render-stats")
+def render_stats():
+    pool = get_render_pool()
+    if pool is None:
+        return jsonify({"workers": 0})
+    return jsonify(pool.snapshot())
+
+
 if __name__ == "__main__":
+    get_render_pool()
     app.run(host="0.0.0.0", port=3000, debug=False)
@@ -0,0 +1,111 @@
+"""
+Differential fuzz test and benchmark for is_template_blocked().
+
+Checks that the scanner accepts and rejects exactly what the reference
+BLOCKLIST regex does, then times both on templates from 1 KB to 10 MB.
+
+    python bench_blocklist.py --cases 200000
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+
+from app import BLOCKLIST, BLOCKLIST_FOLD, is_template_blocked
+
+FRAGMENTS = [
+    "config", "request", "self", "flag", "open", "popen", "eval", "exec",
+    "__class__", "__globals__", "__builtins__", "__init__", "lipsum", "cycler",
+    "namespace", "get_flashed_messages", "joiner", "subprocess", "os.", "file(",
+    ".read(", ".write(", ".read  (", ".write\t(", ".read　(", ".rea", "(",
+    "{{ ", " }}", "{% ", " %}", "|attr(", "title", "snippet", "_", ".", " ",
+    "\n", "İ", "ı", "ſ", "K", "ß",
+]
+
+REALISTIC = (
+    "{% for item in items %}<li>{{ item.title|upper }} - {{ item.author }}"
+    " ({{ loop.index }})</li>{% endfor %}\n{{ snippet|attr(a1)|attr(a2) }}\n"
+)
+
+
+def mutate_case(text, rng):
+    return "".join(c.upper() if rng.random() < 0.5 else c for c in text)
+
+
+def random_template(rng):
+    parts = []
+    for _ in range(rng.randint(1, 4)):
+        fragment = rng.choice(FRAGMENTS)
+        if rng.random() < 0.5:
+            # Break literals apart so near-misses are exercised too.
+            cut = rng.randint(1, len(fragment))
+            fragment = fragment[:cut] + rng.choice(["", " ", "x", "ı"]) + fragment[cut:]
+        parts.append(mutate_case(fragment, rng))
+    return "".join(parts)
+
+
+def check_fold_table():
+    """Every non-ASCII char re.IGNORECASE matches to a BLOCKLIST letter is folded."""
+    letters = sorted(set(re.sub(r"[^a-z]", "", BLOCKLIST.pattern.lower())))
+    matchers = [(letter, re.compile(letter, re.IGNORECASE)) for letter in letters]
+    for cp in range(0x80, sys.maxunicode + 1):
+        ch = chr(cp)
+        for letter, matcher in matchers:
+            if matcher.fullmatch(ch) and BLOCKLIST_FOLD.get(cp) != ord(letter):
+                raise AssertionError(f"U+{cp:04X} matches {letter!r} but is not folded")
+
+
+def fuzz(cases, seed):
+    rng = random.Random(seed)
+    blocked = 0
+    for _ in range(cases):
+        template = random_template(rng)
+        expected = bool(BLOCKLIST.search(template))
+        if is_template_blocked(template) != expected:
+            raise AssertionError(f"mismatch on {template!r}: regex says {expected}")
+        blocked += expected
+    return blocked
+
+
+def bench(size, repeat):
+    template = (REALISTIC * (size // len(REALISTIC) + 1))[:size]
+    results = {}
+    for name, fn in (("regex", lambda t: bool(BLOCKLIST.search(t))), ("scanner", is_template_blocked)):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn(template)
+            best = min(best, time.perf_counter() - start)
+        results[name] = best
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuzz and benchmark the template blocklist.")
+    parser.add_argument("--cases", type=int, default=200000, help="random templates to compare")
+    parser.add_argument("--seed", type=int, default=1337)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-fold-check", action="store_true")
+    args = parser.parse_args()
+
+    if not args.skip_fold_check:
+        check_fold_table()
+        print("fold table: ok")
+
+    blocked = fuzz(args.cases, args.seed)
+    print(f"fuzz: {args.cases} templates, {blocked} blocked, no mismatch")
+
+    print(f"{'size':>8} {'regex ms':>10} {'scanner ms':>11} {'speedup':>8}")
+    for size in (1 << 10, 1 << 14, 1 << 17, 1 << 20, 10 << 20):
+        r = bench(size, args.repeat)
+        label = f"{size >> 20} MB" if size >= 1 << 20 else f"{size >> 10} KB"
+        print(
+            f"{label:>8} {r['regex'] * 1000:>10.2f} {r['scanner'] * 1000:>11.2f}"
+            f" {r['regex'] / r['scanner']:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
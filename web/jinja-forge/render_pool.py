@@ -0,0 +1,207 @@
+"""
+Pre-forked, resource-bounded rendering workers for Jinja Forge.
+
+Each render runs in a worker process with:
+- a CPU time budget (RLIMIT_CPU soft limit, SIGXCPU aborts the render),
+- an address-space cap (RLIMIT_AS, MemoryError aborts the render),
+- an output size cap enforced while streaming the template,
+and the parent kills any worker that misses its wall-clock deadline.
+Workers are recycled after a number of renders, after an aborted render,
+or once their peak RSS passes a threshold, so one pathological template
+can only ever cost one worker.
+"""
+
+import multiprocessing
+import queue
+import resource
+import signal
+import threading
+
+from jinja2 import Environment
+
+from template_cache import TemplateCache
+
+
+class RenderError(Exception):
+    """Render failed inside a worker; str(exc) is safe to show to the player."""
+
+
+class _Aborted(Exception):
+    pass
+
+
+def _on_sigxcpu(signum, frame):
+    raise _Aborted("Render exceeded CPU time limit.")
+
+
+def _render_one(templates, source, context, max_output):
+    """Return (status, payload, must_recycle)."""
+    try:
+        size = 0
+        parts = []
+        for chunk in templates.get_template(source).generate(**context):
+            size += len(chunk)
+            if size > max_output:
+                raise _Aborted("Rendered output too large.")
+            parts.append(chunk)
+        return "ok", "".join(parts), False
+    except _Aborted as e:
+        templates.discard(source)
+        return "error", str(e), True
+    except MemoryError:
+        templates.discard(source)
+        return "error", "Render exceeded memory limit.", True
+    except Exception as e:
+        templates.discard(source)
+        return "error", str(e), False
+
+
+def _worker_main(conn, config):
+    if config["memory_bytes"]:
+        resource.setrlimit(
+            resource.RLIMIT_AS, (config["memory_bytes"], resource.RLIM_INFINITY)
+        )
+    signal.signal(signal.SIGXCPU, _on_sigxcpu)
+    _, cpu_hard = resource.getrlimit(resource.RLIMIT_CPU)
+    templates = TemplateCache(Environment(), **config["cache"])
+
+    renders = 0
+    while True:
+        try:
+            source, context = conn.recv()
+        except EOFError:
+            return
+
+        used = resource.getrusage(resource.RUSAGE_SELF)
+        budget = int(used.ru_utime + used.ru_stime) + config["cpu_seconds"]
+        resource.setrlimit(resource.RLIMIT_CPU, (budget, cpu_hard))
+        try:
+            status, payload, recycle = _render_one(
+                templates, source, context, config["max_output"]
+            )
+        finally:
+            resource.setrlimit(resource.RLIMIT_CPU, (cpu_hard, cpu_hard))
+
+        renders += 1
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        if renders >= config["max_renders"]:
+            recycle = True
+        if config["recycle_rss"] and peak_rss > config["recycle_rss"]:
+            recycle = True
+
+        conn.send((status, payload, templates.snapshot(), recycle))
+        if recycle:
+            return
+
+
+class _Worker:
+    def __init__(self, ctx, config):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, config), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.cache_stats = {}
+
+    def retire(self, kill=False):
+        if kill:
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class RenderPool:
+    def __init__(
+        self,
+        size=4,
+        cpu_seconds=2,
+        timeout=5.0,
+        memory_bytes=256 * 1024 * 1024,
+        max_output=1024 * 1024,
+        max_renders=500,
+        recycle_rss=128 * 1024 * 1024,
+        cache=None,
+    ):
+        self.size = size
+        self.timeout = timeout
+        self._config = {
+            "cpu_seconds": cpu_seconds,
+            "memory_bytes": memory_bytes,
+            "max_output": max_output,
+            "max_renders": max_renders,
+            "recycle_rss": recycle_rss,
+            "cache": cache or {},
+        }
+        methods = multiprocessing.get_all_start_methods()
+        self._ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else None)
+        self._idle = queue.LifoQueue()
+        self._workers = set()
+        self._lock = threading.Lock()
+        self._retired_cache = {}
+        self.stats = {"renders": 0, "errors": 0, "timeouts": 0, "crashes": 0, "recycled": 0}
+        for _ in range(size):
+            self._spawn()
+
+    def _spawn(self):
+        worker = _Worker(self._ctx, self._config)
+        with self._lock:
+            self._workers.add(worker)
+        self._idle.put(worker)
+
+    def _replace(self, worker, kill):
+        worker.retire(kill=kill)
+        with self._lock:
+            self._workers.discard(worker)
+            for name, value in worker.cache_stats.items():
+                if isinstance(value, int):
+                    self._retired_cache[name] = self._retired_cache.get(name, 0) + value
+            self.stats["recycled"] += 1
+        self._spawn()
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def render(self, source, context):
+        """Render source with context in a worker; raise RenderError on failure."""
+        try:
+            worker = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise RenderError("All render workers are busy, try again.")
+
+        try:
+            worker.conn.send((source, context))
+            if not worker.conn.poll(self.timeout):
+                self._count("timeouts")
+                self._replace(worker, kill=True)
+                raise RenderError("Render timed out.")
+            status, payload, worker.cache_stats, recycle = worker.conn.recv()
+        except (EOFError, OSError):
+            # Killed by the kernel, e.g. SIGXCPU hit in C code or OOM.
+            self._count("crashes")
+            self._replace(worker, kill=True)
+            raise RenderError("Render worker crashed.")
+
+        self._count("renders")
+        if recycle:
+            self._replace(worker, kill=False)
+        else:
+            self._idle.put(worker)
+
+        if status != "ok":
+            self._count("errors")
+            raise RenderError(payload)
+        return payload
+
+    def snapshot(self):
+        with self._lock:
+            cache = dict(self._retired_cache)
+            for worker in self._workers:
+                for name, value in worker.cache_stats.items():
+                    if isinstance(value, int):
+                        cache[name] = cache.get(name, 0) + value
+            return {
+                **self.stats,
+                "workers": self.size,
+                "idle": self._idle.qsize(),
+                "cache": cache,
+            }
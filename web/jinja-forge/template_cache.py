@@ -0,0 +1,156 @@
+"""
+Compiled-template cache for Jinja Forge.
+
+Templates are keyed by the SHA-256 of their source and cached at two levels:
+- compiled Template objects (LRU, bounded by entry count and bytecode bytes);
+- marshalled bytecode (LRU, bounded by bytes), so a template evicted from the
+  first level is rebuilt without parsing or compiling again.
+An optional on-disk bytecode cache (jinja2.FileSystemBytecodeCache) survives
+restarts.
+
+Entries are charged for their marshalled bytecode, not their source: Jinja
+constant-folds expressions, so a short template can compile to megabytes of
+constants. Templates whose bytecode exceeds max_entry_bytes are compiled and
+returned but never cached, and discard() drops a template whose render failed.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+from jinja2 import Environment, FileSystemBytecodeCache
+from jinja2.bccache import Bucket
+
+
+class TemplateCache:
+    def __init__(
+        self,
+        environment: Environment,
+        max_templates: int = 512,
+        max_template_bytes: int = 8 * 1024 * 1024,
+        max_bytecode_bytes: int = 32 * 1024 * 1024,
+        max_entry_bytes: int = 1024 * 1024,
+        bytecode_dir: str = None,
+    ):
+        self.environment = environment
+        self.max_templates = max_templates
+        self.max_template_bytes = max_template_bytes
+        self.max_bytecode_bytes = max_bytecode_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.disk = FileSystemBytecodeCache(bytecode_dir) if bytecode_dir else None
+
+        self._templates = OrderedDict()  # key -> (Template, bytecode size)
+        self._template_bytes = 0
+        self._bytecode = OrderedDict()  # key -> marshalled bytecode
+        self._bytecode_bytes = 0
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "template_hits": 0,
+            "bytecode_hits": 0,
+            "disk_hits": 0,
+            "compiles": 0,
+            "template_evictions": 0,
+            "bytecode_evictions": 0,
+            "oversized": 0,
+            "discards": 0,
+        }
+
+    def get_template(self, source: str):
+        """Return a compiled Template for source, compiling only on a full miss."""
+        key = self._key(source)
+
+        with self._lock:
+            entry = self._templates.get(key)
+            if entry is not None:
+                self._templates.move_to_end(key)
+                self.stats["template_hits"] += 1
+                return entry[0]
+            bytecode = self._bytecode.get(key)
+            if bytecode is not None:
+                self._bytecode.move_to_end(key)
+
+        bucket = Bucket(self.environment, key, key)
+        if bytecode is not None:
+            bucket.bytecode_from_string(bytecode)
+            hit = "bytecode_hits"
+        else:
+            if self.disk is not None:
+                self.disk.load_bytecode(bucket)
+            if bucket.code is not None:
+                hit = "disk_hits"
+            else:
+                # Raises TemplateSyntaxError just like jinja2.Template(source).
+                bucket.code = self.environment.compile(source)
+                hit = "compiles"
+            bytecode = bucket.bytecode_to_string()
+            if hit == "compiles" and self.disk is not None and len(bytecode) <= self.max_entry_bytes:
+                self.disk.dump_bytecode(bucket)
+
+        template = self.environment.template_class.from_code(
+            self.environment, bucket.code, self.environment.make_globals(None)
+        )
+
+        with self._lock:
+            self.stats[hit] += 1
+            if len(bytecode) > self.max_entry_bytes:
+                self.stats["oversized"] += 1
+            else:
+                self._store_bytecode(key, bytecode)
+                self._store_template(key, template, len(bytecode))
+        return template
+
+    def discard(self, source: str):
+        """Drop a template from both levels, e.g. after its render failed."""
+        key = self._key(source)
+        with self._lock:
+            entry = self._templates.pop(key, None)
+            if entry is not None:
+                self._template_bytes -= entry[1]
+            bytecode = self._bytecode.pop(key, None)
+            if bytecode is not None:
+                self._bytecode_bytes -= len(bytecode)
+            if entry is not None or bytecode is not None:
+                self.stats["discards"] += 1
+
+    @staticmethod
+    def _key(source: str) -> str:
+        return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+    def _store_bytecode(self, key, bytecode):
+        if key in self._bytecode or len(bytecode) > self.max_bytecode_bytes:
+            return
+        self._bytecode[key] = bytecode
+        self._bytecode_bytes += len(bytecode)
+        while self._bytecode_bytes > self.max_bytecode_bytes:
+            _, evicted = self._bytecode.popitem(last=False)
+            self._bytecode_bytes -= len(evicted)
+            self.stats["bytecode_evictions"] += 1
+
+    def _store_template(self, key, template, size):
+        if key in self._templates or size > self.max_template_bytes:
+            return
+        self._templates[key] = (template, size)
+        self._template_bytes += size
+        while (
+            len(self._templates) > self.max_templates
+            or self._template_bytes > self.max_template_bytes
+        ):
+            _, (_, evicted_size) = self._templates.popitem(last=False)
+            self._template_bytes -= evicted_size
+            self.stats["template_evictions"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            lookups = sum(
+                self.stats[name]
+                for name in ("template_hits", "bytecode_hits", "disk_hits", "compiles")
+            )
+            return {
+                **self.stats,
+                "hit_ratio": round(1 - self.stats["compiles"] / lookups, 4) if lookups else None,
+                "templates": len(self._templates),
+                "template_bytes": self._template_bytes,
+                "bytecode_entries": len(self._bytecode),
+                "bytecode_bytes": self._bytecode_bytes,
+            }
@@ -4,8 +4,17 @@ Application Flask avec authentification JWT volontairement vulnérable
 à l'algorithme "none".
 """
 
+import base64
+import hashlib
+import hmac
+import json
 import os
+import threading
+import time
+from collections import OrderedDict
+
 import jwt
+from jwt.algorithms import HMACAlgorithm
 from flask import Flask, request, jsonify
 from functools import wraps
 
@@ -17,20 +26,117 @@ JWT_SECRET = os.environ.get("JWT_SECRET", "vault-secret-key-2024")
 
 FLAG = os.environ.get("FLAG", "shellmates{jwt_n0n3_4lg_1s_d4ng3r0us}")
 
+# Clé HMAC préparée une seule fois au démarrage plutôt qu'à chaque vérification
+HMAC_KEY = HMACAlgorithm(HMACAlgorithm.SHA256).prepare_key(JWT_SECRET)
+
+# Durée de vie des tokens émis (claims iat/exp) ; 0 pour ne pas les ajouter
+TOKEN_LIFETIME = int(os.environ.get("TOKEN_LIFETIME", "3600"))
+
+TOKEN_CACHE_SIZE = int(os.environ.get("TOKEN_CACHE_SIZE", "4096"))
+TOKEN_CACHE_TTL = float(os.environ.get("TOKEN_CACHE_TTL", "300"))
+
+
+class TokenCache:
+    """
+    LRU borné token -> payload déjà vérifié.
+    Une entrée expire après `ttl` secondes, ou plus tôt si le claim `exp`
+    du payload arrive à échéance.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            payload, expires_at = entry
+            if expires_at <= now:
+                del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return payload
+
+    def put(self, token: str, payload: dict) -> None:
+        if self.max_size <= 0:
+            return
+        expires_at = time.time() + self.ttl
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, exp)
+        with self._lock:
+            self._entries[token] = (payload, expires_at)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+TOKEN_CACHE = TokenCache(TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL)
+
+
+def _b64url(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+# En-tête HS256 encodé une seule fois (identique à celui produit par jwt.encode)
+_HEADER_SEGMENT = _b64url(b'{"alg":"HS256","typ":"JWT"}')
+# État HMAC avec la clé déjà absorbée : chaque token ne fait qu'un copy() + update()
+_HMAC_BASE = hmac.new(HMAC_KEY, digestmod=hashlib.sha256)
+
 
 def create_token(username: str, role: str) -> str:
-    """Crée un JWT signé avec HS256."""
+    """
+    Crée un JWT signé avec HS256.
+    Seuls le payload et la signature sont calculés à chaque appel.
+    """
     payload = {"user": username, "role": role}
-    return jwt.encode(
-        payload,
-        JWT_SECRET,
-        algorithm="HS256",
+    if TOKEN_LIFETIME > 0:
+        now = int(time.time())
+        payload["iat"] = now
+        payload["exp"] = now + TOKEN_LIFETIME
+    signing_input = (
+        _HEADER_SEGMENT
+        + b"."
+        + _b64url(json.dumps(payload, separators=(",", ":")).encode())
     )
+    mac = _HMAC_BASE.copy()
+    mac.update(signing_input)
+    return (signing_input + b"." + _b64url(mac.digest())).decode()
 
 
 def decode_token_vulnerable(token: str):
     """
-    Décode et vérifie le JWT.
+    Décode et vérifie le JWT, en passant d'abord par le cache des tokens
+    déjà vérifiés.
+    """
+    payload = TOKEN_CACHE.get(token)
+    if payload is None:
+        payload = verify_token_vulnerable(token)
+        if payload is None:
+            return None
+        TOKEN_CACHE.put(token, payload)
+    return dict(payload)
+
+
+def verify_token_vulnerable(token: str):
+    """
+    Décode et vérifie le JWT, sans cache.
     Comportement vulnérable : si alg est "none", la signature n'est pas vérifiée.
     (Simule une mauvaise configuration courante dans des librairies JWT.)
     """
@@ -47,7 +153,7 @@ def decode_token_vulnerable(token: str):
         # Comportement normal : vérifier avec la clé
         return jwt.decode(
             token,
-            JWT_SECRET,
+            HMAC_KEY,
             algorithms=["HS256"],
         )
     except jwt.InvalidTokenError:
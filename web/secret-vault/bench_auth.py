@@ -0,0 +1,79 @@
+"""
+Micro-benchmark de l'authentification JWT.
+
+- émission : tokens/s de create_token comparé à jwt.encode, par cœur ;
+- vérification : vérifications/s avec et sans cache.
+
+    python bench_auth.py --tokens 100 --rounds 20000 --processes 4
+"""
+
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import jwt
+
+from app import (
+    JWT_SECRET,
+    TOKEN_CACHE,
+    create_token,
+    decode_token_vulnerable,
+    verify_token_vulnerable,
+)
+
+
+def measure(fn, tokens, rounds):
+    start = time.perf_counter()
+    for i in range(rounds):
+        fn(tokens[i % len(tokens)])
+    return rounds / (time.perf_counter() - start)
+
+
+def encode_with_pyjwt(username):
+    return jwt.encode({"user": username, "role": "user"}, JWT_SECRET, algorithm="HS256")
+
+
+def mint(username):
+    return create_token(username, "user")
+
+
+def mint_rate(rounds):
+    return measure(mint, [f"player{i}" for i in range(100)], rounds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark de l'authentification JWT.")
+    parser.add_argument("--tokens", type=int, default=100, help="nombre de tokens distincts")
+    parser.add_argument("--rounds", type=int, default=20000, help="opérations par mesure")
+    parser.add_argument("--processes", type=int, default=1, help="processus pour l'émission")
+    args = parser.parse_args()
+
+    usernames = [f"player{i}" for i in range(args.tokens)]
+
+    print("== émission ==")
+    pyjwt = measure(encode_with_pyjwt, usernames, args.rounds)
+    minted = measure(mint, usernames, args.rounds)
+    print(f"jwt.encode   : {pyjwt:12,.0f} tokens/s")
+    print(f"create_token : {minted:12,.0f} tokens/s (x{minted / pyjwt:.1f})")
+    if args.processes > 1:
+        with ProcessPoolExecutor(args.processes) as pool:
+            rates = list(pool.map(mint_rate, [args.rounds] * args.processes))
+        print(
+            f"{args.processes} processus  : {sum(rates):12,.0f} tokens/s "
+            f"({sum(rates) / len(rates):,.0f} par cœur)"
+        )
+
+    print("== vérification ==")
+    tokens = [create_token(name, "user") for name in usernames]
+    uncached = measure(verify_token_vulnerable, tokens, args.rounds)
+
+    TOKEN_CACHE.clear()
+    cached = measure(decode_token_vulnerable, tokens, args.rounds)
+
+    print(f"sans cache : {uncached:12,.0f} vérifications/s ({1e6 / uncached:8.2f} µs)")
+    print(f"avec cache : {cached:12,.0f} vérifications/s ({1e6 / cached:8.2f} µs)")
+    print(f"accélération x{cached / uncached:.1f} (hits={TOKEN_CACHE.hits}, misses={TOKEN_CACHE.misses})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+Load generator for the touch-line app.
+
+Runs a weighted mix of page, auth and bot routes from N concurrent virtual
+users (pure asyncio, no third-party client) and reports p50/p95/p99 latency
+and throughput per route.
+
+By default a private copy of the app is started in-process on a temporary
+database, with the Playwright bot replaced by a local stub, so runs are
+reproducible and never launch a browser. Use --url to target a running
+deployment instead.
+
+    python loadtest.py --users 20 --duration 30 --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from urllib.parse import urlencode, urlparse
+
+ROUTE_MIX = {
+    "/": 30,
+    "/posts/<id>": 30,
+    "/api/track-last-visited": 15,
+    "/profile": 10,
+    "/login": 8,
+    "/register": 5,
+    "/api/bot/visit": 2,
+}
+
+PERCENTILES = (50, 95, 99)
+
+
+class VirtualUser:
+    def __init__(self, host, port, post_ids):
+        self.host = host
+        self.port = port
+        self.post_ids = post_ids
+        self.cookies = {}
+        self.username = f"load_{uuid.uuid4().hex[:12]}"
+        self.password = uuid.uuid4().hex
+
+    async def request(self, method, path, form=None, json_body=None):
+        headers = {"Host": f"{self.host}:{self.port}", "Connection": "close"}
+        body = b""
+        if form is not None:
+            body = urlencode(form).encode()
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        elif json_body is not None:
+            body = json.dumps(json_body).encode()
+            headers["Content-Type"] = "application/json"
+        if body:
+            headers["Content-Length"] = str(len(body))
+        if self.cookies:
+            headers["Cookie"] = "; ".join(f"{k}={v}" for k, v in self.cookies.items())
+
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            head = f"{method} {path} HTTP/1.1\r\n"
+            head += "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+            writer.write(head.encode() + b"\r\n" + body)
+            await writer.drain()
+            raw = await reader.read()
+        finally:
+            writer.close()
+
+        header_blob, _, _ = raw.partition(b"\r\n\r\n")
+        lines = header_blob.decode("latin-1").split("\r\n")
+        status = int(lines[0].split()[1])
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            if name.lower() == "set-cookie":
+                cookie_name, _, rest = value.strip().partition("=")
+                cookie_value = rest.split(";", 1)[0]
+                if "expires=thu, 01 jan 1970" in value.lower():
+                    self.cookies.pop(cookie_name, None)
+                else:
+                    self.cookies[cookie_name] = cookie_value
+        return status
+
+    async def register(self):
+        return await self.request(
+            "POST",
+            "/register",
+            form={"username": self.username, "password": self.password, "bio": "load test"},
+        )
+
+    async def run_route(self, route):
+        if route == "/":
+            return await self.request("GET", "/")
+        if route == "/posts/<id>":
+            return await self.request("GET", f"/posts/{random.choice(self.post_ids)}")
+        if route == "/api/track-last-visited":
+            post_id = random.choice(self.post_ids)
+            return await self.request("GET", f"/api/track-last-visited?post_id={post_id}")
+        if route == "/profile":
+            return await self.request("GET", "/profile")
+        if route == "/login":
+            return await self.request(
+                "POST",
+                "/login",
+                form={"username": self.username, "password": self.password},
+            )
+        if route == "/register":
+            # Fresh identity each time so the INSERT path is exercised, not the
+            # "already exists" early return.
+            self.username = f"load_{uuid.uuid4().hex[:12]}"
+            self.cookies.clear()
+            return await self.register()
+        if route == "/api/bot/visit":
+            links = [f"/posts/{random.choice(self.post_ids)}"]
+            return await self.request("POST", "/api/bot/visit", json_body={"links": links})
+        raise ValueError(f"unknown route {route!r}")
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    rank = max(1, -(-pct * len(sorted_values) // 100))
+    return sorted_values[rank - 1]
+
+
+def summarize(samples, errors, elapsed):
+    routes = {}
+    for route in ROUTE_MIX:
+        latencies = sorted(samples.get(route, []))
+        entry = {
+            "requests": len(latencies),
+            "errors": errors.get(route, 0),
+            "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        }
+        for pct in PERCENTILES:
+            value = percentile(latencies, pct)
+            entry[f"p{pct}_ms"] = round(value * 1000, 3) if value is not None else None
+        routes[route] = entry
+
+    total = sum(entry["requests"] for entry in routes.values())
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "total_requests": total,
+        "total_errors": sum(errors.values()),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "routes": routes,
+    }
+
+
+async def user_loop(user, deadline, max_requests, counter, samples, errors, rng):
+    routes = list(ROUTE_MIX)
+    weights = [ROUTE_MIX[route] for route in routes]
+
+    await user.register()
+    while time.perf_counter() < deadline:
+        if max_requests is not None:
+            if counter[0] >= max_requests:
+                break
+            counter[0] += 1
+
+        route = rng.choices(routes, weights)[0]
+        start = time.perf_counter()
+        try:
+            status = await user.run_route(route)
+        except (OSError, ValueError, IndexError, asyncio.IncompleteReadError):
+            status = None
+        latency = time.perf_counter() - start
+
+        samples.setdefault(route, []).append(latency)
+        if status is None or status >= 500:
+            errors[route] = errors.get(route, 0) + 1
+
+
+async def run_load(host, port, post_ids, users, duration, max_requests, seed):
+    samples = {}
+    errors = {}
+    counter = [0]
+    start = time.perf_counter()
+    deadline = start + duration
+    tasks = [
+        user_loop(
+            VirtualUser(host, port, post_ids),
+            deadline,
+            max_requests,
+            counter,
+            samples,
+            errors,
+            random.Random(seed + index),
+        )
+        for index in range(users)
+    ]
+    await asyncio.gather(*tasks)
+    return summarize(samples, errors, time.perf_counter() - start)
+
+
+def start_local_server(db_dir, bot_delay_ms):
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    from webapp import api, create_app
+
+    # Always the throwaway copy, even if DATABASE_PATH points at a real database
+    os.environ["DATABASE_PATH"] = os.path.join(db_dir, "touchline.db")
+    app = create_app()
+
+    def stub_bot_visit(links):
+        time.sleep(bot_delay_ms / 1000)
+
+    api._run_bot_visit = stub_bot_visit
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    with app.app_context():
+        from webapp.db import fetch_posts
+
+        post_ids = [post["id"] for post in fetch_posts()]
+    return server, post_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the touch-line app.")
+    parser.add_argument("--url", help="target a running instance instead of a local copy")
+    parser.add_argument("--users", type=int, default=10, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=10.0, help="run time in seconds")
+    parser.add_argument("--requests", type=int, help="stop after this many requests in total")
+    parser.add_argument("--post-ids", default="1,2,3", help="post ids to visit with --url")
+    parser.add_argument(
+        "--bot-delay-ms",
+        type=float,
+        default=50.0,
+        help="simulated visit time of the local bot stub",
+    )
+    parser.add_argument("--seed", type=int, default=1337)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    server = None
+    db_dir = None
+    try:
+        if args.url:
+            parsed = urlparse(args.url)
+            host = parsed.hostname
+            port = parsed.port or 80
+            post_ids = [int(value) for value in args.post_ids.split(",") if value]
+        else:
+            db_dir = tempfile.mkdtemp(prefix="touchline-load-")
+            server, post_ids = start_local_server(db_dir, args.bot_delay_ms)
+            host, port = "127.0.0.1", server.server_port
+
+        report = asyncio.run(
+            run_load(host, port, post_ids, args.users, args.duration, args.requests, args.seed)
+        )
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+        if db_dir is not None:
+            shutil.rmtree(db_dir, ignore_errors=True)
+
+    report["config"] = {
+        "target": args.url or "local",
+        "users": args.users,
+        "duration_s": args.duration,
+        "max_requests": args.requests,
+        "bot_delay_ms": None if args.url else args.bot_delay_ms,
+        "mix": ROUTE_MIX,
+        "seed": args.seed,
+    }
+
+    print(f"{'route':<26}{'reqs':>7}{'err':>6}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for route, entry in report["routes"].items():
+        cells = [entry[f"p{pct}_ms"] for pct in PERCENTILES]
+        cells = "".join(f"{'-' if c is None else c:>10}" for c in cells)
+        print(
+            f"{route:<26}{entry['requests']:>7}{entry['errors']:>6}"
+            f"{entry['throughput_rps']:>9}{cells}"
+        )
+    print(f"total: {report['total_requests']} requests, {report['throughput_rps']} req/s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()